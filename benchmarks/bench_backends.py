@@ -0,0 +1,54 @@
+import sys
+import os
+import time
+import argparse
+import numpy as np
+import pandas as pd
+
+# Add src directory to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from config import get_fallback_data_dir
+from sentiment_analyzer import clean_texts, label_scores
+from sentiment_backends import BACKENDS, get_backend
+
+def load_fallback_tweets():
+    """Load every fallback CSV into one DataFrame"""
+    frames = [pd.read_csv(path) for path in sorted(get_fallback_data_dir().glob("*.csv"))]
+    return pd.concat(frames, ignore_index=True)
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare sentiment backends on the fallback data")
+    parser.add_argument("--repeat", type=int, default=3, help="Timed runs per backend (best is kept)")
+    args = parser.parse_args()
+    
+    df = load_fallback_tweets()
+    texts = clean_texts(df['text'].tolist())
+    # The fallback CSVs carry a reference sentiment score for each tweet
+    reference = label_scores(df['sentiment'].to_numpy())
+    
+    print(f"Backend benchmark: {len(texts)} fallback tweets")
+    print("-" * 60)
+    print(f"{'method':<10} {'texts/sec':>12} {'label agreement':>16} {'mean score':>11}")
+    
+    labels = {}
+    for name in sorted(BACKENDS):
+        backend = get_backend(name)
+        best = float('inf')
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            scores = backend.score_batch(texts)
+            best = min(best, time.perf_counter() - start)
+        
+        labels[name] = label_scores(scores)
+        agreement = np.mean(labels[name] == reference)
+        print(f"{name:<10} {len(texts) / best:>12,.0f} {agreement:>16.1%} {scores.mean():>11.3f}")
+    
+    print("\nPairwise label agreement:")
+    names = sorted(labels)
+    for i, first in enumerate(names):
+        for second in names[i + 1:]:
+            print(f"  {first} vs {second}: {np.mean(labels[first] == labels[second]):.1%}")
+
+if __name__ == "__main__":
+    main()
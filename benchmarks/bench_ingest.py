@@ -0,0 +1,98 @@
+import sys
+import os
+import time
+import random
+import tempfile
+import argparse
+from datetime import datetime, timedelta
+
+# Add src directory to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+import database
+
+def make_tweets(count, product="iPhone 15"):
+    """Build synthetic tweets with unique ids"""
+    base_date = datetime(2024, 1, 1)
+    tweets = []
+    
+    for i in range(count):
+        tweet_date = base_date + timedelta(minutes=random.randint(0, 60 * 24 * 30))
+        tweets.append({
+            'id': str(1000000000000000000 + i),
+            'created_at': tweet_date.strftime('%Y-%m-%d %H:%M:%S'),
+            'text': f"Sample tweet {i} about the {product}",
+            'user_id': f'user_{random.randint(1000, 9999)}',
+            'likes': random.randint(0, 100),
+            'retweets': random.randint(0, 20),
+            'sentiment': round(random.uniform(-1, 1), 3),
+            'product': product
+        })
+    
+    return tweets
+
+def legacy_insert_tweets(tweets):
+    """The original per-row insert loop, kept as the baseline"""
+    conn = database.create_connection()
+    cursor = conn.cursor()
+    
+    for tweet in tweets:
+        try:
+            cursor.execute(database.INSERT_TWEET_SQL, (
+                tweet.get('id'),
+                tweet.get('created_at'),
+                tweet.get('text'),
+                tweet.get('user_id', 'unknown'),
+                tweet.get('likes', 0),
+                tweet.get('retweets', 0),
+                tweet.get('sentiment', 0),
+                tweet.get('product')
+            ))
+        except Exception as e:
+            print(f"Error inserting tweet: {e}")
+    
+    conn.commit()
+    conn.close()
+
+def time_insert(func, tweets):
+    """Run an insert function against a fresh database and return rows/sec"""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        database.DATABASE_PATH = os.path.join(tmp_dir, "bench.db")
+        database.create_table()
+        
+        start = time.perf_counter()
+        func(tweets)
+        elapsed = time.perf_counter() - start
+        database.close_connections()
+    
+    return len(tweets) / elapsed, elapsed
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark tweet ingest")
+    parser.add_argument("--rows", type=int, default=100000, help="Number of tweets to insert")
+    parser.add_argument("--batch-size", type=int, default=1000, help="Bulk insert batch size")
+    args = parser.parse_args()
+    
+    tweets = make_tweets(args.rows)
+    
+    print(f"Ingest benchmark: {args.rows} tweets")
+    print("-" * 40)
+    
+    legacy_rate, legacy_time = time_insert(legacy_insert_tweets, tweets)
+    print(f"Per-row loop:  {legacy_rate:>10,.0f} rows/sec ({legacy_time:.2f}s)")
+    
+    bulk_rate, bulk_time = time_insert(
+        lambda rows: database.insert_tweets_bulk(rows, batch_size=args.batch_size), tweets
+    )
+    print(f"Bulk insert:   {bulk_rate:>10,.0f} rows/sec ({bulk_time:.2f}s)")
+    
+    columns = {column: [tweet[column] for tweet in tweets] for column in database.TWEET_COLUMNS}
+    columnar_rate, columnar_time = time_insert(
+        lambda rows: database.insert_tweets_bulk(columns, batch_size=args.batch_size), tweets
+    )
+    print(f"Bulk columnar: {columnar_rate:>10,.0f} rows/sec ({columnar_time:.2f}s)")
+    
+    print(f"Speedup: {bulk_rate / legacy_rate:.1f}x")
+
+if __name__ == "__main__":
+    main()
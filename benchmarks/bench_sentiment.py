@@ -0,0 +1,73 @@
+import sys
+import os
+import time
+import argparse
+
+# Add src directory to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from tweet_collector import generate_sample_tweets
+from config import SENTIMENT_CONFIG
+from sentiment_analyzer import (
+    analyze_sentiment, get_sentiment_label, analyze_sentiment_batch, shutdown_process_pool,
+    get_sentiment_cache
+)
+
+def make_texts(count):
+    """Build launch-day style texts from the sample tweet templates"""
+    products = ["iPhone 15", "Galaxy S24", "Pixel 8", "OnePlus 12", "Nothing Phone"]
+    per_product = count // len(products) + 1
+    texts = []
+    
+    for product in products:
+        texts.extend(tweet['text'] for tweet in generate_sample_tweets(product, per_product))
+    
+    return texts[:count]
+
+def per_tweet_loop(texts):
+    """The original one-text-at-a-time scoring loop"""
+    return [(score, get_sentiment_label(score)) for score in map(analyze_sentiment, texts)]
+
+def time_run(func, texts):
+    """Return texts/sec for one run of func"""
+    start = time.perf_counter()
+    func(texts)
+    return len(texts) / (time.perf_counter() - start)
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark sentiment scoring")
+    parser.add_argument("--texts", type=int, default=20000, help="Number of texts to score")
+    parser.add_argument("--workers", type=int, default=SENTIMENT_CONFIG["workers"], help="Process pool size")
+    args = parser.parse_args()
+    
+    texts = make_texts(args.texts)
+    # Suffix every text with its index so nothing can be deduplicated
+    unique_texts = [f"{text} {i}" for i, text in enumerate(texts)]
+    
+    print(f"Sentiment benchmark: {len(texts)} texts ({len(set(texts))} distinct)")
+    print("-" * 40)
+    
+    # Score everything from scratch; the cache is measured separately below
+    SENTIMENT_CONFIG["cache_enabled"] = False
+    
+    for name, data in [("template texts", texts), ("all-unique texts", unique_texts)]:
+        loop_rate = time_run(per_tweet_loop, data)
+        batch_rate = time_run(lambda rows: analyze_sentiment_batch(rows, workers=1), data)
+        # Warm the pool first so worker start-up is not counted
+        analyze_sentiment_batch(data[:SENTIMENT_CONFIG["parallel_min_batch"]], workers=args.workers)
+        pool_rate = time_run(lambda rows: analyze_sentiment_batch(rows, workers=args.workers), data)
+        
+        print(f"{name}:")
+        print(f"  Per-tweet loop: {loop_rate:>10,.0f} texts/sec")
+        print(f"  Batch engine:   {batch_rate:>10,.0f} texts/sec ({batch_rate / loop_rate:.1f}x)")
+        print(f"  Process pool:   {pool_rate:>10,.0f} texts/sec ({pool_rate / loop_rate:.1f}x, {args.workers} workers)")
+    
+    SENTIMENT_CONFIG["cache_enabled"] = True
+    analyze_sentiment_batch(unique_texts)
+    cached_rate = time_run(analyze_sentiment_batch, unique_texts)
+    print(f"Cached rerun of all-unique texts: {cached_rate:>10,.0f} texts/sec ({get_sentiment_cache().stats()['hit_rate']:.0%} hit rate)")
+    
+    shutdown_process_pool()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,208 @@
+import sys
+import os
+import json
+import time
+import platform
+import tempfile
+import argparse
+import subprocess
+from contextlib import redirect_stdout
+from datetime import datetime
+from io import StringIO
+from pathlib import Path
+
+import numpy as np
+
+# Add src directory to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+import charts
+import database
+import timeseries
+from config import SENTIMENT_CONFIG
+from load_generator import LoadGenerator
+from sentiment_analyzer import analyze_tweets_sentiment, shutdown_process_pool
+from utils import calculate_metrics, filter_tweets_by_date, prepare_tweets
+
+RESULTS_DIR = Path(__file__).parent / "results"
+DEFAULT_SIZES = [10000, 100000]
+
+def make_dataset(rows, seed=0):
+    """Seeded load-generator tweets over 30 days from 2024-01-01 with unique ids"""
+    generator = LoadGenerator(start=datetime(2024, 1, 1), days=30, seed=seed, sequence_start=0)
+    return generator.chunk(rows)
+
+def measure(func, repeat, setup=None):
+    """Time `func(setup())` `repeat` times; setup time is not counted"""
+    times = []
+    for _ in range(repeat):
+        arg = setup() if setup else None
+        with redirect_stdout(StringIO()):
+            start = time.perf_counter()
+            func(arg)
+            times.append(time.perf_counter() - start)
+    return times
+
+def render(fig):
+    """Serialize a figure the way the dashboard does before sending it to the browser"""
+    if fig is not None:
+        fig.to_json()
+
+def summarize(times, rows):
+    best = min(times)
+    return {
+        'min': best,
+        'median': float(np.median(times)),
+        'mean': float(np.mean(times)),
+        'runs': len(times),
+        'rows_per_sec': rows / best if best else None
+    }
+
+def run_size(rows, repeat, tmp_dir):
+    """Run every benchmark for one dataset size"""
+    print(f"\n{rows:,} tweets")
+    print("-" * 60)
+    df = make_dataset(rows)
+    columns = {column: df[column].to_numpy() for column in database.TWEET_COLUMNS}
+    results = {}
+    
+    def record(name, times):
+        results[name] = summarize(times, rows)
+        print(f"{name:<40} {results[name]['min']:>9.3f}s {results[name]['rows_per_sec'] or 0:>14,.0f} rows/s")
+    
+    def fresh_db():
+        database.close_connections()
+        path = os.path.join(tmp_dir, f"bench_{rows}.db")
+        for suffix in ('', '-wal', '-shm'):
+            if os.path.exists(path + suffix):
+                os.remove(path + suffix)
+        database.DATABASE_PATH = path
+        with redirect_stdout(StringIO()):
+            database.create_table()
+    
+    record('insert_tweets', measure(lambda _: database.insert_tweets(columns), repeat, fresh_db))
+    
+    # Score from scratch every time; the cache is benchmarked in bench_sentiment
+    SENTIMENT_CONFIG["cache_enabled"] = False
+    records = df[['id', 'text']].to_dict('records')
+    record('analyze_tweets_sentiment', measure(lambda _: analyze_tweets_sentiment(records), repeat))
+    SENTIMENT_CONFIG["cache_enabled"] = True
+    del records
+    
+    record('get_all_tweets', measure(lambda _: database.get_all_tweets(), repeat))
+    
+    start, end = datetime(2024, 1, 8).date(), datetime(2024, 1, 21).date()
+    record('filter_tweets_by_date', measure(lambda frame: filter_tweets_by_date(frame, start, end), repeat, df.copy))
+    record('calculate_metrics', measure(calculate_metrics, repeat, lambda: df))
+    
+    for name in ('create_sentiment_chart', 'create_volume_chart', 'create_pie_chart',
+                 'create_engagement_chart', 'create_product_comparison_chart'):
+        record(f"charts.{name}", measure(lambda frame, name=name: render(getattr(charts, name)(frame)), repeat, df.copy))
+    
+    # One dashboard rerun over raw tweets: filter, then the time and label charts.
+    # Raw frames parse created_at every time; prepared ones were parsed at load.
+    def rerun(frame):
+        frame = filter_tweets_by_date(frame, start, end)
+        for name in ('create_sentiment_chart', 'create_volume_chart', 'create_pie_chart'):
+            getattr(charts, name)(frame)
+    
+    record('prepare_tweets', measure(prepare_tweets, repeat, lambda: df))
+    prepared = prepare_tweets(df)
+    record('rerun.raw', measure(rerun, repeat, lambda: df))
+    record('rerun.prepared', measure(rerun, repeat, lambda: prepared))
+    del prepared
+    
+    # The dashboard draws these from SQL aggregates rather than raw rows.
+    # Chart timings include JSON serialization of the figure.
+    aggregated = [
+        ('create_sentiment_series_chart', lambda: timeseries.get_series(resolution='day')),
+        ('create_volume_series_chart', lambda: timeseries.get_series(resolution='day')),
+        ('create_distribution_pie_chart', database.get_label_distribution),
+    ]
+    for name, query in aggregated:
+        record(f"charts.{name}", measure(lambda _, query=query, name=name: render(getattr(charts, name)(query())), repeat))
+    
+    database.close_connections()
+    return results
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            capture_output=True, text=True, check=True, cwd=os.path.dirname(__file__)
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def latest_result(exclude=None):
+    """Most recent saved result file other than `exclude`"""
+    paths = sorted(path for path in RESULTS_DIR.glob("*.json") if path != exclude)
+    return paths[-1] if paths else None
+
+def compare(current, previous, threshold):
+    """Print min-time ratios against a previous run; returns the regressed benchmarks"""
+    print(f"\nCompared with {previous['commit']} ({previous['timestamp']}):")
+    regressions = []
+    for size, benches in current['results'].items():
+        for name, result in benches.items():
+            before = previous['results'].get(size, {}).get(name)
+            if not before:
+                continue
+            ratio = result['min'] / before['min']
+            flag = ""
+            if ratio > threshold:
+                flag = "  REGRESSION"
+                regressions.append(f"{size}/{name}")
+            print(f"  {int(size):>9,} {name:<40} {ratio:>6.2f}x{flag}")
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark ingest, scoring, queries and charts at several sizes")
+    parser.add_argument("--sizes", default=",".join(map(str, DEFAULT_SIZES)),
+                        help="Comma-separated dataset sizes, e.g. 10000,100000,1000000")
+    parser.add_argument("--repeat", type=int, default=3, help="Timed runs per benchmark (min is compared)")
+    parser.add_argument("--compare", type=Path, help="Result file to compare with (default: latest saved)")
+    parser.add_argument("--threshold", type=float, default=1.2, help="Slowdown ratio reported as a regression")
+    parser.add_argument("--no-save", action="store_true", help="Do not write a result file")
+    args = parser.parse_args()
+    
+    sizes = [int(size) for size in args.sizes.split(",")]
+    report = {
+        'commit': git_commit(),
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'repeat': args.repeat,
+        'results': {}
+    }
+    
+    print(f"Benchmark suite: sizes {', '.join(f'{size:,}' for size in sizes)}, best of {args.repeat}")
+    original_path = database.DATABASE_PATH
+    try:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            for size in sizes:
+                report['results'][str(size)] = run_size(size, args.repeat, tmp_dir)
+    finally:
+        database.close_connections()
+        database.DATABASE_PATH = original_path
+        shutdown_process_pool()
+    
+    saved = None
+    if not args.no_save:
+        RESULTS_DIR.mkdir(exist_ok=True)
+        stamp = datetime.now().strftime('%Y%m%d-%H%M%S')
+        saved = RESULTS_DIR / f"{stamp}-{report['commit'] or 'nogit'}.json"
+        with open(saved, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"\nSaved results to {saved}")
+    
+    previous_path = args.compare or latest_result(exclude=saved)
+    if previous_path:
+        with open(previous_path) as f:
+            regressions = compare(report, json.load(f), args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} benchmark(s) slower than {args.threshold}x: {', '.join(regressions)}")
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -1,30 +1,46 @@
 import streamlit as st
-import pandas as pd
 from datetime import datetime, timedelta
 
 # Import our modules
-from database import get_all_tweets
-from charts import create_sentiment_chart, create_volume_chart, create_pie_chart
-from utils import filter_tweets_by_date, calculate_metrics
+import database
+from database import get_db_version
+from snapshot import open_snapshot, snapshot_mtime
+from figure_cache import get_figure_cache
+import timeseries
+from charts import (
+    create_sentiment_series_chart, create_volume_series_chart, create_distribution_pie_chart,
+    create_engagement_chart
+)
 
 # Page setup
 st.set_page_config(page_title="Product Launch Analyzer", layout="wide")
 st.title("  Product Launch Sentiment Analysis")
 
-# Load data
-@st.cache_data
-def load_data():
-    tweets = get_all_tweets()
-    if tweets:
-        df = pd.DataFrame(tweets)
-        return df
-    return pd.DataFrame()
+@st.cache_resource(max_entries=2)
+def load_snapshot(version, mtime):
+    """Memory-mapped snapshot for a db_version, shared by every session.
+    
+    `mtime` is part of the cache key so a snapshot rebuilt after a
+    cache miss (None) is picked up without a new db_version.
+    """
+    return open_snapshot(expected_version=version)
 
 # Main app
 def main():
-    df = load_data()
+    # Metrics and charts come from the rollup tables; tweet rows are
+    # read from the mapped Arrow snapshot when it is current, otherwise SQL
+    version = get_db_version()
+    source = load_snapshot(version, snapshot_mtime()) or database
     
-    if df.empty:
+    # Figures and aggregates are shared by all sessions until the data changes
+    figure_cache = get_figure_cache()
+    
+    def cached(kind, build, product=None, *options):
+        return figure_cache.get_or_build(version, (kind, product) + options, build)
+    
+    products = cached('products', database.get_products)
+    
+    if not products:
         st.warning("No data found. Please run the pipeline first.")
         st.info("Run: `python scripts/run_pipeline.py`")
         return
@@ -33,12 +49,15 @@ def main():
     st.sidebar.header("Filters")
     
     # Product selection
-    products = df['product'].unique()
     selected_product = st.sidebar.selectbox("Select Product", products)
     
     # Date range
-    min_date = df['created_at'].min()
-    max_date = df['created_at'].max()
+    min_date, max_date = cached('date_bounds', lambda: database.get_date_bounds(selected_product), selected_product)
+    
+    if min_date is None:
+        # Only tweets without a usable created_at: nothing to put on a time axis
+        st.warning(f"No data found for {selected_product}. Its tweets have no valid dates.")
+        return
     
     date_range = st.sidebar.date_input(
         "Date Range",
@@ -48,52 +67,69 @@ def main():
     )
     
     # Filter data
-    filtered_df = df[df['product'] == selected_product]
+    start_date, end_date = date_range if len(date_range) == 2 else (min_date, max_date)
+    filters = dict(product=selected_product, start_date=start_date, end_date=end_date)
+    
+    def cached_view(kind, build, *options):
+        return cached(kind, build, selected_product, start_date, end_date, *options)
     
-    if len(date_range) == 2:
-        start_date, end_date = date_range
-        filtered_df = filter_tweets_by_date(filtered_df, start_date, end_date)
+    # Time buckets: the finest that fits the range unless one is chosen
+    resolutions = timeseries.available_resolutions(start_date, end_date)
+    choice = st.sidebar.selectbox("Time Buckets", ["Auto"] + resolutions)
+    resolution = resolutions[0] if choice == "Auto" else choice
+    series = cached_view('series', lambda: timeseries.get_series(resolution=resolution, **filters), resolution)
+    metrics = cached_view('metrics', lambda: database.get_tweet_metrics(**filters))
+    total_tweets = metrics.get('total_tweets', 0)
     
     # Show metrics
     col1, col2, col3, col4 = st.columns(4)
     
     with col1:
-        st.metric("Total Tweets", len(filtered_df))
+        st.metric("Total Tweets", total_tweets)
     
     with col2:
-        avg_sentiment = filtered_df['sentiment'].mean()
+        avg_sentiment = metrics.get('avg_sentiment') or 0.0
         st.metric("Avg Sentiment", f"{avg_sentiment:.3f}")
     
     with col3:
-        positive_tweets = len(filtered_df[filtered_df['sentiment'] > 0.1])
-        positive_pct = (positive_tweets / len(filtered_df)) * 100 if len(filtered_df) > 0 else 0
+        positive_pct = (metrics['positive_tweets'] / total_tweets) * 100 if total_tweets > 0 else 0
         st.metric("Positive %", f"{positive_pct:.1f}%")
     
     with col4:
-        avg_likes = filtered_df['likes'].mean()
+        avg_likes = metrics.get('avg_likes') or 0.0
         st.metric("Avg Likes", f"{avg_likes:.1f}")
     
     # Charts
     col1, col2 = st.columns(2)
     
     with col1:
-        sentiment_fig = create_sentiment_chart(filtered_df)
+        sentiment_fig = cached_view('sentiment_chart', lambda: create_sentiment_series_chart(series, resolution), resolution)
         if sentiment_fig:
             st.plotly_chart(sentiment_fig, use_container_width=True)
     
     with col2:
-        pie_fig = create_pie_chart(filtered_df)
+        pie_fig = cached_view('pie_chart', lambda: create_distribution_pie_chart(database.get_label_distribution(**filters)))
         if pie_fig:
             st.plotly_chart(pie_fig, use_container_width=True)
     
     # Volume chart
-    volume_fig = create_volume_chart(filtered_df)
+    volume_fig = cached_view('volume_chart', lambda: create_volume_series_chart(series, resolution), resolution)
     if volume_fig:
         st.plotly_chart(volume_fig, use_container_width=True)
     
+    # Engagement scatter; large selections are downsampled or binned
+    engagement_view = st.sidebar.selectbox("Engagement View", ["auto", "sample", "density"])
+    engagement_fig = cached_view(
+        'engagement_chart', lambda: create_engagement_chart(source.get_tweets_frame(**filters), mode=engagement_view),
+        engagement_view
+    )
+    if engagement_fig:
+        st.plotly_chart(engagement_fig, use_container_width=True)
+    
     # Sample tweets
     st.subheader("Recent Tweets")
-    sample_tweets = filtered_df.head(5)[['created_at', 'text', 'sentiment', 'likes']]
+    sample_tweets = cached_view('recent_tweets', lambda: source.get_recent_tweets(limit=5, **filters))
+    sample_tweets = sample_tweets[['created_at', 'text', 'sentiment', 'likes']]
     st.dataframe(sample_tweets)
 
 if __name__ == "__main__":
@@ -0,0 +1,153 @@
+"""Columnar Parquet archive tier for historical tweets.
+
+Old tweets are moved out of SQLite into Hive-style partitions, one
+Parquet file per product and UTC day:
+
+    <archive_dir>/product=iPhone%2015/day=2024-01-05/part-0.parquet
+
+Reads go through pyarrow.dataset, so a query only opens the partitions
+that match its product and date range (partition pruning) and only
+decodes the columns it asks for (column pruning). database.py combines
+these reads with the hot SQLite table.
+
+pyarrow is optional: without it nothing can be archived, and reads see
+an empty archive.
+"""
+import os
+from urllib.parse import quote
+
+import pandas as pd
+
+from config import PYARROW_AVAILABLE
+
+ARCHIVE_COLUMNS = ['id', 'created_at', 'created_ts', 'text', 'user_id', 'likes', 'retweets', 'sentiment']
+PARTITION_FILE = "part-0.parquet"
+
+def _require_pyarrow():
+    if not PYARROW_AVAILABLE:
+        raise ImportError("pyarrow is required for the Parquet archive (pip install pyarrow)")
+
+def _schema():
+    import pyarrow as pa
+
+    return pa.schema([
+        ('id', pa.string()),
+        ('created_at', pa.string()),
+        ('created_ts', pa.int64()),
+        ('text', pa.string()),
+        ('user_id', pa.string()),
+        ('likes', pa.int64()),
+        ('retweets', pa.int64()),
+        ('sentiment', pa.float64()),
+    ])
+
+def _product_dir(archive_dir, product):
+    # Partition values are URI-encoded so any product name is a safe directory name
+    return os.path.join(archive_dir, f"product={quote(str(product), safe='')}")
+
+def partition_path(archive_dir, product, day):
+    """Directory holding one product's tweets for one day (YYYY-MM-DD)"""
+    return os.path.join(_product_dir(archive_dir, product), f"day={day}")
+
+def write_partitions(archive_dir, frame):
+    """Merge tweets into their product/day partitions.
+
+    `frame` needs ARCHIVE_COLUMNS plus product. Each touched partition is
+    rewritten as a single file holding its existing rows and the new ones,
+    deduplicated by id (new rows win) and sorted by created_ts, then
+    swapped in with os.replace. Archiving the same tweets twice (e.g.
+    after an interrupted run) therefore never duplicates them.
+
+    Returns the number of partitions written.
+    """
+    _require_pyarrow()
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.parquet as pq
+
+    if frame.empty:
+        return 0
+
+    schema = _schema()
+    days = pd.to_datetime(frame['created_ts'], unit='s').dt.strftime('%Y-%m-%d')
+    written = 0
+
+    for (product, day), rows in frame.groupby([frame['product'], days], sort=False):
+        directory = partition_path(archive_dir, product, day)
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, PARTITION_FILE)
+
+        rows = rows.drop_duplicates('id', keep='last')
+        table = pa.Table.from_pandas(rows[ARCHIVE_COLUMNS], schema=schema, preserve_index=False)
+        if os.path.exists(path):
+            existing = pq.read_table(path, schema=schema)
+            kept = existing.filter(pc.invert(pc.is_in(existing['id'], value_set=table['id'])))
+            table = pa.concat_tables([kept, table])
+
+        # Dot-prefixed files are ignored by dataset discovery
+        tmp_path = os.path.join(directory, f".{PARTITION_FILE}.tmp")
+        pq.write_table(table.sort_by('created_ts'), tmp_path, compression='zstd')
+        os.replace(tmp_path, path)
+        written += 1
+
+    return written
+
+def _dataset(archive_dir, product=None):
+    """pyarrow dataset over the whole archive or one product's directory"""
+    if not PYARROW_AVAILABLE:
+        return None
+
+    base = archive_dir if product is None else _product_dir(archive_dir, product)
+    if not os.path.isdir(base):
+        return None
+
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+
+    fields = [('day', pa.string())]
+    if product is None:
+        fields.insert(0, ('product', pa.string()))
+
+    return ds.dataset(
+        base,
+        schema=pa.schema(list(_schema()) + [pa.field(name, kind) for name, kind in fields]),
+        format='parquet',
+        partitioning=ds.partitioning(pa.schema(fields), flavor='hive')
+    )
+
+def _day_filter(start_date=None, end_date=None):
+    """Partition filter for an inclusive date range"""
+    import pyarrow.dataset as ds
+
+    expression = None
+    if start_date is not None:
+        expression = ds.field('day') >= start_date.isoformat()
+    if end_date is not None:
+        upper = ds.field('day') <= end_date.isoformat()
+        expression = upper if expression is None else expression & upper
+    return expression
+
+def scan(archive_dir, columns, product=None, start_date=None, end_date=None):
+    """Read `columns` of archived tweets for a product and inclusive date range.
+
+    Columns may include the partition keys product and day. Returns a
+    DataFrame, empty when nothing is archived.
+    """
+    dataset = _dataset(archive_dir, product)
+    if dataset is None:
+        return pd.DataFrame(columns=columns)
+
+    read_columns = [column for column in columns if not (column == 'product' and product is not None)]
+    table = dataset.to_table(columns=read_columns, filter=_day_filter(start_date, end_date))
+    frame = table.to_pandas()
+
+    if 'product' in columns and product is not None:
+        frame['product'] = product
+    return frame[columns]
+
+def count_rows(archive_dir, product=None, start_date=None, end_date=None):
+    """Number of archived tweets (answered from Parquet metadata)"""
+    dataset = _dataset(archive_dir, product)
+    if dataset is None:
+        return 0
+    return dataset.count_rows(filter=_day_filter(start_date, end_date))
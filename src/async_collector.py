@@ -0,0 +1,185 @@
+"""Asyncio collector for the Twitter v2 recent search endpoint.
+
+One aiohttp session (keep-alive connection pool) is shared by every
+request, several products are collected concurrently with the number of
+in-flight requests bounded by a semaphore, and 429/5xx responses are
+retried with jittered exponential backoff. Requests draw from the same
+rate_limiter bucket as tweet_collector and page through the same
+PageCursor, with checkpoint reads and writes run in a worker thread so
+they never block the event loop. run_concurrent_pipeline uses it when
+TWITTER_CONFIG["collector"] is "async".
+"""
+import os
+import random
+import asyncio
+from importlib.util import find_spec
+
+import instrumentation
+from config import TWITTER_CONFIG
+from rate_limiter import get_rate_limiter
+from tweet_collector import PageCursor
+
+# aiohttp is only imported when an async collector session is opened
+AIOHTTP_AVAILABLE = find_spec("aiohttp") is not None
+
+TWEET_FIELDS = "created_at,public_metrics,author_id"
+
+class CollectorError(Exception):
+    """A search request failed for good (non-retryable or out of retries)"""
+
+def _convert_tweet(tweet):
+    """Convert a v2 API tweet object (JSON) to our dict format"""
+    metrics = tweet.get('public_metrics') or {}
+    
+    return {
+        'id': str(tweet['id']),
+        'created_at': str(tweet.get('created_at')),
+        'text': tweet.get('text', ''),
+        'user_id': str(tweet.get('author_id')),
+        'likes': metrics.get('like_count', 0),
+        'retweets': metrics.get('retweet_count', 0)
+    }
+
+class AsyncTweetCollector:
+    """Recent search client; use as `async with AsyncTweetCollector() as collector`"""
+    
+    def __init__(self, bearer_token=None, base_url=None, max_concurrency=None,
+                 max_retries=None, limiter=None, checkpoint=True):
+        self.bearer_token = bearer_token or TWITTER_CONFIG["bearer_token"] or os.getenv('BEARER_TOKEN')
+        self.search_url = (base_url or TWITTER_CONFIG["api_base_url"]).rstrip('/') + "/tweets/search/recent"
+        self.max_concurrency = max_concurrency or TWITTER_CONFIG["max_concurrent_requests"]
+        self.max_retries = TWITTER_CONFIG["max_retries"] if max_retries is None else max_retries
+        self.limiter = limiter or get_rate_limiter()
+        self.checkpoint = checkpoint
+        self.session = None
+        self._semaphore = None
+        self._network_errors = ()
+        self.requests = 0
+        self.retries = 0
+    
+    async def __aenter__(self):
+        if not AIOHTTP_AVAILABLE:
+            raise CollectorError("aiohttp is not installed")
+        
+        import aiohttp
+        self._network_errors = (aiohttp.ClientError, asyncio.TimeoutError)
+        connector = aiohttp.TCPConnector(limit=self.max_concurrency, keepalive_timeout=60)
+        self.session = aiohttp.ClientSession(
+            connector=connector,
+            headers={'Authorization': f"Bearer {self.bearer_token}"},
+            timeout=aiohttp.ClientTimeout(total=TWITTER_CONFIG["request_timeout_seconds"])
+        )
+        self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        return self
+    
+    async def __aexit__(self, *exc_info):
+        await self.session.close()
+        self.session = None
+    
+    def _backoff(self, attempt):
+        """Full-jitter exponential backoff for retry number `attempt`"""
+        ceiling = min(
+            TWITTER_CONFIG["retry_backoff_max_seconds"],
+            TWITTER_CONFIG["retry_backoff_seconds"] * 2 ** attempt
+        )
+        return random.uniform(0, ceiling)
+    
+    async def _acquire_token(self):
+        """Wait for the shared rate limiter without blocking the event loop"""
+        waited = 0.0
+        while not self.limiter.try_acquire():
+            delay = self.limiter.wait_time()
+            await asyncio.sleep(delay)
+            waited += delay
+        if waited:
+            self.limiter.record_wait(waited)
+    
+    async def _search(self, params):
+        """GET one page of results, retrying 429/5xx and connection errors"""
+        error = None
+        
+        for attempt in range(self.max_retries + 1):
+            if attempt:
+                self.retries += 1
+                instrumentation.count("collector.api_retries")
+                await asyncio.sleep(self._backoff(attempt - 1))
+            
+            await self._acquire_token()
+            try:
+                async with self._semaphore:
+                    self.requests += 1
+                    with instrumentation.timed("collector.api_request"):
+                        async with self.session.get(self.search_url, params=params) as response:
+                            if 'x-rate-limit-reset' in response.headers:
+                                self.limiter.update_from_headers(response.headers)
+                            
+                            if response.status == 200:
+                                return await response.json()
+                            
+                            body = await response.text()
+                            error = f"HTTP {response.status}: {body[:200]}"
+                            if response.status == 429:
+                                if 'x-rate-limit-reset' not in response.headers:
+                                    self.limiter.block_for(TWITTER_CONFIG["rate_limit_delay"])
+                            elif response.status < 500:
+                                raise CollectorError(error)
+            except self._network_errors as e:
+                error = f"{type(e).__name__}: {e}"
+        
+        raise CollectorError(f"Giving up after {self.max_retries + 1} attempts: {error}")
+    
+    async def iter_pages(self, query, count=50, since_id=None):
+        """Async generator of tweet pages, following next_token.
+        
+        Pagination and checkpoints are tweet_collector.PageCursor, as in
+        tweet_collector.iter_tweet_pages.
+        """
+        cursor = PageCursor(query, count, since_id, self.checkpoint)
+        await asyncio.to_thread(cursor.load)
+        
+        while cursor.remaining > 0:
+            params = cursor.params()
+            params['max_results'] = str(params['max_results'])
+            params['tweet.fields'] = TWEET_FIELDS
+            
+            body = await self._search(params)
+            page = cursor.advance(body.get('meta') or {}, [_convert_tweet(tweet) for tweet in body.get('data') or []])
+            
+            if page:
+                yield page
+            
+            if cursor.done:
+                break
+            
+            await asyncio.to_thread(cursor.save_progress)
+        
+        await asyncio.to_thread(cursor.finish)
+    
+    async def collect(self, query, count=50, since_id=None):
+        """Collect up to `count` API tweets for one query"""
+        result = []
+        async for page in self.iter_pages(query, count, since_id):
+            result.extend(page)
+        return result
+    
+    async def collect_many(self, queries, count=50, since_ids=None):
+        """Collect several queries concurrently; returns {query: tweets}.
+        
+        A query that fails maps to an empty list instead of cancelling
+        the others.
+        """
+        since_ids = since_ids or {}
+        
+        async def collect_one(query):
+            try:
+                return await self.collect(query, count, since_ids.get(query))
+            except CollectorError as e:
+                print(f"Error collecting {query} from API: {e}")
+                return []
+        
+        results = await asyncio.gather(*(collect_one(query) for query in queries))
+        return dict(zip(queries, results))
+
+def async_api_available():
+    """Whether the async collector can talk to the API"""
+    return AIOHTTP_AVAILABLE and bool(TWITTER_CONFIG["bearer_token"] or os.getenv('BEARER_TOKEN'))
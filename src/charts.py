@@ -1,27 +1,64 @@
+import numpy as np
 import plotly.express as px
 import plotly.graph_objects as go
 import pandas as pd
 from datetime import datetime
 
-def create_sentiment_chart(df):
-    """Create sentiment over time line chart"""
+from config import CHART_CONFIG
+from utils import prepare_tweets
+from timeseries import floor_times
+
+# Chart functions taking raw tweets accept a frame from utils.prepare_tweets
+# (or prepare one themselves) and never modify it
+
+def _buckets(df, resolution):
+    """Bucket start per tweet; the prepared day column serves daily charts"""
+    return df['day'] if resolution == 'day' else floor_times(df['created_at'], resolution)
+
+def create_sentiment_chart(df, resolution='day'):
+    """Create sentiment over time line chart (minute/hour/day/week buckets)"""
+    try:
+        if df.empty:
+            return None
+        
+        # Group by bucket and calculate average sentiment
+        df = prepare_tweets(df)
+        series = df.groupby(_buckets(df, resolution))['sentiment'].mean().rename_axis('time').reset_index()
+        
+        return create_sentiment_series_chart(series, resolution)
+    
+    except Exception as e:
+        print(f"Error creating sentiment chart: {e}")
+        return None
+
+def create_volume_chart(df, resolution='day'):
+    """Create tweet volume bar chart (minute/hour/day/week buckets)"""
     try:
         if df.empty:
             return None
         
-        # Convert created_at to datetime
-        df['date'] = pd.to_datetime(df['created_at']).dt.date
+        # Count tweets per bucket
+        df = prepare_tweets(df)
+        series = df.groupby(_buckets(df, resolution)).size().rename_axis('time').reset_index(name='count')
         
-        # Group by date and calculate average sentiment
-        daily_sentiment = df.groupby('date')['sentiment'].mean().reset_index()
+        return create_volume_series_chart(series, resolution)
+    
+    except Exception as e:
+        print(f"Error creating volume chart: {e}")
+        return None
+
+def create_sentiment_series_chart(series, resolution='day'):
+    """Create sentiment over time line chart from [time, sentiment] buckets"""
+    try:
+        if series.empty:
+            return None
         
-        # Create line chart
         fig = px.line(
-            daily_sentiment,
-            x='date',
+            series,
+            x='time',
             y='sentiment',
             title='Sentiment Over Time',
-            labels={'sentiment': 'Average Sentiment', 'date': 'Date'}
+            labels={'sentiment': 'Average Sentiment', 'time': f'Time ({resolution} buckets)'}
         )
         
         # Add horizontal line at y=0 (neutral)
@@ -33,25 +70,18 @@ def create_sentiment_chart(df):
         print(f"Error creating sentiment chart: {e}")
         return None
 
-def create_volume_chart(df):
-    """Create tweet volume bar chart"""
+def create_volume_series_chart(series, resolution='day'):
+    """Create tweet volume bar chart from [time, count] buckets"""
     try:
-        if df.empty:
+        if series.empty:
             return None
         
-        # Convert created_at to datetime
-        df['date'] = pd.to_datetime(df['created_at']).dt.date
-        
-        # Count tweets per day
-        daily_volume = df.groupby('date').size().reset_index(name='count')
-        
-        # Create bar chart
         fig = px.bar(
-            daily_volume,
-            x='date',
+            series,
+            x='time',
             y='count',
             title='Tweet Volume Over Time',
-            labels={'count': 'Number of Tweets', 'date': 'Date'}
+            labels={'count': 'Number of Tweets', 'time': f'Time ({resolution} buckets)'}
         )
         
         return fig
@@ -66,25 +96,30 @@ def create_pie_chart(df):
         if df.empty:
             return None
         
-        # Categorize sentiments
-        def categorize_sentiment(score):
-            if score > 0.1:
-                return 'Positive'
-            elif score < -0.1:
-                return 'Negative'
-            else:
-                return 'Neutral'
-        
-        df['sentiment_category'] = df['sentiment'].apply(categorize_sentiment)
+        # Count each category present
+        df = prepare_tweets(df)
+        sentiment_counts = df['sentiment_category'].value_counts().reset_index()
+        sentiment_counts.columns = ['sentiment_category', 'count']
+        sentiment_counts = sentiment_counts[sentiment_counts['count'] > 0].astype({'sentiment_category': str})
         
-        # Count each category
-        sentiment_counts = df['sentiment_category'].value_counts()
+        return create_distribution_pie_chart(sentiment_counts)
+    
+    except Exception as e:
+        print(f"Error creating pie chart: {e}")
+        return None
+
+def create_distribution_pie_chart(sentiment_counts):
+    """Create sentiment distribution pie chart from [sentiment_category, count] rows"""
+    try:
+        if sentiment_counts.empty:
+            return None
         
         # Create pie chart
         fig = px.pie(
-            values=sentiment_counts.values,
-            names=sentiment_counts.index,
+            values=sentiment_counts['count'],
+            names=sentiment_counts['sentiment_category'],
             title='Sentiment Distribution',
+            color=sentiment_counts['sentiment_category'],
             color_discrete_map={
                 'Positive': '#00CC96',
                 'Negative': '#EF553B',
@@ -98,27 +133,126 @@ def create_pie_chart(df):
         print(f"Error creating pie chart: {e}")
         return None
 
-def create_engagement_chart(df):
-    """Create engagement vs sentiment scatter plot"""
+ENGAGEMENT_LABELS = {
+    'sentiment': 'Sentiment Score',
+    'total_engagement': 'Total Engagement (Likes + Retweets)'
+}
+
+def _outlier_mask(df):
+    """Tweets with unusually high engagement or extreme sentiment"""
+    quantile = CHART_CONFIG["scatter_outlier_quantile"]
+    engagement = df['total_engagement']
+    extremity = df['sentiment'].abs()
+    return (engagement >= engagement.quantile(quantile)) | (extremity >= extremity.quantile(quantile))
+
+def sample_engagement_points(df, max_points=None, seed=0):
+    """Pick at most `max_points` rows of a prepared frame for the engagement scatter.
+    
+    Outliers (see _outlier_mask) get up to CHART_CONFIG["scatter_outlier_share"]
+    of the budget, most engaged first. The rest is a stratified sample over
+    a sentiment x log-engagement grid: each cell keeps its share of the
+    budget and at least one point, so sparse regions stay visible.
+    """
+    max_points = max_points or CHART_CONFIG["scatter_max_points"]
+    if len(df) <= max_points:
+        return df
+    
+    outliers = df[_outlier_mask(df)]
+    outlier_budget = int(max_points * CHART_CONFIG["scatter_outlier_share"])
+    if len(outliers) > outlier_budget:
+        outliers = outliers.nlargest(outlier_budget, 'total_engagement')
+    rest = df.drop(outliers.index)
+    budget = max_points - len(outliers)
+    
+    # 20 sentiment bins x 10 log-engagement bins
+    sentiment_bin = np.clip(((rest['sentiment'].fillna(0).to_numpy() + 1) * 10).astype(int), 0, 19)
+    engagement = np.log1p(rest['total_engagement'].fillna(0).clip(lower=0).to_numpy(dtype=float))
+    engagement_bin = np.minimum((engagement / (engagement.max() or 1) * 10).astype(int), 9)
+    cell = sentiment_bin * 10 + engagement_bin
+    
+    # Shuffle, then keep the first `quota` rows of each cell
+    order = np.random.default_rng(seed).permutation(len(rest))
+    cell = cell[order]
+    counts = np.bincount(cell, minlength=200)
+    quota = np.maximum(1, np.floor(counts * budget / len(rest))).astype(int)
+    rank = pd.Series(cell).groupby(cell).cumcount().to_numpy()
+    sample = rest.iloc[order[rank < quota[cell]]]
+    
+    # The one-per-cell minimum can overshoot the budget slightly
+    sample = sample.iloc[:budget]
+    return pd.concat([outliers, sample]).sort_index()
+
+def _hover_text(df):
+    length = CHART_CONFIG["hover_text_length"]
+    text = df['text'].fillna('').astype(str)
+    return text.where(text.str.len() <= length, text.str.slice(0, length - 1) + '…')
+
+def _engagement_density_chart(df, total):
+    """2D histogram binned here, so only the grid and outliers are sent"""
+    bins = CHART_CONFIG["density_bins"]
+    counts, x_edges, y_edges = np.histogram2d(
+        df['sentiment'].fillna(0).to_numpy(), df['total_engagement'].fillna(0).to_numpy(dtype=float), bins=bins
+    )
+    fig = go.Figure(go.Heatmap(
+        x=(x_edges[:-1] + x_edges[1:]) / 2,
+        y=(y_edges[:-1] + y_edges[1:]) / 2,
+        z=np.where(counts.T > 0, counts.T, np.nan),
+        colorscale='Blues',
+        colorbar={'title': 'Tweets'},
+        hovertemplate='Sentiment %{x:.2f}<br>Engagement %{y:.0f}<br>%{z} tweets<extra></extra>'
+    ))
+    
+    outliers = df[_outlier_mask(df)].nlargest(
+        int(CHART_CONFIG["scatter_max_points"] * CHART_CONFIG["scatter_outlier_share"]), 'total_engagement'
+    )
+    fig.add_trace(go.Scattergl(
+        x=outliers['sentiment'], y=outliers['total_engagement'], mode='markers', name='Outliers',
+        text=_hover_text(outliers), hovertemplate='%{text}<extra></extra>',
+        marker={'color': CHART_CONFIG["color_scheme"]["negative"], 'size': 5}
+    ))
+    fig.update_layout(
+        title=f'Engagement vs Sentiment (density of {total:,} tweets)',
+        xaxis_title=ENGAGEMENT_LABELS['sentiment'], yaxis_title=ENGAGEMENT_LABELS['total_engagement']
+    )
+    return fig
+
+def create_engagement_chart(df, mode=None, max_points=None):
+    """Create engagement vs sentiment scatter plot.
+    
+    `mode` (default CHART_CONFIG["scatter_mode"]):
+    - scatter: every tweet, with its text on hover
+    - sample: a WebGL scatter of sample_engagement_points
+    - density: a binned 2D histogram with the outliers drawn on top
+    - auto: scatter up to `max_points` tweets, sample above that
+    """
     try:
         if df.empty:
             return None
         
-        # Calculate total engagement
-        df['total_engagement'] = df['likes'] + df['retweets']
-        
-        # Create scatter plot
-        fig = px.scatter(
-            df,
-            x='sentiment',
-            y='total_engagement',
-            title='Engagement vs Sentiment',
-            labels={
-                'sentiment': 'Sentiment Score',
-                'total_engagement': 'Total Engagement (Likes + Retweets)'
-            },
-            hover_data=['text']
-        )
+        df = prepare_tweets(df)
+        mode = mode or CHART_CONFIG["scatter_mode"]
+        max_points = max_points or CHART_CONFIG["scatter_max_points"]
+        if mode == 'auto':
+            mode = 'scatter' if len(df) <= max_points else 'sample'
+        
+        if mode == 'density':
+            fig = _engagement_density_chart(df, len(df))
+        else:
+            points = df if mode == 'scatter' else sample_engagement_points(df, max_points)
+            title = 'Engagement vs Sentiment'
+            if len(points) < len(df):
+                title += f' ({len(points):,} of {len(df):,} tweets, outliers kept)'
+            
+            # Create scatter plot
+            fig = px.scatter(
+                points.assign(text=_hover_text(points)),
+                x='sentiment',
+                y='total_engagement',
+                title=title,
+                labels=ENGAGEMENT_LABELS,
+                hover_data=['text'],
+                render_mode='webgl' if mode == 'sample' else 'auto'
+            )
         
         # Add vertical line at sentiment=0
         fig.add_vline(x=0, line_dash="dash", line_color="gray")
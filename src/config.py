@@ -1,10 +1,15 @@
 import os
 from pathlib import Path
+from importlib.util import find_spec
 from dotenv import load_dotenv
 
 # Load environment variables
 load_dotenv()
 
+# pyarrow is optional (Parquet archive, Arrow snapshot, Parquet load
+# output); modules that use it only import it when they need it
+PYARROW_AVAILABLE = find_spec("pyarrow") is not None
+
 # Project root directory
 PROJECT_ROOT = Path(__file__).parent.parent
 
@@ -20,23 +25,55 @@ APP_CONFIG = {
 DATABASE_CONFIG = {
     "db_path": PROJECT_ROOT / "data" / "tweets.db",
     "backup_enabled": True,
-    "backup_interval_hours": 24
+    "backup_interval_hours": 24,
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",  # Safe with WAL, avoids an fsync per commit
+    "cache_size_kb": 65536,
+    "mmap_size_mb": 256,
+    "busy_timeout_ms": 5000
+}
+
+# Parquet archive tier configuration
+ARCHIVE_CONFIG = {
+    "hot_days": 30,  # archive_tweets moves tweets older than this out of SQLite
+    "batch_size": 100000  # Tweets read, written and deleted per archive step
+}
+
+# Memory-mapped Arrow snapshot served to the dashboard
+SNAPSHOT_CONFIG = {
+    "enabled": True  # Rebuild after pipeline runs and read it from the dashboard
 }
 
 # Twitter API configuration
 TWITTER_CONFIG = {
     "bearer_token": os.getenv("BEARER_TOKEN"),
-    "rate_limit_delay": 1.0,
+    "rate_limit_delay": 1.0,  # Back-off after a 429 that carries no reset header
+    "rate_limit_requests": 450,  # Recent search requests allowed per window
+    "rate_limit_window_seconds": 900,
     "max_results_per_request": 100,
-    "fallback_enabled": True
+    "fallback_enabled": True,
+    "collector": os.getenv("TWITTER_COLLECTOR", "tweepy"),  # Options: tweepy, async
+    "api_base_url": "https://api.twitter.com/2",
+    "max_concurrent_requests": 5,  # In-flight requests for the async collector
+    "max_retries": 4,  # Retries on 429/5xx/connection errors (async collector)
+    "retry_backoff_seconds": 1.0,
+    "retry_backoff_max_seconds": 60.0,
+    "request_timeout_seconds": 30
 }
 
 # Sentiment analysis configuration
 SENTIMENT_CONFIG = {
     "method": "textblob",  # Options: textblob, vader, ensemble
+    "ensemble_weights": {"textblob": 0.5, "vader": 0.5},
     "positive_threshold": 0.1,
     "negative_threshold": -0.1,
-    "confidence_threshold": 0.5
+    "confidence_threshold": 0.5,
+    "workers": int(os.getenv("SENTIMENT_WORKERS", os.cpu_count() or 1)),
+    "parallel_min_batch": 5000,  # Below this many distinct texts, score in-process
+    "parallel_chunk_size": 1000,
+    "cache_enabled": True,
+    "cache_size": 100000,  # Max scores held in the in-memory LRU
+    "cache_persistent": False  # Also keep scores in the sentiment_cache table
 }
 
 # Data processing configuration
@@ -45,7 +82,11 @@ PROCESSING_CONFIG = {
     "duplicate_threshold_hours": 24,
     "text_cleaning_enabled": True,
     "min_text_length": 10,
-    "max_text_length": 280
+    "max_text_length": 280,
+    "collection_workers": 5,  # Products collected concurrently by run_full_pipeline
+    "writer_queue_size": 10,  # Scored product batches waiting for the DB writer
+    "stream_queue_size": 4,  # Batches buffered between streaming pipeline stages
+    "score_batch_size": 5000  # Tweets gathered across pages before scoring (>= parallel_min_batch uses the process pool)
 }
 
 # Visualization configuration
@@ -57,7 +98,19 @@ CHART_CONFIG = {
         "neutral": "#636EFA"
     },
     "default_height": 400,
-    "show_legends": True
+    "show_legends": True,
+    "scatter_mode": "auto",  # Engagement chart: auto, scatter, sample or density
+    "scatter_max_points": 5000,  # Points sent to the browser before auto downsamples
+    "scatter_outlier_share": 0.25,  # Share of the point budget reserved for outliers
+    "scatter_outlier_quantile": 0.995,  # Engagement/|sentiment| above this quantile is an outlier
+    "density_bins": 50,  # Bins per axis in density mode
+    "hover_text_length": 80,  # Tweet text shown on hover is cut to this length
+    "figure_cache_size": 128  # Figures and aggregates kept for the dashboard (all sessions)
+}
+
+# Time series bucketing configuration
+TIMESERIES_CONFIG = {
+    "max_points": 2000  # Automatic resolution keeps charts under this many buckets
 }
 
 # Fallback data configuration
@@ -81,6 +134,29 @@ LOGGING_CONFIG = {
     "log_file": PROJECT_ROOT / "logs" / "app.log"
 }
 
+# Synthetic load generator configuration
+LOAD_GENERATOR_CONFIG = {
+    "sentiment_mix": {"positive": 0.4, "negative": 0.25, "neutral": 0.35},
+    "launch_spike": 4.0,  # Launch-day volume is 1 + launch_spike times the baseline
+    "launch_decay_days": 3.0,
+    "peak_hour": 19,
+    "diurnal_amplitude": 0.7,  # 0 = flat day, 1 = no posts at the quietest hour
+    "median_likes": {"positive": 40, "negative": 10, "neutral": 20},
+    "likes_sigma": 1.0,  # Lognormal spread of likes (heavy tail)
+    "retweet_ratio": 0.2,
+    "users": 200000,
+    "user_zipf_a": 1.5,
+    "chunk_size": 100000
+}
+
+# Run instrumentation configuration
+INSTRUMENTATION_CONFIG = {
+    "enabled": True,  # Record timers, counters and histograms
+    "profile": os.getenv("PIPELINE_PROFILE") == "1",  # cProfile every instrumented run
+    "profile_top": 25,  # Functions listed in the run report's profile section
+    "report_dir": PROJECT_ROOT / "logs" / "runs"
+}
+
 # Export configuration
 EXPORT_CONFIG = {
     "csv_delimiter": ",",
@@ -106,6 +182,12 @@ def get_logs_dir():
     log_file.parent.mkdir(parents=True, exist_ok=True)
     return log_file.parent
 
+def get_run_reports_dir():
+    """Get the run report directory path, creating if needed"""
+    report_dir = INSTRUMENTATION_CONFIG["report_dir"]
+    report_dir.mkdir(parents=True, exist_ok=True)
+    return report_dir
+
 def validate_config():
     """Validate configuration settings"""
     errors = []
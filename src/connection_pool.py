@@ -0,0 +1,140 @@
+import sqlite3
+import threading
+import weakref
+from contextlib import contextmanager
+
+from config import DATABASE_CONFIG
+
+def configure_connection(conn, read_only=False):
+    """Apply the performance pragmas from DATABASE_CONFIG to a connection"""
+    cursor = conn.cursor()
+    cursor.execute(f"PRAGMA busy_timeout = {int(DATABASE_CONFIG['busy_timeout_ms'])}")
+    cursor.execute(f"PRAGMA journal_mode = {DATABASE_CONFIG['journal_mode']}")
+    cursor.execute(f"PRAGMA synchronous = {DATABASE_CONFIG['synchronous']}")
+    # Negative cache_size is in KiB rather than pages
+    cursor.execute(f"PRAGMA cache_size = -{int(DATABASE_CONFIG['cache_size_kb'])}")
+    cursor.execute(f"PRAGMA mmap_size = {int(DATABASE_CONFIG['mmap_size_mb']) * 1024 * 1024}")
+    cursor.execute("PRAGMA temp_store = MEMORY")
+    if read_only:
+        cursor.execute("PRAGMA query_only = ON")
+    cursor.close()
+    return conn
+
+class _Reader:
+    """Holds one thread's reader; its finalizer closes the connection
+    when the thread exits and its thread-local storage is released"""
+    
+    def __init__(self, conn):
+        self.conn = conn
+
+class ConnectionPool:
+    """Thread-local reader connections plus a single shared writer.
+    
+    With WAL journaling readers work from a consistent snapshot and never
+    wait on the writer, while all writes are serialized through one
+    connection so the pipeline does not fight itself for the write lock.
+    A reader lives as long as its thread, so hosts that start a thread per
+    request (Streamlit reruns) do not accumulate open connections.
+    """
+    
+    def __init__(self, db_path):
+        self.db_path = db_path
+        self._local = threading.local()
+        self._readers = []
+        self._readers_lock = threading.Lock()
+        self._writer = None
+        self._write_lock = threading.RLock()
+        self._closed = False
+    
+    def _connect(self, read_only=False):
+        conn = sqlite3.connect(
+            self.db_path,
+            timeout=DATABASE_CONFIG["busy_timeout_ms"] / 1000,
+            check_same_thread=False
+        )
+        # Autocommit mode: transactions are opened explicitly by writer()
+        conn.isolation_level = None
+        return configure_connection(conn, read_only=read_only)
+    
+    def _get_reader(self):
+        if self._closed:
+            raise sqlite3.ProgrammingError("Connection pool is closed")
+        
+        reader = getattr(self._local, 'reader', None)
+        if reader is None:
+            conn = self._connect(read_only=True)
+            reader = _Reader(conn)
+            with self._readers_lock:
+                self._readers.append(conn)
+            weakref.finalize(reader, self._close_reader, conn)
+            self._local.reader = reader
+        return reader.conn
+    
+    def _close_reader(self, conn):
+        with self._readers_lock:
+            if conn in self._readers:
+                self._readers.remove(conn)
+        conn.close()
+    
+    def release_reader(self):
+        """Close this thread's reader now rather than when the thread exits"""
+        reader = getattr(self._local, 'reader', None)
+        if reader is None:
+            return
+        
+        self._local.reader = None
+        self._close_reader(reader.conn)
+    
+    @contextmanager
+    def reader(self):
+        """Yield this thread's read-only connection"""
+        yield self._get_reader()
+    
+    @contextmanager
+    def writer(self):
+        """Yield the shared writer connection inside a transaction.
+        
+        The transaction commits when the block exits and rolls back on an
+        exception. Nested use from the same thread joins the outer
+        transaction.
+        """
+        with self._write_lock:
+            if self._closed:
+                raise sqlite3.ProgrammingError("Connection pool is closed")
+            if self._writer is None:
+                self._writer = self._connect()
+            
+            conn = self._writer
+            if conn.in_transaction:
+                yield conn
+                return
+            
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield conn
+            except BaseException:
+                if conn.in_transaction:
+                    conn.execute("ROLLBACK")
+                raise
+            else:
+                if conn.in_transaction:
+                    conn.execute("COMMIT")
+    
+    def close(self):
+        """Close every connection owned by the pool"""
+        with self._write_lock:
+            self._closed = True
+            if self._writer is not None:
+                self._writer.close()
+                self._writer = None
+        
+        with self._readers_lock:
+            for conn in self._readers:
+                conn.close()
+            self._readers = []
+    
+    def stats(self):
+        """Return the number of open connections"""
+        with self._readers_lock:
+            readers = len(self._readers)
+        return {'readers': readers, 'writer': self._writer is not None}
@@ -1,7 +1,18 @@
 import sqlite3
+import numpy as np
 import pandas as pd
-from datetime import datetime
+import calendar
+from datetime import datetime, timedelta, timezone
 import os
+import threading
+from itertools import islice
+
+import archive
+from config import ARCHIVE_CONFIG, PROCESSING_CONFIG, SENTIMENT_CONFIG
+from connection_pool import ConnectionPool
+from instrumentation import timed, count
+from migrations import migrate, post_migration_hooks
+from utils import prepare_tweets
 
 # Find project root directory consistently
 CURRENT_DIR = os.path.dirname(os.path.abspath(__file__))
@@ -13,109 +24,407 @@ if not os.path.exists(DATA_DIR):
     os.makedirs(DATA_DIR)
 
 DATABASE_PATH = os.path.join(DATA_DIR, "tweets.db")
+# Cold tier: Parquet partitions of tweets moved out by archive_tweets
+ARCHIVE_DIR = os.path.join(DATA_DIR, "archive")
+
+# Let sqlite3 store NumPy scalars coming from DataFrames directly
+sqlite3.register_adapter(np.int64, int)
+sqlite3.register_adapter(np.int32, int)
+sqlite3.register_adapter(np.float64, float)
+sqlite3.register_adapter(np.float32, float)
+
+_pool = None
+_pool_lock = threading.Lock()
 
 def create_connection():
-    """Create database connection"""
+    """Create a standalone database connection"""
     return sqlite3.connect(DATABASE_PATH)
 
+def get_pool():
+    """Get the connection pool for DATABASE_PATH, creating it if needed"""
+    global _pool
+    
+    with _pool_lock:
+        if _pool is None or _pool.db_path != DATABASE_PATH:
+            if _pool is not None:
+                _pool.close()
+            _pool = ConnectionPool(DATABASE_PATH)
+        
+        return _pool
+
+def read_connection():
+    """Context manager yielding this thread's pooled read connection"""
+    return get_pool().reader()
+
+def write_connection():
+    """Context manager yielding the pooled writer inside a transaction"""
+    return get_pool().writer()
+
+def release_read_connection():
+    """Close the calling thread's pooled reader (for short-lived threads)"""
+    if _pool is not None:
+        _pool.release_reader()
+
+def close_connections():
+    """Close all pooled connections (e.g. before deleting the database)"""
+    global _pool
+    
+    with _pool_lock:
+        if _pool is not None:
+            _pool.close()
+            _pool = None
+
 def create_table():
-    """Create tweets table if it doesn't exist"""
-    conn = create_connection()
-    cursor = conn.cursor()
-    
-    # Check if table exists and get its schema
-    cursor.execute("PRAGMA table_info(tweets)")
-    columns = [row[1] for row in cursor.fetchall()]
-    
-    if 'user_id' not in columns and columns:
-        # Table exists but missing user_id column - add it
-        print("Adding missing user_id column to existing table...")
-        cursor.execute("ALTER TABLE tweets ADD COLUMN user_id TEXT DEFAULT 'unknown'")
-    elif not columns:
-        # Table doesn't exist - create it
-        print("Creating new tweets table...")
-        cursor.execute('''
-            CREATE TABLE tweets (
-                id TEXT PRIMARY KEY,
-                created_at TEXT,
-                text TEXT,
-                user_id TEXT DEFAULT 'unknown',
-                likes INTEGER DEFAULT 0,
-                retweets INTEGER DEFAULT 0,
-                sentiment REAL,
-                product TEXT
-            )
-        ''')
-    else:
+    """Create or upgrade the database schema to the latest version"""
+    with write_connection() as conn:
+        applied = migrate(conn)
+    
+    # Backfill outside the migrations, which cannot read the archive
+    for hook in post_migration_hooks(applied):
+        hook()
+    
+    if not applied:
         print("Table already exists with correct schema")
     
-    conn.commit()
-    conn.close()
+    return applied
 
-def insert_tweets(tweets):
-    """Insert tweets into database"""
-    conn = create_connection()
-    cursor = conn.cursor()
+def _bump_version(cursor):
+    """Mark tweet data as changed; call inside the writing transaction"""
+    cursor.execute("UPDATE db_version SET version = version + 1 WHERE id = 0")
+
+def get_db_version():
+    """Counter that increases whenever tweet data changes (0 for a new database)"""
+    try:
+        with read_connection() as conn:
+            row = conn.execute("SELECT version FROM db_version WHERE id = 0").fetchone()
+    except sqlite3.OperationalError:
+        # Not migrated yet: no db_version table
+        return 0
+    return row[0] if row else 0
+
+TWEET_COLUMNS = ['id', 'created_at', 'text', 'user_id', 'likes', 'retweets', 'sentiment', 'product']
+
+# Values used when a tweet does not provide a column
+TWEET_DEFAULTS = {'user_id': 'unknown', 'likes': 0, 'retweets': 0, 'sentiment': 0}
+
+# created_ts is derived from created_at so range scans can use the index
+INSERT_TWEET_SQL = '''
+    INSERT OR REPLACE INTO tweets 
+    (id, created_at, created_ts, text, user_id, likes, retweets, sentiment, product)
+    VALUES (?1, ?2, CAST(strftime('%s', ?2) AS INTEGER), ?3, ?4, ?5, ?6, ?7, ?8)
+'''
+
+# The rollup tables hold additive partials per product and UTC minute,
+# hour and day for every tweet in both tiers (table: (bucket column,
+# bucket seconds)). insert_tweets_bulk keeps them current in the same
+# transaction: the old rows of each batch are subtracted before the
+# INSERT OR REPLACE and the stored rows added back after it, so
+# overwrites and rejected rows are counted exactly once.
+ROLLUP_TABLES = {
+    'minute_rollups': ('minute', 60),
+    'hourly_rollups': ('hour', 3600),
+    'daily_rollups': ('day', 86400),
+}
+
+ROLLUP_COLUMNS = [
+    'tweets', 'sentiment_n', 'sentiment_sum', 'sentiment_sq', 'positive', 'negative', 'neutral',
+    'likes_n', 'likes_sum', 'retweets_n', 'retweets_sum'
+]
+
+SECONDS_PER_DAY = 86400
+
+ROLLUP_UPSERT_SQL = """
+    INSERT INTO {table} (product, {key}, """ + ', '.join(ROLLUP_COLUMNS) + """)
+    {rows}
+    ON CONFLICT (product, {key}) DO UPDATE SET
+    """ + ', '.join(f"{column} = {column} + excluded.{column}" for column in ROLLUP_COLUMNS)
+
+# Signed tweet rows waiting to be added to every rollup table
+ROLLUP_ROWS_SQL = """
+    SELECT {sign} AS sign, product, created_ts, sentiment, likes, retweets
+    FROM tweets
+    WHERE {where} AND product IS NOT NULL AND created_ts IS NOT NULL
+"""
+
+def _create_rollup_temp_tables(cursor):
+    """Per-connection scratch tables used while updating the rollups"""
+    cursor.execute("CREATE TEMP TABLE IF NOT EXISTS rollup_batch (id TEXT PRIMARY KEY)")
+    cursor.execute("CREATE TEMP TABLE IF NOT EXISTS rollup_rows "
+                   "(sign INTEGER, product TEXT, created_ts INTEGER, sentiment REAL, likes INTEGER, retweets INTEGER)")
+    cursor.execute("CREATE TEMP TABLE IF NOT EXISTS rollup_partials (product TEXT, bucket INTEGER, "
+                   + ', '.join(f"{column} REAL" for column in ROLLUP_COLUMNS) + ")")
+
+def _stage_rollup_rows(cursor, sign):
+    """Copy the current rows of the batch in temp.rollup_batch into temp.rollup_rows"""
+    cursor.execute(
+        "INSERT INTO temp.rollup_rows "
+        + ROLLUP_ROWS_SQL.format(sign=sign, where="id IN (SELECT id FROM temp.rollup_batch)")
+    )
+    return cursor.rowcount
+
+def _apply_rollups(cursor, source="temp.rollup_rows"):
+    """Add signed rows (sign, product, created_ts, sentiment, likes, retweets) to every rollup table.
+    
+    The rows are grouped once into the finest buckets; coarser tables are
+    summed from those partials rather than from the rows again.
+    """
+    positive = SENTIMENT_CONFIG["positive_threshold"]
+    negative = SENTIMENT_CONFIG["negative_threshold"]
+    finest = min(seconds for _, seconds in ROLLUP_TABLES.values())
+    
+    cursor.execute(f"""
+        INSERT INTO temp.rollup_partials
+        SELECT product, created_ts / {finest} AS bucket,
+               TOTAL(sign), TOTAL(sign * (sentiment IS NOT NULL)),
+               TOTAL(sign * sentiment), TOTAL(sign * sentiment * sentiment),
+               TOTAL(sign * (sentiment > ?)), TOTAL(sign * (sentiment < ?)),
+               TOTAL(sign * (sentiment >= ? AND sentiment <= ?)),
+               TOTAL(sign * (likes IS NOT NULL)), TOTAL(sign * likes),
+               TOTAL(sign * (retweets IS NOT NULL)), TOTAL(sign * retweets)
+        FROM {source}
+        GROUP BY product, bucket
+    """, [positive, negative, negative, positive])
+    
+    for table, (key, seconds) in ROLLUP_TABLES.items():
+        rows = f"""
+            SELECT product, bucket / {seconds // finest} AS coarse,
+                   {', '.join(f"SUM({column})" for column in ROLLUP_COLUMNS)}
+            FROM temp.rollup_partials
+            WHERE 1
+            GROUP BY product, coarse
+        """
+        cursor.execute(ROLLUP_UPSERT_SQL.format(table=table, key=key, rows=rows))
+    cursor.execute("DELETE FROM temp.rollup_partials")
+
+def _archived_rollups():
+    """{table: rollup rows} for the whole Parquet archive"""
+    cold = archive.scan(ARCHIVE_DIR, ['product', 'created_ts', 'sentiment', 'likes', 'retweets'])
+    if cold.empty:
+        return {}
+    
+    sentiment = cold['sentiment']
+    parts = pd.DataFrame({
+        'tweets': 1,
+        'sentiment_n': sentiment.notna(),
+        'sentiment_sum': sentiment.fillna(0),
+        'sentiment_sq': (sentiment ** 2).fillna(0),
+        'positive': sentiment > SENTIMENT_CONFIG["positive_threshold"],
+        'negative': sentiment < SENTIMENT_CONFIG["negative_threshold"],
+        'neutral': sentiment.between(SENTIMENT_CONFIG["negative_threshold"], SENTIMENT_CONFIG["positive_threshold"]),
+        'likes_n': cold['likes'].notna(),
+        'likes_sum': cold['likes'].fillna(0),
+        'retweets_n': cold['retweets'].notna(),
+        'retweets_sum': cold['retweets'].fillna(0),
+    })
+    
+    rollups = {}
+    for table, (_, seconds) in ROLLUP_TABLES.items():
+        grouped = parts.groupby([cold['product'], cold['created_ts'] // seconds]).sum()
+        rollups[table] = [keys + tuple(values) for keys, values in zip(grouped.index, grouped.itertuples(index=False, name=None))]
+    return rollups
+
+def rebuild_rollups():
+    """Recompute the rollup tables from the tweets table and the archive.
+    
+    Needed only after changing the sentiment label thresholds, since
+    inserts keep them current. Returns the number of daily rollup rows.
+    """
+    archived = _archived_rollups()
+    values = f"VALUES ({', '.join('?' * (len(ROLLUP_COLUMNS) + 2))})"
+    
+    with write_connection() as conn:
+        cursor = conn.cursor()
+        _create_rollup_temp_tables(cursor)
+        for table in ROLLUP_TABLES:
+            cursor.execute(f"DELETE FROM {table}")
+        _apply_rollups(cursor, f"({ROLLUP_ROWS_SQL.format(sign=1, where='1')})")
+        
+        for table, rows in archived.items():
+            key = ROLLUP_TABLES[table][0]
+            cursor.executemany(ROLLUP_UPSERT_SQL.format(table=table, key=key, rows=values), rows)
+        _bump_version(cursor)
+        return conn.execute("SELECT COUNT(*) FROM daily_rollups").fetchone()[0]
+
+def _iter_tweet_rows(tweets):
+    """Yield row tuples from tweet dicts, a dict of column arrays or a DataFrame"""
+    if hasattr(tweets, 'columns') and hasattr(tweets, 'to_dict'):
+        tweets = {column: tweets[column] for column in tweets.columns}
+    
+    if isinstance(tweets, dict):
+        # Columnar input: {'id': [...], 'text': [...], ...}
+        lengths = {len(values) for values in tweets.values()}
+        if len(lengths) > 1:
+            raise ValueError(f"Column arrays have different lengths: {sorted(lengths)}")
+        row_count = lengths.pop() if lengths else 0
+        
+        columns = []
+        for column in TWEET_COLUMNS:
+            values = tweets.get(column)
+            if values is None:
+                columns.append([TWEET_DEFAULTS.get(column)] * row_count)
+            elif hasattr(values, 'tolist'):
+                columns.append(values.tolist())
+            else:
+                columns.append(values)
+        
+        yield from zip(*columns)
+        return
     
     for tweet in tweets:
+        yield (
+            tweet.get('id'),
+            tweet.get('created_at'),
+            tweet.get('text'),
+            tweet.get('user_id', 'unknown'),
+            tweet.get('likes', 0),
+            tweet.get('retweets', 0),
+            tweet.get('sentiment', 0),
+            tweet.get('product')
+        )
+
+def _insert_batch(cursor, rows):
+    """Insert one batch inside a savepoint, isolating bad rows on failure.
+    
+    Returns (inserted_count, {error_message: count}).
+    """
+    cursor.execute("SAVEPOINT tweet_batch")
+    try:
+        cursor.executemany(INSERT_TWEET_SQL, rows)
+        cursor.execute("RELEASE SAVEPOINT tweet_batch")
+        return len(rows), {}
+    except sqlite3.Error:
+        cursor.execute("ROLLBACK TO SAVEPOINT tweet_batch")
+    
+    # Slow path: the batch contains at least one bad row
+    inserted = 0
+    errors = {}
+    for row in rows:
         try:
-            cursor.execute('''
-                INSERT OR REPLACE INTO tweets 
-                (id, created_at, text, user_id, likes, retweets, sentiment, product)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-            ''', (
-                tweet.get('id'),
-                tweet.get('created_at'),
-                tweet.get('text'),
-                tweet.get('user_id', 'unknown'),
-                tweet.get('likes', 0),
-                tweet.get('retweets', 0),
-                tweet.get('sentiment', 0),
-                tweet.get('product')
-            ))
-        except Exception as e:
-            print(f"Error inserting tweet: {e}")
-    
-    conn.commit()
-    conn.close()
-    print(f"Inserted {len(tweets)} tweets")
+            cursor.execute(INSERT_TWEET_SQL, row)
+            inserted += 1
+        except sqlite3.Error as e:
+            errors[str(e)] = errors.get(str(e), 0) + 1
+    
+    cursor.execute("RELEASE SAVEPOINT tweet_batch")
+    return inserted, errors
 
+@timed("db.insert_tweets_bulk")
+def insert_tweets_bulk(tweets, batch_size=None):
+    """Insert tweets in a single transaction using batched executemany.
+    
+    `tweets` can be an iterable of tweet dicts, a dict of column arrays
+    (lists, NumPy arrays or Series) or a DataFrame. Rows are written in
+    chunks of `batch_size` (default: PROCESSING_CONFIG["batch_size"]).
+    
+    Tweets that were already moved to the archive are skipped (counted
+    in 'archived') rather than stored in the hot table a second time.
+    
+    Returns a summary dict with inserted/rejected/archived counts and a
+    list of per-batch rejects instead of printing an error for every row.
+    """
+    batch_size = batch_size or PROCESSING_CONFIG["batch_size"]
+    summary = {'inserted': 0, 'rejected': 0, 'archived': 0, 'batches': 0, 'rejects': []}
+    
+    with write_connection() as conn:
+        cursor = conn.cursor()
+        _create_rollup_temp_tables(cursor)
+        replaced = 0
+        rows = _iter_tweet_rows(tweets)
+        
+        while True:
+            chunk = list(islice(rows, batch_size))
+            if not chunk:
+                break
+            
+            batch = [row for row in chunk if row[0] is not None]
+            missing = len(chunk) - len(batch)
+            cursor.execute("DELETE FROM temp.rollup_batch")
+            cursor.executemany("INSERT OR IGNORE INTO temp.rollup_batch (id) VALUES (?)", [row[:1] for row in batch])
+            
+            archived = {row[0] for row in cursor.execute(
+                "SELECT id FROM temp.rollup_batch WHERE id IN (SELECT id FROM archived_ids)"
+            )}
+            if archived:
+                cursor.execute("DELETE FROM temp.rollup_batch WHERE id IN (SELECT id FROM archived_ids)")
+                kept = [row for row in batch if str(row[0]) not in archived]
+                summary['archived'] += len(batch) - len(kept)
+                batch = kept
+            
+            replaced += _stage_rollup_rows(cursor, -1)
+            inserted, errors = _insert_batch(cursor, batch)
+            _stage_rollup_rows(cursor, 1)
+            _apply_rollups(cursor)
+            cursor.execute("DELETE FROM temp.rollup_rows")
+            if missing:
+                errors['missing tweet id'] = missing
+            
+            rejected = sum(errors.values())
+            summary['inserted'] += inserted
+            summary['rejected'] += rejected
+            if rejected:
+                summary['rejects'].append({
+                    'batch': summary['batches'],
+                    'rejected': rejected,
+                    'errors': errors
+                })
+            summary['batches'] += 1
+        
+        if replaced:
+            # Overwrites can move a tweet to another product or bucket
+            for table in ROLLUP_TABLES:
+                cursor.execute(f"DELETE FROM {table} WHERE tweets <= 0")
+        if summary['inserted']:
+            _bump_version(cursor)
+    
+    count("db.rows_inserted", summary['inserted'])
+    count("db.rows_rejected", summary['rejected'])
+    for reject in summary['rejects']:
+        print(f"Batch {reject['batch']}: rejected {reject['rejected']} tweets {reject['errors']}")
+    
+    return summary
+
+def insert_tweets(tweets):
+    """Insert tweets into database"""
+    summary = insert_tweets_bulk(tweets)
+    print(f"Inserted {summary['inserted']} tweets")
+    return summary
+
+@timed("db.get_all_tweets")
 def get_all_tweets():
     """Get all tweets from database"""
     try:
-        conn = create_connection()
-        
         query = """
-            SELECT id, created_at, text, user_id, likes, retweets, sentiment, product
+            SELECT id, created_at, text, user_id, likes, retweets, sentiment, product, created_ts
             FROM tweets 
-            ORDER BY created_at DESC
+            ORDER BY created_ts DESC
         """
         
-        df = pd.read_sql_query(query, conn)
-        conn.close()
+        with read_connection() as conn:
+            df = pd.read_sql_query(query, conn)
+        
+        df = _with_archived(df, list(df.columns))
         
         # Convert to list of dictionaries
-        return df.to_dict('records')
+        return df.drop(columns='created_ts').to_dict('records')
     
     except Exception as e:
         print(f"Error getting tweets: {e}")
         return []
 
+@timed("db.get_tweets_by_product")
 def get_tweets_by_product(product):
     """Get tweets for specific product"""
     try:
-        conn = create_connection()
-        
         query = """
             SELECT * FROM tweets 
             WHERE product = ?
-            ORDER BY created_at DESC
+            ORDER BY created_ts DESC
         """
         
-        df = pd.read_sql_query(query, conn, params=[product])
-        conn.close()
+        with read_connection() as conn:
+            df = pd.read_sql_query(query, conn, params=[product])
         
-        return df.to_dict('records')
+        return _with_archived(df, list(df.columns), product).to_dict('records')
     
     except Exception as e:
         print(f"Error getting tweets for {product}: {e}")
@@ -124,14 +433,10 @@ def get_tweets_by_product(product):
 def count_tweets():
     """Count total tweets in database"""
     try:
-        conn = create_connection()
-        cursor = conn.cursor()
-        
-        cursor.execute("SELECT COUNT(*) FROM tweets")
-        count = cursor.fetchone()[0]
+        with read_connection() as conn:
+            count = conn.execute("SELECT COUNT(*) FROM tweets").fetchone()[0]
         
-        conn.close()
-        return count
+        return count + archive.count_rows(ARCHIVE_DIR)
     
     except Exception as e:
         print(f"Error counting tweets: {e}")
@@ -140,20 +445,389 @@ def count_tweets():
 def get_products():
     """Get list of all products"""
     try:
-        conn = create_connection()
-        cursor = conn.cursor()
-        
-        cursor.execute("SELECT DISTINCT product FROM tweets WHERE product IS NOT NULL")
-        products = [row[0] for row in cursor.fetchall()]
-        
-        conn.close()
-        return products
+        # daily_rollups adds archived products; tweets without a created_ts
+        # have no rollup rows, so the hot table is still read too
+        with read_connection() as conn:
+            cursor = conn.execute("""
+                SELECT product FROM tweets WHERE product IS NOT NULL
+                UNION
+                SELECT product FROM daily_rollups
+            """)
+            return [row[0] for row in cursor.fetchall()]
     
     except Exception as e:
         print(f"Error getting products: {e}")
         return []
 
+def _archived(columns, product=None, start_date=None, end_date=None):
+    """Archived tweets matching the filters, or None when there are none"""
+    frame = archive.scan(ARCHIVE_DIR, columns, product, start_date, end_date)
+    return frame if len(frame) else None
+
+def _with_archived(df, columns, product=None):
+    """Append archived rows to a hot-table frame, newest created_ts first"""
+    cold = _archived(columns, product)
+    if cold is None:
+        return df
+    return pd.concat([df, cold], ignore_index=True).sort_values('created_ts', ascending=False, kind='stable')
+
+def _to_epoch(day):
+    """Convert a date to a UTC epoch matching the created_ts column"""
+    return calendar.timegm(day.timetuple())
+
+def _tweet_filter(product=None, start_date=None, end_date=None, dated=False):
+    """Build a WHERE clause for the (product, created_ts) index.
+    
+    Dates are inclusive; the end date covers the whole day. With `dated`,
+    tweets without a created_ts are left out even when no date is given.
+    """
+    clauses = ["created_ts IS NOT NULL"] if dated else []
+    params = []
+    
+    if product is not None:
+        clauses.append("product = ?")
+        params.append(product)
+    if start_date is not None:
+        clauses.append("created_ts >= ?")
+        params.append(_to_epoch(start_date))
+    if end_date is not None:
+        clauses.append("created_ts < ?")
+        params.append(_to_epoch(end_date + timedelta(days=1)))
+    
+    where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+    return where, params
+
+def _label_array(sentiment):
+    """Sentiment labels for an array of scores, using the configured thresholds"""
+    return np.select(
+        [sentiment > SENTIMENT_CONFIG["positive_threshold"], sentiment < SENTIMENT_CONFIG["negative_threshold"]],
+        ['Positive', 'Negative'],
+        'Neutral'
+    )
+
+def _rollup_filter(product=None, start_date=None, end_date=None, key='day', seconds=SECONDS_PER_DAY):
+    """Build a WHERE clause on a rollup table for an inclusive date range"""
+    clauses = []
+    params = []
+    
+    if product is not None:
+        clauses.append("product = ?")
+        params.append(product)
+    if start_date is not None:
+        clauses.append(f"{key} >= ?")
+        params.append(_to_epoch(start_date) // seconds)
+    if end_date is not None:
+        clauses.append(f"{key} < ?")
+        params.append(_to_epoch(end_date + timedelta(days=1)) // seconds)
+    
+    where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+    return where, params
+
+def _day_to_date(day):
+    return (datetime(1970, 1, 1) + timedelta(days=day)).date()
+
+def get_date_bounds(product=None):
+    """Get the first and last tweet dates, optionally for one product"""
+    try:
+        where, params = _rollup_filter(product)
+        with read_connection() as conn:
+            first, last = conn.execute(f"SELECT MIN(day), MAX(day) FROM daily_rollups {where}", params).fetchone()
+        
+        if first is None:
+            return None, None
+        return _day_to_date(first), _day_to_date(last)
+    
+    except Exception as e:
+        print(f"Error getting date bounds: {e}")
+        return None, None
+
+def get_label_distribution(product=None, start_date=None, end_date=None):
+    """Get tweet counts per sentiment label as a DataFrame [sentiment_category, count]"""
+    try:
+        where, params = _rollup_filter(product, start_date, end_date)
+        # Unscored tweets are labelled Neutral, as get_sentiment_label does
+        query = f"""
+            SELECT TOTAL(positive), TOTAL(negative), TOTAL(tweets) - TOTAL(positive) - TOTAL(negative)
+            FROM daily_rollups
+            {where}
+        """
+        
+        with read_connection() as conn:
+            counts = conn.execute(query, params).fetchone()
+        
+        df = pd.DataFrame({'sentiment_category': ['Positive', 'Negative', 'Neutral'], 'count': np.array(counts, dtype=int)})
+        return df[df['count'] > 0].sort_values('count', ascending=False, kind='stable', ignore_index=True)
+    
+    except Exception as e:
+        print(f"Error getting label distribution: {e}")
+        return pd.DataFrame(columns=['sentiment_category', 'count'])
+
+def get_product_summaries(start_date=None, end_date=None):
+    """Get per-product tweet count and average sentiment/likes/retweets"""
+    try:
+        where, params = _rollup_filter(None, start_date, end_date)
+        query = f"""
+            SELECT product,
+                   SUM(tweets) AS tweets,
+                   SUM(sentiment_sum) / SUM(sentiment_n) AS avg_sentiment,
+                   SUM(likes_sum) / SUM(likes_n) AS avg_likes,
+                   SUM(retweets_sum) / SUM(retweets_n) AS avg_retweets
+            FROM daily_rollups
+            {where}
+            GROUP BY product
+            ORDER BY product
+        """
+        
+        with read_connection() as conn:
+            return pd.read_sql_query(query, conn, params=params)
+    
+    except Exception as e:
+        print(f"Error getting product summaries: {e}")
+        return pd.DataFrame(columns=['product', 'tweets', 'avg_sentiment', 'avg_likes', 'avg_retweets'])
+
+def get_rollup_buckets(table, product=None, start_date=None, end_date=None, group=1, shift=0):
+    """Get sentiment and volume per bucket of a rollup table as a DataFrame [bucket, sentiment, count].
+    
+    Dates are inclusive. Buckets are the table's own (minute, hour or day
+    numbers since the epoch), shifted by `shift` and merged `group` at a
+    time, so `group=7, shift=3` turns day numbers into Monday weeks.
+    """
+    key, seconds = ROLLUP_TABLES[table]
+    bucket = key if group == 1 and not shift else f"({key} + {int(shift)}) / {int(group)}"
+    try:
+        where, params = _rollup_filter(product, start_date, end_date, key, seconds)
+        query = f"""
+            SELECT {bucket} AS bucket,
+                   SUM(sentiment_sum) / SUM(sentiment_n) AS sentiment,
+                   SUM(tweets) AS count
+            FROM {table}
+            {where}
+            GROUP BY bucket
+            ORDER BY bucket
+        """
+        
+        with read_connection() as conn:
+            return pd.read_sql_query(query, conn, params=params)
+    
+    except Exception as e:
+        print(f"Error getting {table} buckets: {e}")
+        return pd.DataFrame(columns=['bucket', 'sentiment', 'count'])
+
+def get_tweet_metrics(product=None, start_date=None, end_date=None):
+    """Get the same metrics as utils.calculate_metrics, from daily_rollups"""
+    try:
+        where, params = _rollup_filter(product, start_date, end_date)
+        query = f"""
+            SELECT TOTAL(tweets),
+                   TOTAL(sentiment_sum), TOTAL(sentiment_n),
+                   TOTAL(likes_sum), TOTAL(likes_n),
+                   TOTAL(retweets_sum), TOTAL(retweets_n),
+                   TOTAL(positive), TOTAL(negative), TOTAL(neutral)
+            FROM daily_rollups
+            {where}
+        """
+        
+        with read_connection() as conn:
+            totals = conn.execute(query, params).fetchone()
+        
+        if not totals[0]:
+            return {}
+        
+        def average(total, n):
+            return float(total / n) if n else None
+        
+        return {
+            'total_tweets': int(totals[0]),
+            'avg_sentiment': average(totals[1], totals[2]),
+            'avg_likes': average(totals[3], totals[4]),
+            'avg_retweets': average(totals[5], totals[6]),
+            'positive_tweets': int(totals[7]),
+            'negative_tweets': int(totals[8]),
+            'neutral_tweets': int(totals[9])
+        }
+    
+    except Exception as e:
+        print(f"Error getting tweet metrics: {e}")
+        return {}
+
+def get_recent_tweets(product=None, start_date=None, end_date=None, limit=5):
+    """Get the most recent tweets matching the filters"""
+    try:
+        where, params = _tweet_filter(product, start_date, end_date)
+        query = f"""
+            SELECT id, created_at, text, user_id, likes, retweets, sentiment, product
+            FROM tweets
+            {where}
+            ORDER BY created_ts DESC
+            LIMIT ?
+        """
+        
+        with read_connection() as conn:
+            df = pd.read_sql_query(query, conn, params=params + [limit])
+        
+        # Archived tweets are older than the hot table's, so only top up from them
+        if len(df) < limit:
+            cold = _archived(TWEET_COLUMNS + ['created_ts'], product, start_date, end_date)
+            if cold is not None:
+                cold = cold.nlargest(limit - len(df), 'created_ts')[TWEET_COLUMNS]
+                df = pd.concat([df, cold], ignore_index=True)
+        return df
+    
+    except Exception as e:
+        print(f"Error getting recent tweets: {e}")
+        return pd.DataFrame(columns=TWEET_COLUMNS)
+
+@timed("db.get_tweets_frame")
+def get_tweets_frame(product=None, start_date=None, end_date=None):
+    """Get tweets matching the filters as a frame ready for charting.
+    
+    Rows are oldest first and already passed through utils.prepare_tweets,
+    so created_at is datetime64 and chart functions never re-parse it.
+    Tweets without a created_ts cannot be charted and are left out, as in
+    the snapshot.
+    """
+    columns = TWEET_COLUMNS + ['created_ts']
+    try:
+        where, params = _tweet_filter(product, start_date, end_date, dated=True)
+        query = f"""
+            SELECT {', '.join(columns)}
+            FROM tweets
+            {where}
+            ORDER BY created_ts
+        """
+        
+        with read_connection() as conn:
+            df = pd.read_sql_query(query, conn, params=params)
+        
+        cold = _archived(columns, product, start_date, end_date)
+        if cold is not None:
+            df = pd.concat([cold, df], ignore_index=True).sort_values('created_ts', kind='stable', ignore_index=True)
+        return prepare_tweets(df.astype({'created_ts': 'int64'}))
+    
+    except Exception as e:
+        print(f"Error getting tweets frame: {e}")
+        return prepare_tweets(pd.DataFrame(columns=columns).astype({'created_ts': 'int64'}))
+
+@timed("db.filter_new_tweets")
+def filter_new_tweets(tweets):
+    """Drop tweets whose id is already stored in either tier.
+    
+    Returns (new_tweets, skipped_count) so re-collected tweets are not
+    scored and written again.
+    """
+    ids = list({tweet.get('id') for tweet in tweets if tweet.get('id') is not None})
+    existing = set()
+    
+    with read_connection() as conn:
+        for i in range(0, len(ids), 500):
+            chunk = ids[i:i + 500]
+            placeholders = ', '.join('?' * len(chunk))
+            cursor = conn.execute(
+                f"SELECT id FROM tweets WHERE id IN ({placeholders}) "
+                f"UNION ALL SELECT id FROM archived_ids WHERE id IN ({placeholders})",
+                chunk + chunk
+            )
+            existing.update(row[0] for row in cursor)
+    
+    new_tweets = [tweet for tweet in tweets if tweet.get('id') not in existing]
+    return new_tweets, len(tweets) - len(new_tweets)
+
+def backfill_archived_ids():
+    """Record the ids of every tweet already in the Parquet archive"""
+    ids = archive.scan(ARCHIVE_DIR, ['id'])['id']
+    if ids.empty:
+        return
+    
+    with write_connection() as conn:
+        conn.executemany("INSERT OR IGNORE INTO archived_ids (id) VALUES (?)", ((tweet_id,) for tweet_id in ids))
+
+def archive_tweets(before=None, batch_size=None):
+    """Move tweets created before `before` from SQLite into the Parquet archive.
+    
+    `before` is a date (default: ARCHIVE_CONFIG["hot_days"] days ago, UTC).
+    Each batch is merged into its product/day partitions first and only
+    then deleted from the tweets table, so an interrupted run loses
+    nothing; until it is rerun, those tweets exist in both tiers.
+    Read queries keep working throughout and see both tiers. Moved ids
+    are recorded in archived_ids in the same transaction as the delete,
+    so collecting an archived tweet again never stores it a second time.
+    
+    Returns the number of tweets moved.
+    """
+    if before is None:
+        before = datetime.now(timezone.utc).date() - timedelta(days=ARCHIVE_CONFIG["hot_days"])
+    batch_size = batch_size or ARCHIVE_CONFIG["batch_size"]
+    cutoff = _to_epoch(before)
+    query = f"""
+        SELECT {', '.join(archive.ARCHIVE_COLUMNS)}, product
+        FROM tweets
+        WHERE created_ts < ? AND product IS NOT NULL
+        ORDER BY created_ts
+        LIMIT ?
+    """
+    moved = 0
+    
+    while True:
+        with read_connection() as conn:
+            batch = pd.read_sql_query(query, conn, params=[cutoff, batch_size])
+        if batch.empty:
+            break
+        
+        archive.write_partitions(ARCHIVE_DIR, batch)
+        ids = [(tweet_id,) for tweet_id in batch['id']]
+        with write_connection() as conn:
+            conn.executemany("DELETE FROM tweets WHERE id = ?", ids)
+            conn.executemany("INSERT OR IGNORE INTO archived_ids (id) VALUES (?)", ids)
+        moved += len(batch)
+    
+    print(f"Archived {moved} tweets created before {before}")
+    return moved
+
+COLLECTION_STATE_COLUMNS = ['since_id', 'next_token', 'run_since_id', 'run_newest_id']
+
+def get_collection_state(product):
+    """Get the API pagination checkpoint for a product.
+    
+    since_id is the newest tweet id of the last finished collection.
+    next_token, run_since_id and run_newest_id describe a collection that
+    was interrupted and can be resumed.
+    """
+    with read_connection() as conn:
+        row = conn.execute(
+            f"SELECT {', '.join(COLLECTION_STATE_COLUMNS)} FROM collection_state WHERE product = ?",
+            [product]
+        ).fetchone()
+    
+    return dict(zip(COLLECTION_STATE_COLUMNS, row or [None] * len(COLLECTION_STATE_COLUMNS)))
+
+def save_collection_state(product, **state):
+    """Update the checkpoint columns given in `state` for a product"""
+    unknown = set(state) - set(COLLECTION_STATE_COLUMNS)
+    if unknown:
+        raise ValueError(f"Unknown collection state columns: {sorted(unknown)}")
+    
+    columns = list(state)
+    assignments = ', '.join(f"{column} = excluded.{column}" for column in columns + ['updated_at'])
+    query = f"""
+        INSERT INTO collection_state (product, {', '.join(columns)}, updated_at)
+        VALUES (?, {', '.join('?' * len(columns))}, datetime('now'))
+        ON CONFLICT(product) DO UPDATE SET {assignments}
+    """
+    
+    with write_connection() as conn:
+        conn.execute(query, [product] + [state[column] for column in columns])
+
 # Initialize database when module is imported
 if __name__ == "__main__":
+    import sys
+    
     create_table()
-    print("Database initialized")
\ No newline at end of file
+    print("Database initialized")
+    
+    if len(sys.argv) > 1 and sys.argv[1] == "archive":
+        # python src/database.py archive [days_to_keep_hot]
+        days = int(sys.argv[2]) if len(sys.argv) > 2 else ARCHIVE_CONFIG["hot_days"]
+        archive_tweets(datetime.now(timezone.utc).date() - timedelta(days=days))
+    elif len(sys.argv) > 1 and sys.argv[1] == "rebuild-rollups":
+        # After changing the sentiment label thresholds
+        print(f"Rebuilt {rebuild_rollups()} daily rollups")
\ No newline at end of file
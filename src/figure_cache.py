@@ -0,0 +1,110 @@
+"""Shared cache of dashboard figures and aggregates.
+
+Entries are keyed by the caller (chart type, product, date range and
+chart options) and belong to one data version, the database's db_version
+counter. Every write bumps that counter, so the first lookup with a newer
+version drops everything built from the old data; lookups from sessions
+still on an older version never clear it. The cache is a bounded
+LRU living at module level, so every Streamlit session in the server
+process shares it: switching back to a product someone already looked at
+reuses its figures instead of querying and building them again.
+"""
+import threading
+from collections import OrderedDict
+
+from config import CHART_CONFIG
+
+_MISSING = object()
+
+class FigureCache:
+    """Bounded LRU of built figures and aggregates for one data version"""
+
+    def __init__(self, maxsize=128):
+        self.maxsize = maxsize
+        self.version = None
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._reset_stats()
+
+    def _reset_stats(self):
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def invalidate(self, version=None):
+        """Drop every entry and start caching for `version`"""
+        with self._lock:
+            self._entries.clear()
+            self.version = version
+            self.invalidations += 1
+
+    def get_or_build(self, version, key, build):
+        """Return the cached value for `key`, calling `build()` on a miss.
+
+        Results (including None, e.g. a chart with no data) are only
+        stored while `version` is still the current one. A newer version
+        invalidates the cache; a session still on an older one gets a
+        freshly built value that is never stored. Two sessions missing
+        the same key at once may both build it.
+        """
+        with self._lock:
+            newer = self.version is None or version > self.version
+        if newer:
+            self.invalidate(version)
+
+        with self._lock:
+            if version != self.version:
+                value = _MISSING
+            else:
+                value = self._entries.get(key, _MISSING)
+            if value is not _MISSING:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return value
+            self.misses += 1
+
+        value = build()
+
+        with self._lock:
+            if version == self.version:
+                self._entries[key] = value
+                self._entries.move_to_end(key)
+                if len(self._entries) > self.maxsize:
+                    self._entries.popitem(last=False)
+                    self.evictions += 1
+        return value
+
+    def clear(self):
+        """Empty the cache and reset the counters"""
+        with self._lock:
+            self._entries.clear()
+            self._reset_stats()
+
+    def stats(self):
+        """Return hit/miss counters and the current size"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'version': self.version,
+                'size': len(self._entries),
+                'maxsize': self.maxsize,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'invalidations': self.invalidations,
+                'hit_rate': self.hits / lookups if lookups else 0.0
+            }
+
+_figure_cache = None
+_figure_cache_lock = threading.Lock()
+
+def get_figure_cache():
+    """Process-wide figure cache sized by CHART_CONFIG["figure_cache_size"]"""
+    global _figure_cache
+
+    size = CHART_CONFIG["figure_cache_size"]
+    with _figure_cache_lock:
+        if _figure_cache is None or _figure_cache.maxsize != size:
+            _figure_cache = FigureCache(maxsize=size)
+        return _figure_cache
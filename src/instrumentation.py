@@ -0,0 +1,218 @@
+"""Timers, counters and histograms for pipeline runs.
+
+Modules record into one process-wide registry:
+
+    with timed("db.insert"):           # or @timed("db.insert") on a function
+        ...
+    count("collector.api_pages")
+    observe("sentiment.batch_size", len(texts), bounds=SIZE_BUCKETS)
+
+Recording is a lock and a few additions, cheap enough to leave on in
+production runs. `instrumented_run` wraps a whole pipeline run: it resets
+the registry, optionally captures a cProfile of the calling thread and
+writes a JSON run report (metrics, result and profile) to
+INSTRUMENTATION_CONFIG["report_dir"], next to the other logs.
+"""
+import io
+import json
+import time
+import pstats
+import cProfile
+import threading
+from functools import wraps
+from contextlib import contextmanager
+from datetime import datetime
+
+from config import INSTRUMENTATION_CONFIG, get_run_reports_dir
+
+# Histogram bucket upper bounds; values above the last bound land in an overflow bucket
+TIME_BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+SIZE_BUCKETS = (1, 10, 50, 100, 500, 1000, 5000, 10000, 50000, 100000)
+
+class Histogram:
+    """Fixed-bucket histogram with exact count, total, min and max"""
+    
+    def __init__(self, bounds=TIME_BUCKETS):
+        self.bounds = tuple(bounds)
+        self.buckets = [0] * (len(self.bounds) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.min = None
+        self.max = None
+    
+    def add(self, value):
+        index = 0
+        while index < len(self.bounds) and value > self.bounds[index]:
+            index += 1
+        self.buckets[index] += 1
+        self.count += 1
+        self.total += value
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = value if self.max is None else max(self.max, value)
+    
+    def quantile(self, q):
+        """Upper bound of the bucket holding quantile `q`, capped at the observed max"""
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for bound, bucket in zip(self.bounds, self.buckets):
+            seen += bucket
+            if seen >= rank:
+                return min(bound, self.max)
+        return self.max
+    
+    def snapshot(self):
+        labels = [f"<={bound:g}" for bound in self.bounds] + [f">{self.bounds[-1]:g}"]
+        return {
+            'count': self.count,
+            'total': self.total,
+            'mean': self.total / self.count if self.count else None,
+            'min': self.min,
+            'max': self.max,
+            'p50': self.quantile(0.5),
+            'p95': self.quantile(0.95),
+            'buckets': {label: n for label, n in zip(labels, self.buckets) if n}
+        }
+
+class Metrics:
+    """Thread-safe registry of named counters and histograms"""
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.counters = {}
+        self.histograms = {}
+    
+    def count(self, name, n=1):
+        if not INSTRUMENTATION_CONFIG["enabled"]:
+            return
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + n
+    
+    def observe(self, name, value, bounds=TIME_BUCKETS):
+        if not INSTRUMENTATION_CONFIG["enabled"]:
+            return
+        with self._lock:
+            histogram = self.histograms.get(name)
+            if histogram is None:
+                histogram = self.histograms[name] = Histogram(bounds)
+            histogram.add(value)
+    
+    def reset(self):
+        with self._lock:
+            self.counters.clear()
+            self.histograms.clear()
+    
+    def snapshot(self):
+        """Counters and histogram summaries as plain dicts"""
+        with self._lock:
+            return {
+                'counters': dict(sorted(self.counters.items())),
+                'timers': {name: histogram.snapshot() for name, histogram in sorted(self.histograms.items())}
+            }
+
+metrics = Metrics()
+
+class timed:
+    """Record elapsed seconds into the `name` histogram.
+    
+    Works as a context manager (`with timed("x"):`) and as a function
+    decorator (`@timed("x")`). Time is recorded even if the body raises.
+    """
+    
+    def __init__(self, name):
+        self.name = name
+        self._start = None
+    
+    def __enter__(self):
+        self._start = time.perf_counter()
+        return self
+    
+    def __exit__(self, *exc_info):
+        metrics.observe(self.name, time.perf_counter() - self._start)
+        return False
+    
+    def __call__(self, func):
+        name = self.name
+        
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                metrics.observe(name, time.perf_counter() - start)
+        
+        return wrapper
+
+def count(name, n=1):
+    """Add `n` to the `name` counter"""
+    metrics.count(name, n)
+
+def observe(name, value, bounds=TIME_BUCKETS):
+    """Record `value` in the `name` histogram"""
+    metrics.observe(name, value, bounds)
+
+def _profile_summary(profiler, top):
+    """The `top` functions by cumulative time from a finished profiler"""
+    stats = pstats.Stats(profiler, stream=io.StringIO())
+    rows = []
+    for (filename, line, function), (_, calls, own, cumulative, _) in stats.stats.items():
+        rows.append({
+            'function': f"{filename}:{line}({function})",
+            'calls': calls,
+            'own_seconds': own,
+            'cumulative_seconds': cumulative
+        })
+    rows.sort(key=lambda row: row['cumulative_seconds'], reverse=True)
+    return rows[:top]
+
+def write_run_report(run):
+    """Write a run dict as JSON to the run report directory and return the path"""
+    stamp = datetime.now().strftime('%Y%m%d-%H%M%S-%f')
+    name = ''.join(c if c.isalnum() or c in '-_' else '_' for c in run.get('name', 'run'))
+    path = get_run_reports_dir() / f"{name}-{stamp}.json"
+    with open(path, 'w') as f:
+        json.dump(run, f, indent=2, default=str)
+    return path
+
+@contextmanager
+def instrumented_run(name, profile=None):
+    """Instrument one pipeline run and write its JSON report on exit.
+    
+    Yields a dict; put the run's own result under 'result'. The report
+    adds start time, elapsed seconds, the metrics recorded during the run,
+    any error and, with `profile` (default:
+    INSTRUMENTATION_CONFIG["profile"]), the top cProfile entries. The raw
+    profile is saved beside the report as a .prof file for snakeviz or
+    pstats. cProfile only sees the calling thread, so work done in
+    collector and stage threads shows up as waits.
+    """
+    profile = INSTRUMENTATION_CONFIG["profile"] if profile is None else profile
+    run = {'name': name, 'started_at': datetime.now().isoformat(timespec='seconds'), 'result': None}
+    metrics.reset()
+    profiler = cProfile.Profile() if profile else None
+    
+    start = time.perf_counter()
+    if profiler is not None:
+        profiler.enable()
+    try:
+        yield run
+    except Exception as e:
+        run['error'] = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        if profiler is not None:
+            profiler.disable()
+        run['elapsed'] = time.perf_counter() - start
+        run['metrics'] = metrics.snapshot()
+        if profiler is not None:
+            run['profile'] = _profile_summary(profiler, INSTRUMENTATION_CONFIG["profile_top"])
+        
+        try:
+            path = write_run_report(run)
+            if profiler is not None:
+                profiler.dump_stats(str(path.with_suffix('.prof')))
+            run['report_path'] = str(path)
+        except OSError as e:
+            print(f"Could not write run report: {e}")
@@ -0,0 +1,277 @@
+"""Vectorized, seeded synthetic tweet generator for load testing.
+
+Tweets are built a chunk at a time with NumPy: product, sentiment and
+template choices, a launch-day volume curve with a daily (diurnal) cycle,
+heavy-tailed engagement and time-ordered unique ids. Chunks can be
+streamed straight into the database or to CSV/Parquet files, so millions
+of rows never have to sit in memory at once.
+
+Ids use the Twitter snowflake layout, so they decode to the tweet's own
+creation time: milliseconds since the Twitter epoch shifted left by 22,
+a 10-bit worker number and a 12-bit sequence. Each generator draws its
+worker number from its random generator, which keeps separate runs and
+processes apart, and takes sequence numbers from one process-wide
+counter (unless given its own `sequence_start`). The counter also picks
+the millisecond within the tweet's second, so a generator's first
+4,096,000 ids are unique; across generators ids can only collide when
+they share a worker number, a millisecond and a sequence number.
+Stored sample ids are never used as the API since_id (see
+tweet_collector.get_since_id).
+"""
+import math
+import threading
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+
+from config import FALLBACK_CONFIG, LOAD_GENERATOR_CONFIG, PROCESSING_CONFIG, PYARROW_AVAILABLE
+
+# Tweet text templates; {product} is replaced with the product name
+SAMPLE_TEMPLATES = {
+    'positive': [
+        "Love the new {product}! Amazing features  ",
+        "{product} is incredible! Best upgrade ever  ",
+        "Just got my {product} and it's perfect!  ",
+        "{product} exceeded my expectations! Highly recommend  ",
+        "Outstanding quality! {product} is worth every penny  "
+    ],
+    'negative': [
+        "{product} is disappointing. Not worth the price  ",
+        "Had high hopes for {product} but it's mediocre  ",
+        "{product} has too many issues. Returning it  ",
+        "Not impressed with {product}. Expected better  ",
+        "{product} is overpriced for what you get  "
+    ],
+    'neutral': [
+        "Just unboxed my {product}. First impressions...",
+        "Testing out the {product} features today",
+        "{product} arrived. Setting it up now",
+        "Comparing {product} with my old device",
+        "{product} review coming soon. Stay tuned"
+    ]
+}
+
+SENTIMENT_TYPES = ('positive', 'negative', 'neutral')
+
+# 2010-11-04 01:42:54.657 UTC, the start of Twitter snowflake ids
+TWITTER_EPOCH_MS = 1288834974657
+WORKER_BITS = 10
+SEQUENCE_BITS = 12
+
+_sequence = 0
+_sequence_lock = threading.Lock()
+
+def _reserve_sequence(count):
+    """Reserve `count` consecutive process-wide id sequence numbers"""
+    global _sequence
+    
+    with _sequence_lock:
+        start = _sequence
+        _sequence += count
+    return start
+
+def _normalize_weights(weights, names):
+    values = np.array([float(weights.get(name, 0.0)) for name in names])
+    if values.sum() <= 0 or (values < 0).any():
+        raise ValueError(f"Weights must be non-negative and not all zero: {weights}")
+    return values / values.sum()
+
+class LoadGenerator:
+    """Generate realistic synthetic tweets in chunks.
+    
+    `products` is a list (equal shares) or a {product: weight} dict.
+    Volume over `days` days from `start` peaks on launch day and decays
+    with LOAD_GENERATOR_CONFIG["launch_decay_days"]; within a day it
+    follows a cycle peaking at "peak_hour". `sentiment_mix` weights the
+    positive/negative/neutral templates. With a `seed` the same rows are
+    produced every time (pass `start` and `sequence_start` as well for
+    identical timestamps and ids). `worker` fixes the id worker number
+    instead of drawing it.
+    """
+    
+    def __init__(self, products=None, start=None, days=None, sentiment_mix=None,
+                 seed=None, sequence_start=None, with_sentiment=True, worker=None):
+        config = LOAD_GENERATOR_CONFIG
+        products = products or FALLBACK_CONFIG["products"]
+        if not isinstance(products, dict):
+            products = {product: 1.0 for product in products}
+        
+        self.products = list(products)
+        self.product_weights = _normalize_weights(products, self.products)
+        self.sentiment_weights = _normalize_weights(sentiment_mix or config["sentiment_mix"], SENTIMENT_TYPES)
+        self.days = days or FALLBACK_CONFIG["date_range_days"]
+        self.start = start or (datetime.now() - timedelta(days=self.days)).replace(microsecond=0)
+        self.rng = np.random.default_rng(seed)
+        self.with_sentiment = with_sentiment
+        self._sequence = sequence_start
+        self.worker = int(self.rng.integers(1 << WORKER_BITS)) if worker is None else worker
+        
+        # Launch spike decaying over the following days, times a daily cycle
+        day = np.arange(self.days)
+        daily = 1.0 + config["launch_spike"] * np.exp(-day / config["launch_decay_days"])
+        hour = np.arange(24)
+        hourly = 1.0 + config["diurnal_amplitude"] * np.cos(2 * math.pi * (hour - config["peak_hour"]) / 24)
+        slot_weights = np.outer(daily, hourly).ravel()
+        self.slot_weights = slot_weights / slot_weights.sum()
+        
+        # texts[product, sentiment, template]
+        per_type = len(SAMPLE_TEMPLATES['positive'])
+        self.texts = np.empty((len(self.products), len(SENTIMENT_TYPES), per_type), dtype=object)
+        for p, product in enumerate(self.products):
+            for s, sentiment_type in enumerate(SENTIMENT_TYPES):
+                for t, template in enumerate(SAMPLE_TEMPLATES[sentiment_type]):
+                    self.texts[p, s, t] = template.format(product=product)
+        self._scores = None
+    
+    def _template_scores(self):
+        """Sentiment score of every template text, scored once"""
+        if self._scores is None:
+            from sentiment_analyzer import analyze_sentiment_batch
+            scores, _ = analyze_sentiment_batch(self.texts.ravel().tolist(), workers=1)
+            self._scores = np.round(scores, 3).reshape(self.texts.shape)
+        return self._scores
+    
+    def _next_sequence(self, count):
+        if self._sequence is None:
+            return _reserve_sequence(count)
+        start = self._sequence
+        self._sequence += count
+        return start
+    
+    def chunk(self, rows):
+        """Generate one DataFrame of `rows` tweets, ordered by created_at"""
+        rng = self.rng
+        config = LOAD_GENERATOR_CONFIG
+        
+        product = rng.choice(len(self.products), rows, p=self.product_weights)
+        sentiment = rng.choice(len(SENTIMENT_TYPES), rows, p=self.sentiment_weights)
+        template = rng.integers(0, self.texts.shape[2], rows)
+        
+        slot = rng.choice(len(self.slot_weights), rows, p=self.slot_weights)
+        offsets = np.sort(slot * 3600 + rng.integers(0, 3600, rows))
+        created = np.datetime64(self.start, 's') + offsets.astype('timedelta64[s]')
+        
+        # Lognormal likes (median per sentiment type); retweets are a share of likes
+        medians = np.array([config["median_likes"][name] for name in SENTIMENT_TYPES])
+        likes = np.floor(rng.lognormal(np.log(medians[sentiment]), config["likes_sigma"])).astype(np.int64)
+        retweets = rng.binomial(likes, config["retweet_ratio"])
+        
+        # Zipf-distributed authors, so a few accounts post a lot
+        users = (rng.zipf(config["user_zipf_a"], rows) - 1) % config["users"]
+        
+        # Snowflake ids: (ms since epoch << 22) | (worker << 12) | sequence
+        counter = self._next_sequence(rows) + np.arange(rows, dtype=np.int64)
+        ms = created.astype(np.int64) * 1000 + (counter >> SEQUENCE_BITS) % 1000
+        ids = (
+            (ms - TWITTER_EPOCH_MS) << (WORKER_BITS + SEQUENCE_BITS)
+            | self.worker << SEQUENCE_BITS
+            | counter & ((1 << SEQUENCE_BITS) - 1)
+        )
+        
+        return pd.DataFrame({
+            'id': ids.astype(str),
+            'created_at': pd.Series(np.datetime_as_string(created, unit='s')).str.replace('T', ' ', regex=False),
+            'text': self.texts[product, sentiment, template],
+            'user_id': np.char.add('user_', users.astype(str)),
+            'likes': likes,
+            'retweets': retweets,
+            'sentiment': self._template_scores()[product, sentiment, template] if self.with_sentiment else np.nan,
+            'product': np.asarray(self.products, dtype=object)[product]
+        })
+    
+    def iter_chunks(self, rows, chunk_size=None):
+        """Yield DataFrames totalling `rows` tweets, `chunk_size` at a time"""
+        chunk_size = chunk_size or LOAD_GENERATOR_CONFIG["chunk_size"]
+        for offset in range(0, rows, chunk_size):
+            yield self.chunk(min(chunk_size, rows - offset))
+    
+    def to_database(self, rows, chunk_size=None):
+        """Stream `rows` tweets into the tweets table; returns the inserted count"""
+        import database
+        
+        database.create_table()
+        inserted = 0
+        for frame in self.iter_chunks(rows, chunk_size):
+            inserted += database.insert_tweets_bulk(frame, batch_size=max(PROCESSING_CONFIG["batch_size"], 1000))['inserted']
+        return inserted
+    
+    def to_csv(self, path, rows, chunk_size=None):
+        """Stream `rows` tweets to one CSV file; returns the row count"""
+        written = 0
+        for i, frame in enumerate(self.iter_chunks(rows, chunk_size)):
+            frame.to_csv(path, mode='w' if i == 0 else 'a', header=i == 0, index=False)
+            written += len(frame)
+        return written
+    
+    def to_parquet(self, path, rows, chunk_size=None):
+        """Stream `rows` tweets to one Parquet file (one row group per chunk)"""
+        if not PYARROW_AVAILABLE:
+            raise ImportError("pyarrow is required for Parquet output (pip install pyarrow)")
+        
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        
+        writer = None
+        written = 0
+        try:
+            for frame in self.iter_chunks(rows, chunk_size):
+                table = pa.Table.from_pandas(frame, preserve_index=False)
+                if writer is None:
+                    writer = pq.ParquetWriter(path, table.schema)
+                writer.write_table(table)
+                written += len(frame)
+        finally:
+            if writer is not None:
+                writer.close()
+        return written
+
+def parse_product_mix(text):
+    """Parse "iPhone 15=0.4,Pixel 8=0.6" (weights optional) into a dict"""
+    mix = {}
+    for item in text.split(','):
+        name, _, weight = item.partition('=')
+        if name.strip():
+            mix[name.strip()] = float(weight) if weight else 1.0
+    return mix
+
+def main():
+    import argparse
+    import time
+    
+    parser = argparse.ArgumentParser(description="Generate synthetic tweets for load testing")
+    parser.add_argument("--rows", type=int, default=1000000, help="Number of tweets to generate")
+    parser.add_argument("--to", choices=["db", "csv", "parquet"], default="db", help="Where to write the tweets")
+    parser.add_argument("--output", help="Output file for csv/parquet")
+    parser.add_argument("--products", help='Product mix, e.g. "iPhone 15=0.4,Pixel 8=0.6"')
+    parser.add_argument("--days", type=int, help="Days of activity after launch")
+    parser.add_argument("--start", help="Launch date (YYYY-MM-DD), default: --days ago")
+    parser.add_argument("--seed", type=int, help="Seed for reproducible output")
+    parser.add_argument("--chunk-size", type=int, help="Rows generated and written per chunk")
+    args = parser.parse_args()
+    
+    if args.to != "db" and not args.output:
+        parser.error("--output is required for csv and parquet")
+    
+    generator = LoadGenerator(
+        products=parse_product_mix(args.products) if args.products else None,
+        start=datetime.strptime(args.start, '%Y-%m-%d') if args.start else None,
+        days=args.days,
+        seed=args.seed,
+        sequence_start=0 if args.seed is not None else None
+    )
+    
+    start = time.perf_counter()
+    if args.to == "db":
+        written = generator.to_database(args.rows, args.chunk_size)
+    elif args.to == "csv":
+        written = generator.to_csv(args.output, args.rows, args.chunk_size)
+    else:
+        written = generator.to_parquet(args.output, args.rows, args.chunk_size)
+    elapsed = time.perf_counter() - start
+    
+    print(f"Wrote {written:,} tweets to {args.output or 'the database'} "
+          f"in {elapsed:.1f}s ({written / elapsed:,.0f} rows/sec)")
+
+if __name__ == "__main__":
+    main()
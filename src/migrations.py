@@ -0,0 +1,156 @@
+"""Versioned schema migrations for the tweets database.
+
+The current schema version is stored in SQLite's `user_version` header
+field. `migrate` applies only the migrations newer than that version, so
+upgrading a large existing database does the minimum amount of work.
+"""
+
+def _create_tweets_table(cursor):
+    """Create the tweets table, or add user_id to a pre-versioning table"""
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS tweets (
+            id TEXT PRIMARY KEY,
+            created_at TEXT,
+            text TEXT,
+            user_id TEXT DEFAULT 'unknown',
+            likes INTEGER DEFAULT 0,
+            retweets INTEGER DEFAULT 0,
+            sentiment REAL,
+            product TEXT
+        )
+    ''')
+    
+    cursor.execute("PRAGMA table_info(tweets)")
+    columns = [row[1] for row in cursor.fetchall()]
+    if 'user_id' not in columns:
+        cursor.execute("ALTER TABLE tweets ADD COLUMN user_id TEXT DEFAULT 'unknown'")
+
+def _add_created_ts(cursor):
+    """Store created_at as an integer epoch and index it by product"""
+    cursor.execute("ALTER TABLE tweets ADD COLUMN created_ts INTEGER")
+    cursor.execute("UPDATE tweets SET created_ts = CAST(strftime('%s', created_at) AS INTEGER)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_tweets_product_created_ts ON tweets (product, created_ts)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_tweets_created_ts ON tweets (created_ts)")
+
+def _create_sentiment_cache(cursor):
+    """Create the persistent tier of the sentiment score cache"""
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS sentiment_cache (
+            key TEXT PRIMARY KEY,
+            namespace TEXT NOT NULL,
+            score REAL NOT NULL
+        )
+    ''')
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_sentiment_cache_namespace ON sentiment_cache (namespace)")
+
+def _create_collection_state(cursor):
+    """Track per-product API pagination checkpoints"""
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS collection_state (
+            product TEXT PRIMARY KEY,
+            since_id TEXT,
+            next_token TEXT,
+            run_since_id TEXT,
+            run_newest_id TEXT,
+            updated_at TEXT
+        )
+    ''')
+
+def _create_db_version(cursor):
+    """Single-row counter bumped by every write that changes tweet data"""
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS db_version (
+            id INTEGER PRIMARY KEY CHECK (id = 0),
+            version INTEGER NOT NULL
+        )
+    ''')
+    cursor.execute("INSERT OR IGNORE INTO db_version (id, version) VALUES (0, 0)")
+
+def _create_rollup_table(cursor, table, key):
+    """Per product and time bucket aggregates; filled by database.rebuild_rollups"""
+    cursor.execute(f'''
+        CREATE TABLE IF NOT EXISTS {table} (
+            product TEXT NOT NULL,
+            {key} INTEGER NOT NULL,
+            tweets INTEGER NOT NULL,
+            sentiment_n INTEGER NOT NULL,
+            sentiment_sum REAL NOT NULL,
+            sentiment_sq REAL NOT NULL,
+            positive INTEGER NOT NULL,
+            negative INTEGER NOT NULL,
+            neutral INTEGER NOT NULL,
+            likes_n INTEGER NOT NULL,
+            likes_sum REAL NOT NULL,
+            retweets_n INTEGER NOT NULL,
+            retweets_sum REAL NOT NULL,
+            PRIMARY KEY (product, {key})
+        ) WITHOUT ROWID
+    ''')
+
+def _create_daily_rollups(cursor):
+    _create_rollup_table(cursor, "daily_rollups", "day")
+
+def _create_intraday_rollups(cursor):
+    _create_rollup_table(cursor, "hourly_rollups", "hour")
+    _create_rollup_table(cursor, "minute_rollups", "minute")
+
+def _create_archived_ids(cursor):
+    """Ids of tweets moved to the Parquet archive; filled by database.archive_tweets"""
+    cursor.execute("CREATE TABLE IF NOT EXISTS archived_ids (id TEXT PRIMARY KEY) WITHOUT ROWID")
+
+# Post-migration hooks fill new tables from existing data. They run after
+# the migration transaction commits, since they read the Parquet archive
+# and write through database's own connections.
+
+def _rebuild_rollups():
+    import database
+    database.rebuild_rollups()
+
+def _backfill_archived_ids():
+    import database
+    database.backfill_archived_ids()
+
+# (version, description, function, post-migration hook or None) - append
+# new migrations, never reorder
+MIGRATIONS = [
+    (1, "create tweets table", _create_tweets_table, None),
+    (2, "add created_ts epoch column and product/time indexes", _add_created_ts, None),
+    (3, "create sentiment_cache table", _create_sentiment_cache, None),
+    (4, "create collection_state table", _create_collection_state, None),
+    (5, "create db_version counter", _create_db_version, None),
+    (6, "create daily_rollups table", _create_daily_rollups, _rebuild_rollups),
+    (7, "create hourly_rollups and minute_rollups tables", _create_intraday_rollups, _rebuild_rollups),
+    (8, "create archived_ids table", _create_archived_ids, _backfill_archived_ids),
+]
+
+LATEST_VERSION = MIGRATIONS[-1][0]
+
+def get_schema_version(conn):
+    """Get the schema version recorded in the database"""
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+def migrate(conn):
+    """Apply pending migrations on `conn` and return the versions applied.
+    
+    The caller is responsible for running this inside a transaction so a
+    failed migration leaves the schema untouched.
+    """
+    current = get_schema_version(conn)
+    cursor = conn.cursor()
+    applied = []
+    
+    for version, description, func, _ in MIGRATIONS:
+        if version <= current:
+            continue
+        
+        print(f"Applying migration {version}: {description}")
+        func(cursor)
+        cursor.execute(f"PRAGMA user_version = {version}")
+        applied.append(version)
+    
+    return applied
+
+def post_migration_hooks(applied):
+    """Hooks of the `applied` versions in migration order, each listed once"""
+    hooks = [hook for version, _, _, hook in MIGRATIONS if version in applied and hook is not None]
+    return list(dict.fromkeys(hooks))
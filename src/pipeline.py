@@ -1,45 +1,116 @@
 import time
+import queue
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 
 # Import our modules
-from tweet_collector import collect_tweets
+from config import FALLBACK_CONFIG, PROCESSING_CONFIG, TWITTER_CONFIG
+from rate_limiter import get_rate_limiter
+from instrumentation import instrumented_run, observe, timed
+from streaming import StreamingPipeline, rebatch
+from tweet_collector import collect_tweet_pages, generate_sample_tweets, get_since_id
+from async_collector import AsyncTweetCollector, async_api_available
 from sentiment_analyzer import analyze_tweets_sentiment
-from database import create_table, insert_tweets
+from database import create_table, insert_tweets_bulk, filter_new_tweets, get_db_version, release_read_connection
+from snapshot import refresh_snapshot
 
-def run_pipeline_for_product(product_name, tweet_count=50):
-    """Run pipeline for a single product"""
+def _clean_batch(tweets):
+    """Clean stage: drop tweets without id/text and ones already stored"""
+    tweets = [tweet for tweet in tweets if tweet.get('id') is not None and tweet.get('text')]
+    tweets, _ = filter_new_tweets(tweets)
+    return tweets
+
+def stream_product(product_name, tweet_count=50, queue_size=None, batch_size=None):
+    """Stream one product through collect -> clean -> score -> enrich -> write.
+    
+    Each stage runs in its own thread connected by bounded queues, so
+    memory stays flat however many tweets are collected. Returns the
+    StreamingPipeline stats plus a few sample tweets.
+    """
+    queue_size = queue_size or PROCESSING_CONFIG["stream_queue_size"]
+    batch_size = batch_size or PROCESSING_CONFIG["score_batch_size"]
+    samples = []
+    create_table()
+    
+    def enrich(tweets):
+        for tweet in tweets:
+            tweet['product'] = product_name
+        if len(samples) < 3:
+            samples.extend(tweets[:3 - len(samples)])
+        return tweets
+    
+    def write(tweets):
+        insert_tweets_bulk(tweets)
+        return tweets
+    
+    stream = StreamingPipeline(
+        rebatch(collect_tweet_pages(product_name, tweet_count), batch_size),
+        [
+            ('clean', _clean_batch),
+            ('score', analyze_tweets_sentiment),
+            ('enrich', enrich),
+            ('write', write),
+        ],
+        queue_size=queue_size,
+        thread_cleanup=release_read_connection
+    )
+    report = stream.run()
+    report['samples'] = samples
+    return report
+
+def _refresh_snapshot(products, since_version):
+    """Update the dashboard snapshot for `products`; a failure never fails the run"""
+    try:
+        with timed("pipeline.snapshot"):
+            refresh_snapshot(products=products, since_version=since_version)
+    except Exception as e:
+        print(f"  Could not refresh dashboard snapshot: {e}")
+
+def run_pipeline_for_product(product_name, tweet_count=50, profile=None):
+    """Run pipeline for a single product.
+    
+    A JSON run report is written to the run report directory; with
+    `profile` it includes a cProfile capture.
+    """
     print(f"\n{'='*50}")
     print(f"Processing: {product_name}")
     print(f"{'='*50}")
     
     try:
-        # Step 1: Collect tweets
-        print("1. Collecting tweets...")
-        tweets = collect_tweets(product_name, tweet_count)
+        with instrumented_run(f"product-{product_name}", profile) as run:
+            version = get_db_version()
+            report = stream_product(product_name, tweet_count)
+            _refresh_snapshot([product_name], version)
+            run['result'] = {key: value for key, value in report.items() if key != 'samples'}
+        stages = report['stages']
+        if 'report_path' in run:
+            print(f"  Run report: {run['report_path']}")
         
-        if not tweets:
-            print(f"  No tweets collected for {product_name}")
+        if report['errors']:
+            print(f"  Error processing {product_name}: {'; '.join(report['errors'])}")
             return False
         
-        print(f"  Collected {len(tweets)} tweets")
-        
-        # Step 2: Analyze sentiment
-        print("2. Analyzing sentiment...")
-        tweets_with_sentiment = analyze_tweets_sentiment(tweets)
-        print("  Sentiment analysis complete")
+        if not stages['source']['rows_out']:
+            print(f"  No tweets collected for {product_name}")
+            return False
         
-        # Step 3: Add product name
-        for tweet in tweets_with_sentiment:
-            tweet['product'] = product_name
+        print(f"  Collected {stages['source']['rows_out']} tweets")
+        skipped = stages['clean']['rows_in'] - stages['clean']['rows_out']
+        if skipped:
+            print(f"  Skipped {skipped} tweets already in the database")
+        print(f"  Saved {stages['write']['rows_in']} tweets in {report['elapsed']:.2f}s")
         
-        # Step 4: Save to database
-        print("3. Saving to database...")
-        insert_tweets(tweets_with_sentiment)
-        print("  Data saved successfully")
+        print("\n  Stage throughput:")
+        for name, stats in stages.items():
+            print(f"   - {name}: {stats['rows_in'] or stats['rows_out']} rows, "
+                  f"{stats['busy_seconds']:.2f}s busy, max queue {stats['max_queue_depth']}")
+        print(f"   Slowest stage: {report['bottleneck']}")
         
         # Show sample results
         print("\n  Sample Results:")
-        for i, tweet in enumerate(tweets_with_sentiment[:3]):
+        for i, tweet in enumerate(report['samples']):
             sentiment = tweet['sentiment']
             sentiment_label = tweet['sentiment_label']
             print(f"{i+1}. Sentiment: {sentiment:.3f} ({sentiment_label})")
@@ -51,43 +122,260 @@ def run_pipeline_for_product(product_name, tweet_count=50):
         print(f"  Error processing {product_name}: {e}")
         return False
 
-def run_full_pipeline(products=None, tweets_per_product=50, delay_seconds=10):
-    """Run pipeline for multiple products"""
+class StageTimer:
+    """Accumulate busy time per pipeline stage from several threads"""
     
-    # Default products if none provided
-    if products is None:
-        products = [
-            "iPhone 15",
-            "Galaxy S24", 
-            "Pixel 8",
-            "OnePlus 12",
-            "Nothing Phone"
-        ]
+    def __init__(self):
+        self.totals = {}
+        self._lock = threading.Lock()
     
-    print(f"  Starting pipeline for {len(products)} products")
-    print(f"  Configuration:")
-    print(f"   - Tweets per product: {tweets_per_product}")
-    print(f"   - Delay between products: {delay_seconds} seconds")
+    def add(self, stage, seconds):
+        with self._lock:
+            self.totals[stage] = self.totals.get(stage, 0.0) + seconds
+        observe(f"pipeline.{stage}", seconds)
+
+def _put_page(pages, item, stop):
+    """Queue a page for scoring, giving up once the orchestrator has stopped"""
+    while not stop.is_set():
+        try:
+            pages.put(item, timeout=0.1)
+            return True
+        except queue.Full:
+            continue
+    return False
+
+def _collect_product(product, tweet_count, pages, timer, failed, stop):
+    """Collection task run on the I/O thread pool.
     
-    # Initialize database
-    create_table()
+    Pages are queued for scoring as they arrive, followed by a
+    (product, None) marker when the product is finished. Products whose
+    collection raised are added to `failed`. Collection ends early once
+    `stop` is set.
+    """
+    start = time.perf_counter()
+    try:
+        for page in collect_tweet_pages(product, tweet_count):
+            timer.add('collect', time.perf_counter() - start)
+            if not _put_page(pages, (product, page), stop):
+                return
+            start = time.perf_counter()
+        timer.add('collect', time.perf_counter() - start)
+    except Exception as e:
+        print(f"  Error collecting {product}: {e}")
+        failed.add(product)
+    finally:
+        _put_page(pages, (product, None), stop)
+        release_read_connection()
+
+def _collect_products_async(products, tweet_count, pages, timer, failed, stop):
+    """Collect every product on one event loop with the async API collector.
     
-    # Process each product
-    successful = 0
-    failed = 0
+    Queues pages and end markers exactly like _collect_product.
+    """
+    async def put(item):
+        return await asyncio.to_thread(_put_page, pages, item, stop)
+    
+    async def stream(collector, product):
+        since_id = await asyncio.to_thread(get_since_id, product)
+        collected = 0
+        try:
+            async for page in collector.iter_pages(product, tweet_count, since_id):
+                collected += len(page)
+                if not await put((product, page)):
+                    return
+            if not collected and not since_id:
+                print(f"Using sample data instead of API for {product}")
+                await put((product, generate_sample_tweets(product, tweet_count)))
+        except Exception as e:
+            print(f"  Error collecting {product}: {e}")
+            failed.add(product)
+        finally:
+            await put((product, None))
+    
+    async def run():
+        async with AsyncTweetCollector() as collector:
+            await asyncio.gather(*(stream(collector, product) for product in products))
+    
+    start = time.perf_counter()
+    try:
+        asyncio.run(run())
+    finally:
+        timer.add('collect', time.perf_counter() - start)
+        release_read_connection()
+
+def _write_batches(batches, timer, results, failed):
+    """Single DB writer: drain queued product batches into shared transactions.
     
-    for i, product in enumerate(products):
-        success = run_pipeline_for_product(product, tweets_per_product)
+    Products whose batch could not be written are added to `failed`.
+    """
+    while True:
+        item = batches.get()
+        if item is None:
+            return
+        
+        # Group whatever else is already waiting into the same transaction
+        pending = [item]
+        done = False
+        while True:
+            try:
+                item = batches.get_nowait()
+            except queue.Empty:
+                break
+            if item is None:
+                done = True
+                break
+            pending.append(item)
         
-        if success:
-            successful += 1
+        start = time.perf_counter()
+        try:
+            insert_tweets_bulk([tweet for _, tweets in pending for tweet in tweets])
+            for product, _ in pending:
+                results[product] = 'written'
+        except Exception as e:
+            print(f"  Error writing {', '.join(product for product, _ in pending)}: {e}")
+            for product, _ in pending:
+                results[product] = 'failed'
+                failed.add(product)
+        timer.add('write', time.perf_counter() - start)
+        
+        if done:
+            return
+
+def _score_pending(pending, batches, timer, queued, failed):
+    """Score the gathered pages in one batch and queue them per product for the writer"""
+    tweets = [tweet for _, page in pending for tweet in page]
+    products = list(dict.fromkeys(product for product, _ in pending))
+    
+    score_start = time.perf_counter()
+    try:
+        analyze_tweets_sentiment(tweets)
+    except Exception as e:
+        print(f"  Error scoring {', '.join(products)}: {e}")
+        failed.update(products)
+        return
+    finally:
+        timer.add('score', time.perf_counter() - score_start)
+        pending.clear()
+    
+    for product in products:
+        queued[product] += 1
+        batches.put((product, [tweet for tweet in tweets if tweet['product'] == product]))
+
+def run_concurrent_pipeline(products, tweets_per_product=50, max_workers=None, score_batch_size=None):
+    """Collect products concurrently, score pages in large batches and write through one writer.
+    
+    Collection runs on a thread pool that streams API pages as soon as
+    each is fetched (or on one asyncio loop when TWITTER_CONFIG["collector"]
+    is "async"), scoring runs on the calling thread, and a single writer
+    thread batches inserts. Pages from every product are gathered until
+    `score_batch_size` tweets (default PROCESSING_CONFIG["score_batch_size"])
+    are waiting, so large runs reach the sentiment process pool even
+    though API pages hold at most 100 tweets. API requests share the
+    rate_limiter token bucket; fallback data is not throttled.
+    
+    Tweets that are already stored are dropped before scoring and counted
+    in the report's 'skipped' entry.
+    
+    Returns a report dict with per-product status ('written', 'unchanged'
+    or 'failed'), skipped counts, per-stage seconds and the rate
+    limiter's metrics.
+    """
+    max_workers = max_workers or PROCESSING_CONFIG["collection_workers"]
+    score_batch_size = score_batch_size or PROCESSING_CONFIG["score_batch_size"]
+    limiter = get_rate_limiter()
+    wait_before = limiter.total_wait
+    
+    timer = StageTimer()
+    results = {product: 'failed' for product in products}
+    skipped = {product: 0 for product in products}
+    queued = {product: 0 for product in products}
+    failed = set()
+    pending = []
+    stop = threading.Event()
+    pages = queue.Queue(maxsize=PROCESSING_CONFIG["writer_queue_size"])
+    batches = queue.Queue(maxsize=PROCESSING_CONFIG["writer_queue_size"])
+    writer = threading.Thread(target=_write_batches, args=(batches, timer, results, failed), name="db-writer")
+    
+    start = time.perf_counter()
+    create_table()
+    writer.start()
+    
+    collectors = ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(products))),
+                                    thread_name_prefix="collector")
+    try:
+        if TWITTER_CONFIG["collector"] == "async" and async_api_available():
+            collectors.submit(_collect_products_async, products, tweets_per_product, pages, timer, failed, stop)
         else:
-            failed += 1
+            for product in products:
+                collectors.submit(_collect_product, product, tweets_per_product, pages, timer, failed, stop)
+        
+        active = len(products)
+        waiting = 0
+        while active:
+            product, tweets = pages.get()
+            if tweets is None:
+                active -= 1
+                continue
+            
+            tweets, already_stored = filter_new_tweets(tweets)
+            skipped[product] += already_stored
+            for tweet in tweets:
+                tweet['product'] = product
+            if tweets:
+                pending.append((product, tweets))
+                waiting += len(tweets)
+            
+            if waiting >= score_batch_size:
+                _score_pending(pending, batches, timer, queued, failed)
+                waiting = 0
         
-        # Add delay between products (except for the last one)
-        if i < len(products) - 1:
-            print(f"\n  Waiting {delay_seconds} seconds before next product...")
-            time.sleep(delay_seconds)
+        if pending:
+            _score_pending(pending, batches, timer, queued, failed)
+    finally:
+        # Collectors blocked on a full page queue give up once stop is set
+        stop.set()
+        collectors.shutdown(wait=True)
+        batches.put(None)
+        writer.join()
+    
+    for product in products:
+        if product in failed:
+            # Pages written before a collect, score or write error do not
+            # make the product a success
+            results[product] = 'failed'
+        elif not queued[product]:
+            # Collected fine, but there was nothing new to write
+            results[product] = 'unchanged'
+    
+    stages = dict(timer.totals)
+    stages['rate_limit_wait'] = limiter.total_wait - wait_before
+    stages['wall'] = time.perf_counter() - start
+    return {'products': results, 'skipped': skipped, 'stages': stages, 'rate_limit': limiter.metrics()}
+
+def run_full_pipeline(products=None, tweets_per_product=50, max_workers=None, profile=None):
+    """Run pipeline for multiple products concurrently.
+    
+    Writes a JSON run report (stage timings, per-module metrics and, with
+    `profile`, a cProfile capture) to the run report directory.
+    """
+    
+    # Default products if none provided
+    if products is None:
+        products = FALLBACK_CONFIG["products"]
+    
+    print(f"  Starting pipeline for {len(products)} products")
+    print(f"  Configuration:")
+    print(f"   - Tweets per product: {tweets_per_product}")
+    print(f"   - Concurrent collectors: {max_workers or PROCESSING_CONFIG['collection_workers']}")
+    
+    with instrumented_run("full-pipeline", profile) as run:
+        version = get_db_version()
+        report = run_concurrent_pipeline(products, tweets_per_product, max_workers)
+        changed = [product for product, status in report['products'].items() if status != 'unchanged']
+        _refresh_snapshot(changed, version)
+        run['result'] = report
+    successful = sum(1 for status in report['products'].values() if status != 'failed')
+    failed = len(products) - successful
     
     # Final summary
     print(f"\n  Pipeline Complete!")
@@ -95,7 +383,15 @@ def run_full_pipeline(products=None, tweets_per_product=50, delay_seconds=10):
     print(f"  Successful: {successful}")
     print(f"  Failed: {failed}")
     print(f"  Total products processed: {len(products)}")
+    print(f"  Already stored tweets skipped: {sum(report['skipped'].values())}")
+    print("  Stage times (seconds):")
+    for stage, seconds in report['stages'].items():
+        print(f"   - {stage}: {seconds:.2f}")
+    if 'report_path' in run:
+        print(f"  Run report: {run['report_path']}")
     print(f" ️  Pipeline finished at: {datetime.now().strftime('%H:%M:%S')}")
+    
+    return report
 
 def quick_test():
     """Quick test with sample data"""
@@ -113,13 +409,18 @@ def quick_test():
 if __name__ == "__main__":
     import sys
     
+    # --profile captures a cProfile of the run into its JSON report
+    profile = True if "--profile" in sys.argv else None
+    if profile:
+        sys.argv.remove("--profile")
+    
     if len(sys.argv) > 1 and sys.argv[1] == "test":
         # Run quick test
         quick_test()
     elif len(sys.argv) > 1 and sys.argv[1] == "single":
         # Run for single product
         product = sys.argv[2] if len(sys.argv) > 2 else "iPhone 15"
-        run_pipeline_for_product(product)
+        run_pipeline_for_product(product, profile=profile)
     else:
         # Run full pipeline
-        run_full_pipeline()
\ No newline at end of file
+        run_full_pipeline(profile=profile)
\ No newline at end of file
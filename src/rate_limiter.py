@@ -0,0 +1,176 @@
+"""Token-bucket rate limiting for Twitter API requests.
+
+The API grants a fixed number of requests per 15-minute window. A
+TokenBucket refills continuously at that rate, so callers never burn the
+whole window up front. The bucket also follows the x-rate-limit-*
+headers the API sends, holding every caller until the reset time once
+the server says the quota is spent. One bucket per endpoint is shared by
+every collector in the process.
+"""
+import time
+import threading
+
+from config import TWITTER_CONFIG
+
+class TokenBucket:
+    """Thread-safe token bucket with an injectable clock for testing"""
+    
+    def __init__(self, capacity, window_seconds, clock=time.monotonic, wall_clock=time.time, sleep=time.sleep):
+        self.capacity = float(capacity)
+        self.window_seconds = float(window_seconds)
+        self.rate = self.capacity / self.window_seconds
+        self._clock = clock
+        self._wall_clock = wall_clock
+        self._sleep = sleep
+        self._lock = threading.Lock()
+        self._tokens = self.capacity
+        self._updated = clock()
+        self._blocked_until = None
+        # True when the block ends with the server's quota reset
+        self._refill_on_unblock = False
+        self.acquired = 0
+        self.total_wait = 0.0
+    
+    def _refill(self, now):
+        """Add tokens for the time elapsed since the last update; caller holds the lock"""
+        if self._blocked_until is not None:
+            if now < self._blocked_until:
+                self._updated = now
+                return
+            # Only an x-rate-limit-reset restores the full quota; after a
+            # block_for back-off, tokens accrue at the normal rate
+            self._tokens = self.capacity if self._refill_on_unblock else 0.0
+            self._updated = self._blocked_until
+            self._blocked_until = None
+        
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+    
+    def _wait_for(self, tokens, now):
+        """Seconds until `tokens` are available; caller holds the lock"""
+        if self._blocked_until is not None and now < self._blocked_until:
+            return self._blocked_until - now
+        if self._tokens >= tokens:
+            return 0.0
+        return (tokens - self._tokens) / self.rate
+    
+    def try_acquire(self, tokens=1):
+        """Take tokens without waiting; returns False if they are not available"""
+        with self._lock:
+            now = self._clock()
+            self._refill(now)
+            if self._wait_for(tokens, now) > 0:
+                return False
+            self._tokens -= tokens
+            self.acquired += tokens
+            return True
+    
+    def acquire(self, tokens=1):
+        """Wait until tokens are available, take them and return the seconds waited"""
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = self._clock()
+                self._refill(now)
+                delay = self._wait_for(tokens, now)
+                if delay <= 0:
+                    self._tokens -= tokens
+                    self.acquired += tokens
+                    self.total_wait += waited
+                    return waited
+            
+            self._sleep(delay)
+            waited += delay
+    
+    def record_wait(self, seconds):
+        """Count time a caller spent waiting outside `acquire` (e.g. in async code)"""
+        with self._lock:
+            self.total_wait += seconds
+    
+    def update_from_headers(self, headers):
+        """Sync with x-rate-limit-limit/-remaining/-reset response headers"""
+        headers = {key.lower(): value for key, value in (headers or {}).items()}
+        
+        try:
+            limit = headers.get('x-rate-limit-limit')
+            remaining = headers.get('x-rate-limit-remaining')
+            reset = headers.get('x-rate-limit-reset')
+            
+            with self._lock:
+                now = self._clock()
+                self._refill(now)
+                
+                if limit is not None and float(limit) > 0:
+                    self.capacity = float(limit)
+                    self.rate = self.capacity / self.window_seconds
+                if remaining is not None:
+                    self._tokens = min(self._tokens, float(remaining))
+                if reset is not None and remaining is not None and float(remaining) <= 0:
+                    # Reset is a wall-clock epoch; convert it to our clock
+                    self._blocked_until = now + max(0.0, float(reset) - self._wall_clock())
+                    self._refill_on_unblock = True
+                    self._tokens = 0.0
+        except (TypeError, ValueError) as e:
+            print(f"Ignoring malformed rate limit headers: {e}")
+    
+    def block_for(self, seconds):
+        """Hold all callers for `seconds` (e.g. after a 429 with no reset header).
+        
+        The bucket restarts empty afterwards and refills at the normal rate,
+        so the back-off is not followed by a full-capacity burst.
+        """
+        with self._lock:
+            now = self._clock()
+            self._refill(now)
+            until = now + seconds
+            if self._blocked_until is None or until > self._blocked_until:
+                self._blocked_until = until
+                self._refill_on_unblock = False
+            self._tokens = 0.0
+    
+    @property
+    def tokens(self):
+        """Current token level"""
+        with self._lock:
+            now = self._clock()
+            self._refill(now)
+            return self._tokens
+    
+    def wait_time(self, tokens=1):
+        """Seconds a caller asking for `tokens` would wait right now"""
+        with self._lock:
+            now = self._clock()
+            self._refill(now)
+            return self._wait_for(tokens, now)
+    
+    def metrics(self):
+        """Return the current level, wait time and usage counters"""
+        with self._lock:
+            now = self._clock()
+            self._refill(now)
+            return {
+                'tokens': self._tokens,
+                'capacity': self.capacity,
+                'wait_time': self._wait_for(1, now),
+                'blocked': self._blocked_until is not None,
+                'acquired': self.acquired,
+                'total_wait': self.total_wait
+            }
+
+_limiters = {}
+_limiters_lock = threading.Lock()
+
+def get_rate_limiter(endpoint="search_recent"):
+    """Get the process-wide bucket for an API endpoint"""
+    with _limiters_lock:
+        if endpoint not in _limiters:
+            _limiters[endpoint] = TokenBucket(
+                TWITTER_CONFIG["rate_limit_requests"],
+                TWITTER_CONFIG["rate_limit_window_seconds"]
+            )
+        return _limiters[endpoint]
+
+def reset_rate_limiters():
+    """Forget all shared buckets"""
+    with _limiters_lock:
+        _limiters.clear()
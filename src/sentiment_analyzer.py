@@ -1,5 +1,22 @@
 import re
-from textblob import TextBlob
+import atexit
+import multiprocessing
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+
+from config import SENTIMENT_CONFIG
+from instrumentation import SIZE_BUCKETS, timed, count, observe
+from sentiment_backends import get_backend
+from sentiment_cache import SentimentCache
+
+# Bump when cleaning or scoring changes so cached scores are not reused
+SCORER_VERSION = 1
+
+# Precompiled cleaning patterns
+URL_PATTERN = re.compile(r'http\S+')
+MENTION_HASHTAG_PATTERN = re.compile(r'@\w+|#\w+')
+# Runs of whitespace that do not cross the line separator used by clean_texts
+SPACE_PATTERN = re.compile(r'[^\S\n]+')
 
 def clean_text(text):
     """Clean text for sentiment analysis"""
@@ -7,30 +24,42 @@ def clean_text(text):
         return ""
     
     # Remove URLs
-    text = re.sub(r'http\S+', '', text)
+    text = URL_PATTERN.sub('', text)
     
     # Remove mentions and hashtags
-    text = re.sub(r'@\w+|#\w+', '', text)
+    text = MENTION_HASHTAG_PATTERN.sub('', text)
     
     # Remove extra spaces
     text = ' '.join(text.split())
     
     return text.strip()
 
+def clean_texts(texts):
+    """Clean a batch of texts, giving the same result as clean_text on each.
+    
+    The batch is joined into one newline-separated string so every pattern
+    runs once over the whole batch instead of once per text.
+    """
+    joined = '\n'.join(
+        text.replace('\n', ' ') if isinstance(text, str) else ''
+        for text in texts
+    )
+    joined = URL_PATTERN.sub('', joined)
+    joined = MENTION_HASHTAG_PATTERN.sub('', joined)
+    joined = SPACE_PATTERN.sub(' ', joined)
+    
+    return [line.strip() for line in joined.split('\n')]
+
+def _score_text(cleaned_text, method=None):
+    """Score one already-cleaned text with the configured backend"""
+    return float(get_backend(method).score_batch([cleaned_text])[0])
+
 def analyze_sentiment(text):
-    """Analyze sentiment of text using TextBlob"""
+    """Analyze sentiment of text using the backend in SENTIMENT_CONFIG["method"]"""
     try:
         # Clean the text
         cleaned_text = clean_text(text)
-        
-        if not cleaned_text:
-            return 0.0
-        
-        # Get sentiment polarity (-1 to 1)
-        blob = TextBlob(cleaned_text)
-        polarity = blob.sentiment.polarity
-        
-        return polarity
+        return float(_score_cached([cleaned_text], workers=1)[0])
     
     except Exception as e:
         print(f"Error analyzing sentiment: {e}")
@@ -38,43 +67,177 @@ def analyze_sentiment(text):
 
 def get_sentiment_label(score):
     """Convert sentiment score to label"""
-    if score > 0.1:
+    if score > SENTIMENT_CONFIG["positive_threshold"]:
         return "Positive"
-    elif score < -0.1:
+    elif score < SENTIMENT_CONFIG["negative_threshold"]:
         return "Negative"
     else:
         return "Neutral"
 
-def analyze_tweets_sentiment(tweets):
+def label_scores(scores):
+    """Convert an array of scores to labels by vectorized thresholding"""
+    scores = np.asarray(scores, dtype=float)
+    return np.select(
+        [scores > SENTIMENT_CONFIG["positive_threshold"], scores < SENTIMENT_CONFIG["negative_threshold"]],
+        ["Positive", "Negative"],
+        default="Neutral"
+    )
+
+_process_pool = None
+_process_pool_workers = None
+
+def _init_worker(method):
+    """Build the backend and load its lexicon once when a pool worker starts"""
+    _score_text("warm up", method)
+
+def _score_chunk(texts, method):
+    """Score a shard of cleaned texts inside a pool worker"""
+    return get_backend(method).score_batch(texts)
+
+def get_process_pool(workers, method=None):
+    """Get the shared scoring pool, recreating it if the workers or method changed.
+    
+    The pool is usually first needed on a pipeline thread while collector
+    and writer threads are running, so workers are spawned rather than
+    forked: a fork would copy locks held by those threads.
+    """
+    global _process_pool, _process_pool_workers
+    
+    method = method or SENTIMENT_CONFIG["method"]
+    if _process_pool is None or _process_pool_workers != (workers, method):
+        shutdown_process_pool()
+        _process_pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn'),
+                                            initializer=_init_worker, initargs=(method,))
+        _process_pool_workers = (workers, method)
+    
+    return _process_pool
+
+def shutdown_process_pool():
+    """Stop the scoring pool's worker processes"""
+    global _process_pool, _process_pool_workers
+    
+    if _process_pool is not None:
+        _process_pool.shutdown()
+        _process_pool = None
+        _process_pool_workers = None
+
+atexit.register(shutdown_process_pool)
+
+@timed("sentiment.score")
+def _score_unique(texts, workers=None):
+    """Score distinct cleaned texts, sharding them across processes when worthwhile.
+    
+    Small batches are scored in-process because starting and feeding the
+    pool would cost more than the scoring itself.
+    """
+    workers = SENTIMENT_CONFIG["workers"] if workers is None else workers
+    method = SENTIMENT_CONFIG["method"]
+    
+    if workers <= 1 or len(texts) < SENTIMENT_CONFIG["parallel_min_batch"]:
+        return get_backend(method).score_batch(texts)
+    
+    chunk_size = SENTIMENT_CONFIG["parallel_chunk_size"]
+    chunks = [texts[i:i + chunk_size] for i in range(0, len(texts), chunk_size)]
+    scores = np.empty(len(texts), dtype=float)
+    
+    # map() yields results in submission order, so shards line up with the input
+    position = 0
+    pool = get_process_pool(workers, method)
+    for chunk_scores in pool.map(_score_chunk, chunks, [method] * len(chunks)):
+        scores[position:position + len(chunk_scores)] = chunk_scores
+        position += len(chunk_scores)
+    
+    return scores
+
+_sentiment_cache = None
+
+def get_cache_namespace():
+    """Name the analyzer whose scores the cache currently holds"""
+    backend = get_backend()
+    return f"{backend.name}:{backend.version}:v{SCORER_VERSION}"
+
+def get_sentiment_cache():
+    """Get the shared sentiment cache, recreating it if its settings changed"""
+    global _sentiment_cache
+    
+    size = SENTIMENT_CONFIG["cache_size"]
+    persistent = SENTIMENT_CONFIG["cache_persistent"]
+    if (_sentiment_cache is None or _sentiment_cache.maxsize != size
+            or _sentiment_cache.persistent != persistent):
+        _sentiment_cache = SentimentCache(maxsize=size, persistent=persistent)
+    
+    return _sentiment_cache
+
+def _score_cached(texts, workers=None):
+    """Score distinct cleaned texts, reusing cached scores where possible"""
+    if not SENTIMENT_CONFIG["cache_enabled"]:
+        return _score_unique(texts, workers)
+    
+    cache = get_sentiment_cache()
+    namespace = get_cache_namespace()
+    scores = cache.get_many(namespace, texts)
+    
+    missing = [text for text in texts if text not in scores]
+    count("sentiment.cache_hits", len(texts) - len(missing))
+    count("sentiment.cache_misses", len(missing))
+    if missing:
+        fresh = dict(zip(missing, _score_unique(missing, workers).tolist()))
+        cache.put_many(namespace, fresh)
+        scores.update(fresh)
+    
+    return np.fromiter((scores[text] for text in texts), dtype=float, count=len(texts))
+
+@timed("sentiment.analyze_batch")
+def analyze_sentiment_batch(texts, workers=None):
+    """Score a batch of texts.
+    
+    Texts are cleaned together, identical cleaned texts are scored only
+    once, and the results come back as NumPy arrays (scores, labels)
+    aligned with the input. Previously seen texts come from the sentiment
+    cache; large batches of new texts are scored across `workers`
+    processes (default: SENTIMENT_CONFIG["workers"]).
+    """
+    cleaned = clean_texts(texts)
+    
+    # Map each cleaned text to the index of its first occurrence
+    unique_index = {}
+    inverse = np.fromiter(
+        (unique_index.setdefault(text, len(unique_index)) for text in cleaned),
+        dtype=np.intp,
+        count=len(cleaned)
+    )
+    
+    count("sentiment.texts", len(cleaned))
+    count("sentiment.unique_texts", len(unique_index))
+    observe("sentiment.batch_size", len(cleaned), SIZE_BUCKETS)
+    unique_scores = _score_cached(list(unique_index), workers)
+    
+    scores = unique_scores[inverse]
+    return scores, label_scores(scores)
+
+def analyze_tweets_sentiment(tweets, workers=None):
     """Add sentiment analysis to list of tweets"""
-    for tweet in tweets:
-        text = tweet.get('text', '')
-        
-        # Calculate sentiment
-        sentiment_score = analyze_sentiment(text)
-        sentiment_label = get_sentiment_label(sentiment_score)
-        
-        # Add to tweet
+    scores, labels = analyze_sentiment_batch([tweet.get('text', '') for tweet in tweets], workers)
+    
+    # Add to tweet
+    for tweet, sentiment_score, sentiment_label in zip(tweets, scores.tolist(), labels.tolist()):
         tweet['sentiment'] = sentiment_score
         tweet['sentiment_label'] = sentiment_label
     
     return tweets
 
-def batch_sentiment_analysis(texts):
+def batch_sentiment_analysis(texts, workers=None):
     """Analyze sentiment for multiple texts"""
-    results = []
+    scores, labels = analyze_sentiment_batch(texts, workers)
     
-    for text in texts:
-        score = analyze_sentiment(text)
-        label = get_sentiment_label(score)
-        
-        results.append({
+    return [
+        {
             'text': text,
             'sentiment_score': score,
             'sentiment_label': label
-        })
-    
-    return results
+        }
+        for text, score, label in zip(texts, scores.tolist(), labels.tolist())
+    ]
 
 # Test the sentiment analyzer
 if __name__ == "__main__":
@@ -0,0 +1,105 @@
+"""Pluggable sentiment scoring backends.
+
+Every backend scores a batch of already-cleaned texts and returns one
+polarity in [-1, 1] per text. Backends register themselves by name, and
+SENTIMENT_CONFIG["method"] picks the one used by sentiment_analyzer.
+The underlying libraries are only imported when a backend is first used.
+"""
+import numpy as np
+
+from config import SENTIMENT_CONFIG
+
+BACKENDS = {}
+
+_instances = {}
+
+def register_backend(name):
+    """Class decorator that makes a backend available under `name`"""
+    def decorator(cls):
+        cls.name = name
+        BACKENDS[name] = cls
+        return cls
+    return decorator
+
+def get_backend(name=None):
+    """Get the backend instance for `name` (default: the configured method)"""
+    name = name or SENTIMENT_CONFIG["method"]
+    
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown sentiment method '{name}'. Options: {', '.join(sorted(BACKENDS))}")
+    
+    if name not in _instances:
+        _instances[name] = BACKENDS[name]()
+    return _instances[name]
+
+class SentimentBackend:
+    """Base class for backends; subclasses implement score()"""
+    
+    name = None
+    version = "1"
+    
+    def score(self, cleaned_text):
+        """Score one cleaned text"""
+        raise NotImplementedError
+    
+    def score_batch(self, cleaned_texts):
+        """Score cleaned texts, returning a float array aligned with the input"""
+        return np.fromiter(
+            (self._safe_score(text) for text in cleaned_texts),
+            dtype=float,
+            count=len(cleaned_texts)
+        )
+    
+    def _safe_score(self, cleaned_text):
+        if not cleaned_text:
+            return 0.0
+        
+        try:
+            return self.score(cleaned_text)
+        except Exception as e:
+            print(f"Error analyzing sentiment: {e}")
+            return 0.0
+
+@register_backend("textblob")
+class TextBlobBackend(SentimentBackend):
+    """Pattern-lexicon polarity from TextBlob"""
+    
+    def __init__(self):
+        from textblob import TextBlob
+        self._textblob = TextBlob
+    
+    def score(self, cleaned_text):
+        return self._textblob(cleaned_text).sentiment.polarity
+
+@register_backend("vader")
+class VaderBackend(SentimentBackend):
+    """VADER compound score, tuned for short social media texts"""
+    
+    def __init__(self):
+        from vaderSentiment.vaderSentiment import SentimentIntensityAnalyzer
+        self._analyzer = SentimentIntensityAnalyzer()
+        self.version = "3"
+    
+    def score(self, cleaned_text):
+        return self._analyzer.polarity_scores(cleaned_text)['compound']
+
+@register_backend("ensemble")
+class EnsembleBackend(SentimentBackend):
+    """Weighted average of other backends, using SENTIMENT_CONFIG["ensemble_weights"]"""
+    
+    def __init__(self):
+        weights = SENTIMENT_CONFIG["ensemble_weights"]
+        self.members = [get_backend(name) for name in weights]
+        self.weights = np.array(list(weights.values()), dtype=float)
+        self.weights /= self.weights.sum()
+        self.version = "+".join(
+            f"{member.name}{member.version}@{weight:g}" for member, weight in zip(self.members, self.weights)
+        )
+    
+    def score(self, cleaned_text):
+        return float(self.score_batch([cleaned_text])[0])
+    
+    def score_batch(self, cleaned_texts):
+        # One (members x texts) matrix, combined with a single weighted sum
+        scores = np.vstack([member.score_batch(cleaned_texts) for member in self.members])
+        return self.weights @ scores
@@ -0,0 +1,151 @@
+"""Content-hash cache for sentiment scores.
+
+Scores are keyed by a hash of the cleaned text within a namespace naming
+the analyzer method and version, so a retweet or templated text is only
+scored once. Entries live in a bounded in-memory LRU and, optionally, in
+the `sentiment_cache` table of the tweets database so they survive
+restarts. Switching to a different namespace drops entries scored by the
+previous analyzer.
+"""
+import hashlib
+import threading
+from collections import OrderedDict
+
+import database
+
+# Stay well under SQLite's host parameter limit for IN (...) lookups
+LOOKUP_CHUNK_SIZE = 500
+
+def text_key(namespace, cleaned_text):
+    """Hash a cleaned text together with the analyzer namespace"""
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(namespace.encode('utf-8'))
+    digest.update(b'\0')
+    digest.update(cleaned_text.encode('utf-8'))
+    return digest.hexdigest()
+
+class SentimentCache:
+    """Bounded LRU of sentiment scores with an optional SQLite tier"""
+    
+    def __init__(self, maxsize=100000, persistent=False):
+        self.maxsize = maxsize
+        self.persistent = persistent
+        self.namespace = None
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._reset_stats()
+    
+    def _reset_stats(self):
+        self.hits = 0
+        self.persistent_hits = 0
+        self.misses = 0
+        self.evictions = 0
+    
+    def _check_namespace(self, namespace):
+        if namespace != self.namespace:
+            self.invalidate(namespace)
+    
+    def invalidate(self, namespace=None):
+        """Drop every entry that was not scored under `namespace`"""
+        with self._lock:
+            self._entries.clear()
+            self.namespace = namespace
+        
+        if self.persistent:
+            with database.write_connection() as conn:
+                conn.execute("DELETE FROM sentiment_cache WHERE namespace IS NOT ?", [namespace])
+    
+    def _remember(self, key, score):
+        """Store one entry in the LRU; the caller holds the lock"""
+        self._entries[key] = score
+        self._entries.move_to_end(key)
+        if len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+    
+    def _load_persistent(self, keys):
+        """Fetch stored scores for `keys` from the database"""
+        found = {}
+        with database.read_connection() as conn:
+            for i in range(0, len(keys), LOOKUP_CHUNK_SIZE):
+                chunk = keys[i:i + LOOKUP_CHUNK_SIZE]
+                placeholders = ', '.join('?' * len(chunk))
+                cursor = conn.execute(
+                    f"SELECT key, score FROM sentiment_cache WHERE key IN ({placeholders})", chunk
+                )
+                found.update(cursor.fetchall())
+        return found
+    
+    def get_many(self, namespace, texts):
+        """Look up cleaned texts and return {text: score} for the ones cached"""
+        self._check_namespace(namespace)
+        keys = {text: text_key(namespace, text) for text in texts}
+        found = {}
+        
+        with self._lock:
+            for text, key in keys.items():
+                score = self._entries.get(key)
+                if score is not None:
+                    self._entries.move_to_end(key)
+                    found[text] = score
+            self.hits += len(found)
+        
+        missing = [text for text in keys if text not in found]
+        if missing and self.persistent:
+            stored = self._load_persistent([keys[text] for text in missing])
+            with self._lock:
+                for text in missing:
+                    score = stored.get(keys[text])
+                    if score is not None:
+                        found[text] = score
+                        self._remember(keys[text], score)
+                        self.persistent_hits += 1
+        
+        with self._lock:
+            self.misses += len(keys) - len(found)
+        return found
+    
+    def put_many(self, namespace, scores):
+        """Store {cleaned_text: score} entries"""
+        self._check_namespace(namespace)
+        rows = [(text_key(namespace, text), namespace, float(score)) for text, score in scores.items()]
+        
+        with self._lock:
+            for key, _, score in rows:
+                self._remember(key, score)
+        
+        if self.persistent and rows:
+            with database.write_connection() as conn:
+                conn.executemany(
+                    "INSERT OR REPLACE INTO sentiment_cache (key, namespace, score) VALUES (?, ?, ?)",
+                    rows
+                )
+    
+    def get(self, namespace, text):
+        """Look up one cleaned text, returning None on a miss"""
+        return self.get_many(namespace, [text]).get(text)
+    
+    def put(self, namespace, text, score):
+        """Store the score for one cleaned text"""
+        self.put_many(namespace, {text: score})
+    
+    def clear(self):
+        """Empty the in-memory tier and reset the counters"""
+        with self._lock:
+            self._entries.clear()
+            self._reset_stats()
+    
+    def stats(self):
+        """Return hit/miss counters and the current size"""
+        with self._lock:
+            lookups = self.hits + self.persistent_hits + self.misses
+            return {
+                'namespace': self.namespace,
+                'size': len(self._entries),
+                'maxsize': self.maxsize,
+                'hits': self.hits,
+                'persistent_hits': self.persistent_hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': (self.hits + self.persistent_hits) / lookups if lookups else 0.0
+            }
@@ -0,0 +1,242 @@
+"""Memory-mapped Arrow snapshot of the tweets for the dashboard.
+
+After each pipeline write, `refresh_snapshot` dumps every tweet (hot
+table and archive) into one uncompressed Arrow IPC file next to the
+database. When the previous snapshot was current before the run, only
+the products the run wrote are re-read; the rest are copied over. Rows
+are sorted by (product, created_ts) and the file records where each
+product's rows start and stop, plus the db_version it was built from.
+The new file is written beside the old one and swapped in with
+os.replace, so readers never see a half-written snapshot and sessions
+still mapping the old file keep working.
+
+`open_snapshot` memory-maps the file, so the table's buffers are backed
+by the OS page cache instead of process memory. Every dashboard session
+(and every process) shares the same pages. A product/date filter is two
+binary searches and a zero-copy slice. The snapshot only serves tweet
+rows (get_recent_tweets, get_tweets_frame), in the same shapes as the
+database functions; aggregates come from the rollup tables.
+"""
+import os
+import json
+
+import numpy as np
+import pandas as pd
+
+import archive
+import database
+from config import PYARROW_AVAILABLE, SNAPSHOT_CONFIG
+from utils import prepare_tweets
+
+# Column name and Arrow type alias
+SNAPSHOT_SCHEMA = [
+    ('id', 'string'),
+    ('created_at', 'string'),
+    ('created_ts', 'int64'),
+    ('text', 'string'),
+    ('user_id', 'string'),
+    ('likes', 'int64'),
+    ('retweets', 'int64'),
+    ('sentiment', 'float64'),
+    ('product', 'string'),
+]
+SNAPSHOT_COLUMNS = [name for name, _ in SNAPSHOT_SCHEMA]
+SECONDS_PER_DAY = 86400
+
+def snapshot_path():
+    """Snapshot file for the current database (tweets.db -> tweets.arrow)"""
+    return os.path.splitext(database.DATABASE_PATH)[0] + ".arrow"
+
+def snapshot_mtime(path=None):
+    """Modification time of the snapshot file, or None if there is none"""
+    try:
+        return os.path.getmtime(path or snapshot_path())
+    except OSError:
+        return None
+
+def _read_version(path):
+    """db_version recorded in a snapshot file, or None"""
+    import pyarrow as pa
+
+    try:
+        with pa.memory_map(path) as source:
+            metadata = pa.ipc.open_file(source).schema.metadata or {}
+    except (OSError, pa.ArrowInvalid):
+        return None
+    version = metadata.get(b'db_version')
+    return int(version) if version is not None else None
+
+def _read_tweets(products=None):
+    """Hot and archived tweets with a timestamp, for all products or only `products`"""
+    import pyarrow as pa
+
+    where = "product IS NOT NULL AND created_ts IS NOT NULL"
+    params = []
+    if products is not None:
+        where += f" AND product IN ({', '.join('?' * len(products))})"
+        params = list(products)
+
+    with database.read_connection() as conn:
+        hot = pd.read_sql_query(f"SELECT {', '.join(SNAPSHOT_COLUMNS)} FROM tweets WHERE {where}", conn, params=params)
+    if products is None:
+        cold = [archive.scan(database.ARCHIVE_DIR, SNAPSHOT_COLUMNS)]
+    else:
+        cold = [archive.scan(database.ARCHIVE_DIR, SNAPSHOT_COLUMNS, product=product) for product in products]
+
+    frames = [frame for frame in [hot] + cold if len(frame)]
+    frame = pd.concat(frames, ignore_index=True) if frames else hot
+    frame = frame[frame['created_ts'].notna()]
+    schema = pa.schema([(name, pa.type_for_alias(alias)) for name, alias in SNAPSHOT_SCHEMA])
+    return pa.Table.from_pandas(frame, schema=schema, preserve_index=False)
+
+def build_snapshot(path=None, products=None, base=None):
+    """Write a snapshot of all tweets and return the db_version it holds.
+
+    Tweets without a created_ts cannot be placed on the time axis and are
+    left out. With `base` (an open Snapshot) only `products` are read from
+    the database and archive; every other product's rows are copied from
+    `base`.
+    """
+    import pyarrow as pa
+    import pyarrow.compute as pc
+
+    path = path or snapshot_path()
+    # Read the version first: rows written during the build only make the
+    # snapshot look older than it is, never newer
+    version = database.get_db_version()
+
+    if base is None:
+        table = _read_tweets()
+    else:
+        fresh = _read_tweets(products)
+        # Drop the changed products, and tweets an overwrite moved into them
+        kept = pc.invert(pc.or_(
+            pc.is_in(base.table.column('product'), value_set=pa.array(products, pa.string())),
+            pc.is_in(base.table.column('id'), value_set=fresh.column('id').combine_chunks())
+        ))
+        table = pa.concat_tables([base.table.replace_schema_metadata(None).filter(kept), fresh])
+    table = table.sort_by([('product', 'ascending'), ('created_ts', 'ascending')]).combine_chunks()
+
+    offsets = {}
+    if table.num_rows:
+        products = table.column('product').to_numpy()
+        starts = np.flatnonzero(np.r_[True, products[1:] != products[:-1]])
+        stops = np.r_[starts[1:], len(products)]
+        offsets = {products[start]: [int(start), int(stop)] for start, stop in zip(starts, stops)}
+
+    table = table.replace_schema_metadata({'db_version': str(version), 'offsets': json.dumps(offsets)})
+    tmp_path = f"{path}.tmp"
+    with pa.OSFile(tmp_path, 'wb') as sink:
+        with pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+    os.replace(tmp_path, path)
+    return version
+
+def refresh_snapshot(path=None, products=None, since_version=None):
+    """Rebuild the snapshot if it is older than the database.
+
+    A caller that knows what it wrote passes the `products` it changed and
+    the db_version from before its writes. If the snapshot was current at
+    `since_version`, only those products are re-read; otherwise the whole
+    snapshot is rebuilt.
+
+    Returns the snapshot's db_version, or None when snapshots are disabled
+    or pyarrow is missing.
+    """
+    if not (PYARROW_AVAILABLE and SNAPSHOT_CONFIG["enabled"]):
+        return None
+
+    path = path or snapshot_path()
+    current = _read_version(path) if os.path.exists(path) else None
+    if current is not None and current == database.get_db_version():
+        return current
+
+    base = None
+    if products is not None and current is not None and current == since_version:
+        base = open_snapshot(current, path)
+    if base is None:
+        return build_snapshot(path)
+    return build_snapshot(path, list(products), base)
+
+def open_snapshot(expected_version=None, path=None):
+    """Memory-map the snapshot; None if missing, disabled or not at `expected_version`"""
+    if not (PYARROW_AVAILABLE and SNAPSHOT_CONFIG["enabled"]):
+        return None
+
+    path = path or snapshot_path()
+    if not os.path.exists(path):
+        return None
+
+    import pyarrow as pa
+
+    try:
+        source = pa.memory_map(path)
+        table = pa.ipc.open_file(source).read_all()
+    except (OSError, pa.ArrowInvalid) as e:
+        print(f"Could not open snapshot {path}: {e}")
+        return None
+
+    snapshot = Snapshot(table)
+    if expected_version is not None and snapshot.version != expected_version:
+        return None
+    return snapshot
+
+class Snapshot:
+    """Read-only view over a mapped snapshot table"""
+
+    def __init__(self, table):
+        metadata = table.schema.metadata or {}
+        self.table = table
+        self.version = int(metadata.get(b'db_version', b'-1'))
+        self.offsets = json.loads(metadata.get(b'offsets', b'{}'))
+        created_ts = table.column('created_ts')
+        # Zero-copy view when the column is a single chunk without nulls;
+        # snapshots never hold null timestamps, but older files might
+        if created_ts.num_chunks == 1 and not created_ts.null_count:
+            self._created_ts = created_ts.chunk(0).to_numpy()
+        else:
+            self._created_ts = created_ts.fill_null(0).to_numpy()
+
+    def _rows(self, product=None, start_date=None, end_date=None):
+        """Rows for a product and inclusive date range, as a table slice"""
+        if product is None:
+            start, stop = 0, self.table.num_rows
+        elif product in self.offsets:
+            start, stop = self.offsets[product]
+        else:
+            return self.table.slice(0, 0)
+
+        if product is None and (start_date is not None or end_date is not None):
+            # Only sorted within a product, so fall back to a mask
+            mask = np.ones(self.table.num_rows, dtype=bool)
+            if start_date is not None:
+                mask &= self._created_ts >= database._to_epoch(start_date)
+            if end_date is not None:
+                mask &= self._created_ts < database._to_epoch(end_date) + SECONDS_PER_DAY
+            return self.table.filter(mask)
+
+        created_ts = self._created_ts[start:stop]
+        if start_date is not None:
+            start, stop = start + np.searchsorted(created_ts, database._to_epoch(start_date)), stop
+            created_ts = self._created_ts[start:stop]
+        if end_date is not None:
+            stop = start + np.searchsorted(created_ts, database._to_epoch(end_date) + SECONDS_PER_DAY)
+        return self.table.slice(start, stop - start)
+
+    def _columns(self, rows, columns):
+        return rows.select(columns).to_pandas()
+
+    def get_recent_tweets(self, product=None, start_date=None, end_date=None, limit=5):
+        rows = self._rows(product, start_date, end_date)
+        if product is not None:
+            # Newest rows are at the end of the product's slice
+            recent = self._columns(rows.slice(max(0, rows.num_rows - limit)), database.TWEET_COLUMNS)
+            return recent.iloc[::-1].reset_index(drop=True)
+        df = self._columns(rows, database.TWEET_COLUMNS + ['created_ts'])
+        return df.nlargest(limit, 'created_ts')[database.TWEET_COLUMNS].reset_index(drop=True)
+
+    def get_tweets_frame(self, product=None, start_date=None, end_date=None):
+        df = self._columns(self._rows(product, start_date, end_date), database.TWEET_COLUMNS + ['created_ts'])
+        if product is None:
+            df = df.sort_values('created_ts', kind='stable', ignore_index=True)
+        return prepare_tweets(df)
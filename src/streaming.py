@@ -0,0 +1,214 @@
+"""Staged streaming pipeline connected by bounded queues.
+
+A source thread feeds batches into a chain of stages. Each stage runs in
+its own worker thread and passes its output to the next stage through a
+bounded queue, so a slow stage makes the upstream stages block
+(backpressure) instead of letting batches pile up in memory. Peak memory
+is therefore bounded by (number of queues x queue size x batch size)
+regardless of how many rows flow through, and throughput is set by the
+slowest stage.
+"""
+import time
+import queue
+import threading
+from itertools import islice
+
+from instrumentation import observe
+
+# Marks the end of the stream on every queue
+_END = object()
+
+def rebatch(batches, size):
+    """Re-chunk an iterable of lists into lists of `size` items.
+    
+    Small pages are merged and large ones split, so only the last chunk
+    can be shorter than `size`.
+    """
+    pending = []
+    for batch in batches:
+        iterator = iter(batch)
+        while True:
+            pending.extend(islice(iterator, size - len(pending)))
+            if len(pending) < size:
+                break
+            yield pending
+            pending = []
+    if pending:
+        yield pending
+
+class StageStats:
+    """Counters for one stage, updated by its worker"""
+    
+    def __init__(self, name, queue_size):
+        self.name = name
+        self.queue_size = queue_size
+        self.batches = 0
+        self.rows_in = 0
+        self.rows_out = 0
+        self.busy_seconds = 0.0
+        self.max_queue_depth = 0
+    
+    def snapshot(self, queue_depth):
+        return {
+            'batches': self.batches,
+            'rows_in': self.rows_in,
+            'rows_out': self.rows_out,
+            'busy_seconds': self.busy_seconds,
+            'rows_per_second': self.rows_in / self.busy_seconds if self.busy_seconds else 0.0,
+            'queue_depth': queue_depth,
+            'max_queue_depth': self.max_queue_depth,
+            'queue_size': self.queue_size
+        }
+
+class StreamingPipeline:
+    """Run `source` batches through `stages`, each in its own thread.
+    
+    `stages` is a list of (name, func) pairs. Each func takes a batch
+    (list) and returns the batch to pass on; returning an empty list or
+    None drops it. The last stage's output is discarded, so it should be
+    the sink (e.g. the database writer). `thread_cleanup`, if given, runs
+    at the end of every worker thread.
+    """
+    
+    def __init__(self, source, stages, queue_size=4, thread_cleanup=None):
+        self.source = source
+        self.thread_cleanup = thread_cleanup
+        self.stages = stages
+        self.queue_size = queue_size
+        # queues[i] feeds stage i
+        self.queues = [queue.Queue(maxsize=queue_size) for _ in stages]
+        self.stats_by_stage = {'source': StageStats('source', 0)}
+        for name, _ in stages:
+            self.stats_by_stage[name] = StageStats(name, queue_size)
+        self.errors = []
+        self._stop = threading.Event()
+        self._threads = []
+        self._started = None
+        self.elapsed = None
+    
+    def _put(self, q, item):
+        """Put with backpressure, giving up if the pipeline is stopping"""
+        while not self._stop.is_set():
+            try:
+                q.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+    
+    def _fail(self, name, error):
+        self.errors.append((name, error))
+        print(f"  Stage '{name}' failed: {error}")
+        self._stop.set()
+    
+    def _run_source(self):
+        stats = self.stats_by_stage['source']
+        first = self.queues[0]
+        try:
+            iterator = iter(self.source)
+            while not self._stop.is_set():
+                start = time.perf_counter()
+                try:
+                    batch = next(iterator)
+                except StopIteration:
+                    break
+                stats.busy_seconds += time.perf_counter() - start
+                stats.batches += 1
+                stats.rows_out += len(batch)
+                if not self._put(first, batch):
+                    break
+        except Exception as e:
+            self._fail('source', e)
+        finally:
+            self._put_end(first)
+            self._cleanup()
+    
+    def _cleanup(self):
+        if self.thread_cleanup is not None:
+            try:
+                self.thread_cleanup()
+            except Exception as e:
+                print(f"  Stream thread cleanup failed: {e}")
+    
+    def _put_end(self, q):
+        """Deliver the end marker; every stage drains its inbox until it sees one"""
+        q.put(_END)
+    
+    def _run_stage(self, index):
+        name, func = self.stages[index]
+        stats = self.stats_by_stage[name]
+        inbox = self.queues[index]
+        outbox = self.queues[index + 1] if index + 1 < len(self.queues) else None
+        
+        try:
+            while True:
+                stats.max_queue_depth = max(stats.max_queue_depth, inbox.qsize())
+                batch = inbox.get()
+                if batch is _END:
+                    break
+                if self._stop.is_set():
+                    continue
+                
+                start = time.perf_counter()
+                try:
+                    result = func(batch)
+                except Exception as e:
+                    self._fail(name, e)
+                    continue
+                finally:
+                    elapsed = time.perf_counter() - start
+                    stats.busy_seconds += elapsed
+                    observe(f"stream.{name}", elapsed)
+                
+                stats.batches += 1
+                stats.rows_in += len(batch)
+                if result:
+                    stats.rows_out += len(result)
+                    if outbox is not None:
+                        self._put(outbox, result)
+        finally:
+            if outbox is not None:
+                self._put_end(outbox)
+            self._cleanup()
+    
+    def start(self):
+        """Start the source and stage threads"""
+        self._started = time.perf_counter()
+        self._threads = [threading.Thread(target=self._run_source, name="stream-source", daemon=True)]
+        for index, (name, _) in enumerate(self.stages):
+            self._threads.append(
+                threading.Thread(target=self._run_stage, args=(index,), name=f"stream-{name}", daemon=True)
+            )
+        for thread in self._threads:
+            thread.start()
+        return self
+    
+    def join(self):
+        """Wait for the stream to drain and return the final stats"""
+        for thread in self._threads:
+            thread.join()
+        self.elapsed = time.perf_counter() - self._started
+        return self.stats()
+    
+    def run(self):
+        """Start, wait for completion and return the final stats"""
+        return self.start().join()
+    
+    def stats(self):
+        """Per-stage counters and current queue depths (safe to call while running)"""
+        report = {'source': self.stats_by_stage['source'].snapshot(0)}
+        for (name, _), q in zip(self.stages, self.queues):
+            report[name] = self.stats_by_stage[name].snapshot(q.qsize())
+        
+        busiest = None
+        if self.stages:
+            busiest = max((name for name, _ in self.stages), key=lambda name: self.stats_by_stage[name].busy_seconds)
+        
+        return {
+            'stages': report,
+            'bottleneck': busiest,
+            'elapsed': self.elapsed if self.elapsed is not None else (
+                time.perf_counter() - self._started if self._started else 0.0
+            ),
+            'errors': [f"{name}: {error}" for name, error in self.errors]
+        }
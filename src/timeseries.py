@@ -0,0 +1,75 @@
+"""Multi-resolution tweet time series from the rollup tables.
+
+Sentiment and volume are served per minute, hour, day or week. Minute,
+hour and day buckets come from the matching rollup table maintained by
+database.insert_tweets_bulk; weeks are summed from the daily rollups.
+`select_resolution` picks the finest resolution that keeps a date range
+under TIMESERIES_CONFIG["max_points"] buckets, so zooming in to a
+shorter range switches to finer buckets without reading raw tweets.
+"""
+import pandas as pd
+
+import database
+from config import TIMESERIES_CONFIG
+
+# name: (rollup table, bucket seconds), finest first
+RESOLUTIONS = {
+    'minute': ('minute_rollups', 60),
+    'hour': ('hourly_rollups', 3600),
+    'day': ('daily_rollups', 86400),
+    'week': ('daily_rollups', 7 * 86400),
+}
+
+# Epoch day 0 was a Thursday; shift so weeks start on Monday
+WEEK_OFFSET_DAYS = 3
+
+def bucket_count(start_date, end_date, resolution):
+    """Number of buckets an inclusive date range spans at `resolution`"""
+    seconds = ((end_date - start_date).days + 1) * 86400
+    return -(-seconds // RESOLUTIONS[resolution][1])
+
+def available_resolutions(start_date, end_date, max_points=None):
+    """Resolutions that stay within `max_points` buckets for the range"""
+    max_points = max_points or TIMESERIES_CONFIG["max_points"]
+    return [
+        resolution for resolution in RESOLUTIONS
+        if resolution == 'week' or bucket_count(start_date, end_date, resolution) <= max_points
+    ]
+
+def select_resolution(start_date, end_date, max_points=None):
+    """Finest resolution that keeps the range within `max_points` buckets"""
+    return available_resolutions(start_date, end_date, max_points)[0]
+
+def floor_times(created_at, resolution):
+    """Bucket start for each datetime64 value, matching the rollup buckets"""
+    if resolution == 'minute':
+        return created_at.dt.floor('min')
+    if resolution == 'hour':
+        return created_at.dt.floor('h')
+    day = created_at.dt.floor('D')
+    if resolution == 'day':
+        return day
+    return day - pd.to_timedelta(day.dt.dayofweek, unit='D')
+
+def get_series(product=None, start_date=None, end_date=None, resolution=None):
+    """Sentiment and volume per bucket as a DataFrame [time, sentiment, count].
+
+    Dates are inclusive. Without a `resolution`, one is chosen with
+    select_resolution (missing dates default to the product's bounds).
+    """
+    if resolution is None:
+        first, last = database.get_date_bounds(product)
+        if first is None:
+            return pd.DataFrame(columns=['time', 'sentiment', 'count'])
+        resolution = select_resolution(start_date or first, end_date or last)
+
+    table, seconds = RESOLUTIONS[resolution]
+    if resolution == 'week':
+        df = database.get_rollup_buckets(table, product, start_date, end_date, group=7, shift=WEEK_OFFSET_DAYS)
+        offset = -WEEK_OFFSET_DAYS * 86400
+    else:
+        df = database.get_rollup_buckets(table, product, start_date, end_date)
+        offset = 0
+
+    df.insert(0, 'time', pd.to_datetime(df.pop('bucket') * seconds + offset, unit='s'))
+    return df
@@ -1,143 +1,327 @@
 import os
-import random
+import hashlib
+import threading
 import pandas as pd
-from datetime import datetime, timedelta
-
-# Try to import tweepy for Twitter API
-try:
-    import tweepy
-    TWEEPY_AVAILABLE = True
-except ImportError:
-    TWEEPY_AVAILABLE = False
+from importlib.util import find_spec
+
+import database
+import instrumentation
+from config import PROCESSING_CONFIG, TWITTER_CONFIG
+from rate_limiter import get_rate_limiter
+from load_generator import LoadGenerator
+
+# tweepy is only imported once a client is actually needed
+TWEEPY_AVAILABLE = find_spec("tweepy") is not None
+if not TWEEPY_AVAILABLE:
     print("tweepy not installed. Using sample data only.")
 
-def get_twitter_client():
-    """Get Twitter API client if available"""
-    bearer_token = os.getenv('BEARER_TOKEN')
+# One client (and its HTTP session pool) per credential set, for the process lifetime
+_clients = {}
+_clients_lock = threading.Lock()
+
+def _credential_key(bearer_token):
+    """Registry key for a token that does not keep the token itself"""
+    return hashlib.sha256(bearer_token.encode('utf-8')).hexdigest()
+
+def get_twitter_client(bearer_token=None):
+    """Get the shared Twitter API client for a bearer token, if available
+    
+    The token defaults to the BEARER_TOKEN environment variable. Clients
+    are created on first use and reused afterwards.
+    """
+    bearer_token = bearer_token or os.getenv('BEARER_TOKEN')
     
     if not bearer_token or not TWEEPY_AVAILABLE:
         return None
     
-    try:
-        client = tweepy.Client(bearer_token=bearer_token)
+    key = _credential_key(bearer_token)
+    with _clients_lock:
+        client = _clients.get(key)
+        if client is not None:
+            return client
+        
+        try:
+            import tweepy
+            client = tweepy.Client(bearer_token=bearer_token)
+        except Exception as e:
+            print(f"Error creating Twitter client: {e}")
+            return None
+        
+        _clients[key] = client
         return client
+
+def close_twitter_clients():
+    """Close the HTTP sessions of all cached clients and forget them"""
+    with _clients_lock:
+        for client in _clients.values():
+            session = getattr(client, 'session', None)
+            if session is not None:
+                session.close()
+        _clients.clear()
+
+def _record_rate_limit(limiter, error):
+    """Feed the rate limit headers of a failed request back into the limiter"""
+    response = getattr(error, 'response', None)
+    headers = getattr(response, 'headers', None)
+    
+    if headers and 'x-rate-limit-reset' in {key.lower() for key in headers}:
+        limiter.update_from_headers(headers)
+    elif getattr(response, 'status_code', None) == 429:
+        limiter.block_for(TWITTER_CONFIG["rate_limit_delay"])
+
+def _convert_tweet(tweet):
+    """Convert an API tweet object to our dict format"""
+    metrics = tweet.public_metrics or {}
+    
+    return {
+        'id': str(tweet.id),
+        'created_at': str(tweet.created_at),
+        'text': tweet.text,
+        'user_id': str(tweet.author_id),
+        'likes': metrics.get('like_count', 0),
+        'retweets': metrics.get('retweet_count', 0)
+    }
+
+def _load_checkpoint(query):
+    """Read the saved pagination state, or None if there is no database yet"""
+    try:
+        return database.get_collection_state(query)
     except Exception as e:
-        print(f"Error creating Twitter client: {e}")
+        print(f"No collection checkpoint for {query}: {e}")
         return None
 
-def collect_tweets_api(query, count=50):
-    """Collect tweets using Twitter API"""
-    client = get_twitter_client()
+def _save_checkpoint(query, **state):
+    """Store pagination state, logging instead of failing the collection"""
+    try:
+        database.save_collection_state(query, **state)
+    except Exception as e:
+        print(f"Could not save collection checkpoint for {query}: {e}")
+
+def newest_id(*ids):
+    """Return the numerically largest of the given tweet ids (None if none)"""
+    ids = [str(tweet_id) for tweet_id in ids if tweet_id and str(tweet_id).isdigit()]
+    return max(ids, key=int) if ids else None
+
+def get_since_id(query):
+    """High-water mark for `query`: the since_id saved by the last finished API run.
     
-    if not client:
-        return []
+    Stored tweet ids are not consulted because sample and load-generator
+    tweets have numeric ids too and would pass for API ids.
+    """
+    state = _load_checkpoint(query) or {}
+    return newest_id(state.get('since_id'))
+
+class PageCursor:
+    """Pagination and checkpoint state for one collection of `query`.
     
-    try:
-        # Search for recent tweets
-        tweets = client.search_recent_tweets(
-            query=query,
-            max_results=min(count, 100),  # API limit
-            tweet_fields=['created_at', 'public_metrics', 'author_id']
-        )
-        
-        if not tweets.data:
-            return []
+    Shared by iter_tweet_pages and the async collector so both page and
+    checkpoint identically. `params()` gives the paging parameters of the
+    next request, `advance()` records a response and `done` says whether
+    to stop. `load()`, `save_progress()` and `finish()` are the only
+    methods that touch the database (collection_state); they are no-ops
+    without `checkpoint`.
+    """
+    
+    def __init__(self, query, count=50, since_id=None, checkpoint=True):
+        self.query = query
+        self.count = count
+        self.since_id = since_id
+        self.checkpoint = checkpoint
+        self.next_token = None
+        self.run_newest_id = None
+        self.resumed = False
+        self.collected = 0
+    
+    def load(self):
+        """Apply the saved checkpoint: resume an interrupted run or raise since_id"""
+        state = (_load_checkpoint(self.query) if self.checkpoint else None) or {}
         
-        # Convert to our format
-        result = []
-        for tweet in tweets.data:
-            metrics = tweet.public_metrics or {}
-            
-            tweet_data = {
-                'id': str(tweet.id),
-                'created_at': str(tweet.created_at),
-                'text': tweet.text,
-                'user_id': str(tweet.author_id),
-                'likes': metrics.get('like_count', 0),
-                'retweets': metrics.get('retweet_count', 0)
-            }
-            
-            result.append(tweet_data)
+        if state.get('next_token'):
+            # Resume the interrupted run with its own lower bound; the stored
+            # high-water mark already includes that run's first pages
+            self.since_id = state.get('run_since_id')
+            self.next_token = state['next_token']
+            self.run_newest_id = state.get('run_newest_id')
+            self.resumed = True
+        else:
+            self.since_id = newest_id(state.get('since_id'), self.since_id)
+        return self
+    
+    @property
+    def remaining(self):
+        return self.count - self.collected
+    
+    def params(self):
+        """query, max_results, since_id and next_token for the next request"""
+        params = {
+            'query': self.query,
+            # The search endpoint accepts 10-100 results per page
+            'max_results': max(10, min(self.remaining, TWITTER_CONFIG["max_results_per_request"]))
+        }
+        if self.since_id:
+            params['since_id'] = self.since_id
+        if self.next_token:
+            params['next_token'] = self.next_token
+        return params
+    
+    def advance(self, meta, tweets):
+        """Record one response; returns its tweets trimmed to the remaining count"""
+        if self.run_newest_id is None:
+            self.run_newest_id = meta.get('newest_id')
         
-        print(f"Collected {len(result)} tweets from API")
-        return result
+        page = tweets[:self.remaining]
+        self.next_token = meta.get('next_token')
+        self.collected += len(page)
+        instrumentation.count("collector.api_pages")
+        instrumentation.count("collector.api_tweets", len(page))
+        return page
     
-    except Exception as e:
-        print(f"Error collecting from API: {e}")
-        return []
+    @property
+    def done(self):
+        return not self.next_token or self.collected >= self.count
+    
+    def save_progress(self):
+        """Store the next_token so an interrupted run can resume from it"""
+        if self.checkpoint:
+            _save_checkpoint(self.query, next_token=self.next_token,
+                             run_since_id=self.since_id, run_newest_id=self.run_newest_id)
+    
+    def finish(self):
+        """Make the newest id seen the since_id of the next run"""
+        if self.checkpoint:
+            _save_checkpoint(
+                self.query,
+                since_id=newest_id(self.run_newest_id, self.since_id),
+                next_token=None,
+                run_since_id=None,
+                run_newest_id=None
+            )
 
-def generate_sample_tweets(product, count=50):
-    """Generate sample tweets for testing"""
-    
-    # Sample tweet templates
-    templates = {
-        'positive': [
-            f"Love the new {product}! Amazing features  ",
-            f"{product} is incredible! Best upgrade ever  ",
-            f"Just got my {product} and it's perfect!  ",
-            f"{product} exceeded my expectations! Highly recommend  ",
-            f"Outstanding quality! {product} is worth every penny  "
-        ],
-        'negative': [
-            f"{product} is disappointing. Not worth the price  ",
-            f"Had high hopes for {product} but it's mediocre  ",
-            f"{product} has too many issues. Returning it  ",
-            f"Not impressed with {product}. Expected better  ",
-            f"{product} is overpriced for what you get  "
-        ],
-        'neutral': [
-            f"Just unboxed my {product}. First impressions...",
-            f"Testing out the {product} features today",
-            f"{product} arrived. Setting it up now",
-            f"Comparing {product} with my old device",
-            f"{product} review coming soon. Stay tuned"
-        ]
-    }
+def iter_tweet_pages(query, count=50, client=None, limiter=None, checkpoint=True, since_id=None):
+    """Yield pages of API tweets for `query`, following next_token.
+    
+    Each page is a list of tweet dicts. Only tweets newer than `since_id`
+    and the saved checkpoint's since_id are requested. With `checkpoint` the next_token is stored
+    in collection_state once the consumer has taken a page, so a rerun
+    after an interruption resumes where the last run stopped; when the
+    query is exhausted or `count` is reached, the newest id seen becomes
+    the since_id for the next run (see PageCursor).
+    """
+    client = client or get_twitter_client()
+    limiter = limiter or get_rate_limiter()
+    
+    if not client:
+        return
     
-    tweets = []
-    base_date = datetime.now() - timedelta(days=30)
+    cursor = PageCursor(query, count, since_id, checkpoint).load()
+    if cursor.resumed:
+        print(f"Resuming collection for {query} from saved page token")
     
-    for i in range(count):
-        # Random sentiment type
-        sentiment_type = random.choice(['positive', 'negative', 'neutral'])
-        tweet_text = random.choice(templates[sentiment_type])
+    while cursor.remaining > 0:
+        params = cursor.params()
+        params['tweet_fields'] = ['created_at', 'public_metrics', 'author_id']
         
-        # Random date within last 30 days
-        random_days = random.randint(0, 29)
-        random_hours = random.randint(0, 23)
-        tweet_date = base_date + timedelta(days=random_days, hours=random_hours)
+        try:
+            instrumentation.observe("collector.rate_limit_wait", limiter.acquire())
+            with instrumentation.timed("collector.api_request"):
+                response = client.search_recent_tweets(**params)
+        except Exception as e:
+            instrumentation.count("collector.api_errors")
+            _record_rate_limit(limiter, e)
+            print(f"Error collecting from API: {e}")
+            return
         
-        # Random engagement
-        if sentiment_type == 'positive':
-            likes = random.randint(10, 100)
-            retweets = random.randint(2, 20)
-        elif sentiment_type == 'negative':
-            likes = random.randint(0, 30)
-            retweets = random.randint(0, 8)
-        else:  # neutral
-            likes = random.randint(5, 50)
-            retweets = random.randint(1, 10)
+        meta = getattr(response, 'meta', None) or {}
+        page = cursor.advance(meta, [_convert_tweet(tweet) for tweet in (response.data or [])])
         
-        tweet = {
-            'id': str(random.randint(1000000000, 9999999999)),
-            'created_at': tweet_date.strftime('%Y-%m-%d %H:%M:%S'),
-            'text': tweet_text,
-            'user_id': f'user_{random.randint(1000, 9999)}',
-            'likes': likes,
-            'retweets': retweets
-        }
+        if page:
+            yield page
         
-        tweets.append(tweet)
+        if cursor.done:
+            break
+        
+        cursor.save_progress()
+    
+    cursor.finish()
+
+def collect_tweets_api(query, count=50, client=None, limiter=None, checkpoint=True, since_id=None):
+    """Collect tweets using Twitter API
+    
+    Pages are fetched with iter_tweet_pages until `count` tweets arrive.
+    Every request first takes a token from the shared rate limiter
+    (default: get_rate_limiter()), so concurrent collections stay within
+    one API quota.
+    """
+    result = []
+    for page in iter_tweet_pages(query, count, client, limiter, checkpoint, since_id):
+        result.extend(page)
     
+    if result:
+        print(f"Collected {len(result)} tweets from API")
+    return result
+
+def generate_sample_tweets(product, count=50):
+    """Generate sample tweets for testing.
+    
+    Built with the vectorized load generator, so ids are snowflake ids
+    that decode to each tweet's created_at (see load_generator).
+    """
+    generator = LoadGenerator(products=[product], with_sentiment=False)
+    tweets = generator.chunk(count).drop(columns=['sentiment', 'product']).to_dict('records')
+    
+    instrumentation.count("collector.sample_tweets", len(tweets))
     print(f"Generated {len(tweets)} sample tweets for {product}")
     return tweets
 
-def collect_tweets(query, count=50):
-    """Main function to collect tweets"""
+def iter_sample_tweets(product, count=50, chunk_size=None):
+    """Yield sample tweets in chunks so large fallback runs stay small in memory"""
+    chunk_size = chunk_size or PROCESSING_CONFIG["batch_size"]
+    for start in range(0, count, chunk_size):
+        yield generate_sample_tweets(product, min(chunk_size, count - start))
+
+def collect_tweet_pages(query, count=50, since_id=None):
+    """Yield pages of tweets from the API, or one page of sample data.
+    
+    Only tweets newer than the high-water mark (`since_id`, default: the
+    since_id checkpointed for `query` by the last API run) are
+    requested. Sample data is only generated when the API yields nothing
+    and there is no real data for `query` yet.
+    """
+    print(f"Collecting tweets for: {query}")
+    client = get_twitter_client()
+    if client and since_id is None:
+        since_id = get_since_id(query)
+    
+    collected = 0
+    if client:
+        for page in iter_tweet_pages(query, count, client, since_id=since_id):
+            collected += len(page)
+            yield page
+    
+    if not collected:
+        if client and since_id:
+            print(f"No new tweets for {query} since {since_id}")
+            return
+        print("Using sample data instead of API")
+        yield from iter_sample_tweets(query, count)
+
+def collect_tweets(query, count=50, since_id=None):
+    """Main function to collect tweets
+    
+    Only tweets newer than `since_id` (default: the since_id checkpointed
+    for `query` by the last API run) are fetched from the API.
+    """
     print(f"Collecting tweets for: {query}")
+    client = get_twitter_client()
+    if client and since_id is None:
+        since_id = get_since_id(query)
     
     # Try API first
-    tweets = collect_tweets_api(query, count)
+    tweets = collect_tweets_api(query, count, client, since_id=since_id) if client else []
+    
+    if not tweets and client and since_id:
+        print(f"No new tweets for {query} since {since_id}")
+        return []
     
     # If API fails, use sample data
     if not tweets:
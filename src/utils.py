@@ -1,17 +1,70 @@
+import numpy as np
 import pandas as pd
-from datetime import datetime, date
+from datetime import datetime, date, timedelta
 import csv
 from io import StringIO
 
+from config import SENTIMENT_CONFIG
+
+SENTIMENT_CATEGORIES = ['Positive', 'Negative', 'Neutral']
+
+def _parse_created_at(df):
+    """created_at as datetime64, parsed only when it is still text"""
+    if 'created_ts' in df and pd.api.types.is_integer_dtype(df['created_ts']):
+        # Epoch seconds convert without any string parsing
+        return pd.to_datetime(df['created_ts'], unit='s')
+    created_at = df['created_at']
+    if not pd.api.types.is_datetime64_any_dtype(created_at):
+        # API timestamps end in Z while stored ones are naive UTC
+        created_at = pd.to_datetime(created_at, format='ISO8601', utc=True)
+    if created_at.dt.tz is not None:
+        created_at = created_at.dt.tz_convert(None)
+    return created_at
+
+def is_prepared(df):
+    """Whether `df` already came out of prepare_tweets"""
+    return (
+        'day' in df and 'sentiment_category' in df and 'total_engagement' in df
+        and pd.api.types.is_datetime64_any_dtype(df['created_at'])
+    )
+
+def prepare_tweets(df):
+    """Return a copy of a tweets frame with the columns every chart needs.
+    
+    Done once when tweets are loaded, so reruns never parse timestamps:
+    created_at becomes datetime64, day is its midnight bucket,
+    sentiment_category is a categorical label and total_engagement is
+    likes + retweets. The input frame is not modified.
+    """
+    if is_prepared(df):
+        return df
+    
+    created_at = _parse_created_at(df)
+    sentiment = df['sentiment'].to_numpy(dtype=float)
+    labels = np.select(
+        [sentiment > SENTIMENT_CONFIG["positive_threshold"], sentiment < SENTIMENT_CONFIG["negative_threshold"]],
+        [0, 1],
+        2
+    )
+    return df.assign(
+        created_at=created_at.to_numpy(),
+        day=created_at.dt.floor('D').to_numpy(),
+        sentiment_category=pd.Categorical.from_codes(labels, SENTIMENT_CATEGORIES),
+        total_engagement=df['likes'] + df['retweets']
+    )
+
 def filter_tweets_by_date(df, start_date, end_date):
-    """Filter tweets by date range"""
+    """Filter tweets by date range (inclusive); `df` is not modified"""
     try:
-        # Convert to datetime if needed
-        df['created_at'] = pd.to_datetime(df['created_at'])
+        created_at = _parse_created_at(df)
         
-        # Filter by date range
-        mask = (df['created_at'].dt.date >= start_date) & (df['created_at'].dt.date <= end_date)
+        # Compare against day boundaries instead of building a date per row
+        start = pd.Timestamp(start_date)
+        end = pd.Timestamp(end_date + timedelta(days=1))
+        mask = ((created_at >= start) & (created_at < end)).to_numpy()
         filtered_df = df[mask]
+        if not pd.api.types.is_datetime64_any_dtype(df['created_at']):
+            filtered_df = filtered_df.assign(created_at=created_at.to_numpy()[mask])
         
         print(f"Filtered {len(filtered_df)} tweets between {start_date} and {end_date}")
         return filtered_df
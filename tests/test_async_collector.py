@@ -0,0 +1,195 @@
+import sys
+import os
+
+# Add src directory to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+import time
+import threading
+import unittest
+from unittest import mock
+from aiohttp import web
+import database
+import tweet_collector
+from config import TWITTER_CONFIG
+from rate_limiter import TokenBucket
+from async_collector import AsyncTweetCollector, CollectorError
+from tests.test_database import DatabaseTestCase
+
+class StandInSearchServer:
+    """Local HTTP stand-in for GET /2/tweets/search/recent.
+    
+    Serves `total` tweets per query newest first with next_token paging.
+    `failures` is a list of status codes returned before real responses.
+    """
+    
+    def __init__(self, total=150, failures=None):
+        self.total = total
+        self.failures = list(failures or [])
+        self.requests = []
+        self.peers = set()
+    
+    async def search(self, request):
+        params = request.query
+        self.requests.append(dict(params))
+        self.peers.add(request.transport.get_extra_info('peername'))
+        
+        if request.headers.get('Authorization') != "Bearer test-token":
+            return web.json_response({'title': 'Unauthorized'}, status=401)
+        
+        if self.failures:
+            status = self.failures.pop(0)
+            headers = {}
+            if status == 429:
+                headers = {'x-rate-limit-remaining': '0', 'x-rate-limit-reset': str(int(time.time()))}
+            return web.json_response({'title': 'error'}, status=status, headers=headers)
+        
+        since_id = int(params.get('since_id', 0))
+        ids = [i for i in range(self.total, 0, -1) if i > since_id]
+        offset = int(params.get('next_token', 0))
+        size = int(params['max_results'])
+        page_ids = ids[offset:offset + size]
+        
+        meta = {'result_count': len(page_ids)}
+        if ids:
+            meta['newest_id'] = str(ids[0])
+        if offset + size < len(ids):
+            meta['next_token'] = str(offset + size)
+        
+        data = [
+            {'id': str(i), 'created_at': '2024-01-01T00:00:00.000Z', 'text': f"{params['query']} {i}",
+             'author_id': '1', 'public_metrics': {'like_count': i, 'retweet_count': 0}}
+            for i in page_ids
+        ]
+        return web.json_response({'data': data, 'meta': meta} if data else {'meta': meta})
+
+async def start_server(test, server):
+    """Serve `server` on a free local port for the test; returns the API base URL"""
+    app = web.Application()
+    app.router.add_get('/2/tweets/search/recent', server.search)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, '127.0.0.1', 0)
+    await site.start()
+    test.addAsyncCleanup(runner.cleanup)
+    port = site._server.sockets[0].getsockname()[1]
+    return f"http://127.0.0.1:{port}/2"
+
+class TestAsyncCollector(unittest.IsolatedAsyncioTestCase):
+    """Test the async collector against a local HTTP server"""
+    
+    async def start_server(self, server):
+        return await start_server(self, server)
+    
+    def make_collector(self, base_url, **kwargs):
+        return AsyncTweetCollector(
+            bearer_token="test-token", base_url=base_url, limiter=TokenBucket(1000, 900),
+            checkpoint=False, **kwargs
+        )
+    
+    def setUp(self):
+        patcher = mock.patch.dict(TWITTER_CONFIG, retry_backoff_seconds=0.01, retry_backoff_max_seconds=0.05)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+    
+    async def test_paginates_over_one_session(self):
+        """Test that pages are followed and the connection is kept alive"""
+        server = StandInSearchServer(total=250)
+        base_url = await self.start_server(server)
+        
+        async with self.make_collector(base_url, max_concurrency=1) as collector:
+            tweets = await collector.collect("Pixel 8", 250)
+        
+        self.assertEqual(len(tweets), 250)
+        self.assertEqual([r.get('next_token') for r in server.requests], [None, '100', '200'])
+        self.assertEqual(len(server.peers), 1)
+        self.assertEqual(tweets[0]['likes'], 250)
+    
+    async def test_collect_many_concurrently(self):
+        """Test that several products are collected into separate results"""
+        server = StandInSearchServer(total=30)
+        base_url = await self.start_server(server)
+        
+        async with self.make_collector(base_url) as collector:
+            results = await collector.collect_many(["Pixel 8", "iPhone 15", "Galaxy S24"], 30, {"Pixel 8": "20"})
+        
+        self.assertEqual({query: len(tweets) for query, tweets in results.items()},
+                         {"Pixel 8": 10, "iPhone 15": 30, "Galaxy S24": 30})
+        self.assertTrue(results["iPhone 15"][0]['text'].startswith("iPhone 15"))
+    
+    async def test_retries_429_and_5xx(self):
+        """Test that rate limited and server errors are retried"""
+        server = StandInSearchServer(total=20, failures=[503, 429, 500])
+        base_url = await self.start_server(server)
+        
+        async with self.make_collector(base_url) as collector:
+            tweets = await collector.collect("Pixel 8", 20)
+            self.assertEqual(collector.retries, 3)
+        
+        self.assertEqual(len(tweets), 20)
+        self.assertEqual(len(server.requests), 4)
+    
+    async def test_gives_up_after_max_retries(self):
+        """Test that persistent server errors raise CollectorError"""
+        server = StandInSearchServer(failures=[503] * 10)
+        base_url = await self.start_server(server)
+        
+        async with self.make_collector(base_url, max_retries=2) as collector:
+            with self.assertRaises(CollectorError):
+                await collector.collect("Pixel 8", 20)
+        
+        self.assertEqual(len(server.requests), 3)
+    
+    async def test_client_errors_are_not_retried(self):
+        """Test that a 4xx other than 429 fails immediately"""
+        server = StandInSearchServer()
+        base_url = await self.start_server(server)
+        
+        collector = AsyncTweetCollector(bearer_token="wrong", base_url=base_url,
+                                        limiter=TokenBucket(1000, 900), checkpoint=False)
+        async with collector:
+            results = await collector.collect_many(["Pixel 8"], 20)
+        
+        self.assertEqual(results, {"Pixel 8": []})
+        self.assertEqual(len(server.requests), 1)
+    
+    async def test_throttling_counts_as_limiter_wait(self):
+        """Test that waiting for a token is added to the shared limiter's total_wait"""
+        limiter = TokenBucket(1, 0.05)
+        collector = AsyncTweetCollector(bearer_token="test-token", limiter=limiter, checkpoint=False)
+        
+        await collector._acquire_token()
+        self.assertEqual(limiter.total_wait, 0)
+        await collector._acquire_token()
+        self.assertGreater(limiter.total_wait, 0)
+
+class TestAsyncCheckpoint(DatabaseTestCase, unittest.IsolatedAsyncioTestCase):
+    """Test that the async collector checkpoints like the sync one, off the event loop"""
+    
+    async def test_checkpoint_io_runs_in_worker_threads(self):
+        server = StandInSearchServer(total=250)
+        base_url = await start_server(self, server)
+        threads = []
+        
+        def record(function):
+            def wrapper(*args, **kwargs):
+                threads.append(threading.current_thread())
+                return function(*args, **kwargs)
+            return wrapper
+        
+        with mock.patch.object(tweet_collector, '_load_checkpoint', record(tweet_collector._load_checkpoint)), \
+                mock.patch.object(tweet_collector, '_save_checkpoint', record(tweet_collector._save_checkpoint)):
+            collector = AsyncTweetCollector(bearer_token="test-token", base_url=base_url,
+                                            limiter=TokenBucket(1000, 900))
+            async with collector:
+                tweets = await collector.collect("Pixel 8", 150)
+        
+        self.assertEqual(len(tweets), 150)
+        # load, one next_token save, final since_id save
+        self.assertEqual(len(threads), 3)
+        self.assertNotIn(threading.current_thread(), threads)
+        self.assertEqual(tweet_collector.get_since_id("Pixel 8"), '250')
+        self.assertIsNone(database.get_collection_state("Pixel 8")['next_token'])
+
+if __name__ == "__main__":
+    unittest.main()
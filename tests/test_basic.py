@@ -5,9 +5,18 @@ import os
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
 
 import unittest
-from sentiment_analyzer import analyze_sentiment, get_sentiment_label
-from utils import categorize_sentiment, calculate_metrics
+from unittest import mock
+import sentiment_analyzer
+from config import SENTIMENT_CONFIG
+from sentiment_analyzer import (
+    analyze_sentiment, get_sentiment_label, clean_text, clean_texts,
+    analyze_sentiment_batch, analyze_tweets_sentiment
+)
+from utils import categorize_sentiment, calculate_metrics, filter_tweets_by_date, prepare_tweets
+import charts
+import numpy as np
 import pandas as pd
+from datetime import date
 
 class TestSentimentAnalysis(unittest.TestCase):
     """Test sentiment analysis functions"""
@@ -41,6 +50,148 @@ class TestSentimentAnalysis(unittest.TestCase):
         self.assertEqual(get_sentiment_label(-0.5), "Negative")
         self.assertEqual(get_sentiment_label(0.05), "Neutral")
 
+class TestBatchSentiment(unittest.TestCase):
+    """Test the batch sentiment engine against the per-text functions"""
+    
+    def setUp(self):
+        self.texts = [
+            "I love this product! http://t.co/abc #launch",
+            "@brand This product is terrible!\nWaste of money!",
+            "I love this product! http://t.co/abc #launch",
+            "The product arrived today.",
+            "",
+            None,
+            "  spaced\t  out   @someone text  ",
+            "@userhttp://example.com mixed"
+        ]
+    
+    def test_clean_texts_matches_clean_text(self):
+        """Test that batch cleaning gives the same result as per-text cleaning"""
+        expected = [clean_text(text) if text else "" for text in self.texts]
+        self.assertEqual(clean_texts(self.texts), expected)
+    
+    def test_batch_matches_single(self):
+        """Test that batch scores and labels match analyze_sentiment"""
+        scores, labels = analyze_sentiment_batch(self.texts)
+        
+        self.assertEqual(len(scores), len(self.texts))
+        for text, score, label in zip(self.texts, scores, labels):
+            self.assertAlmostEqual(score, analyze_sentiment(text))
+            self.assertEqual(label, get_sentiment_label(score))
+    
+    def test_analyze_tweets_sentiment(self):
+        """Test that tweets get plain float scores and string labels"""
+        tweets = analyze_tweets_sentiment([{'text': text} for text in self.texts])
+        
+        self.assertIsInstance(tweets[0]['sentiment'], float)
+        self.assertEqual(tweets[0]['sentiment_label'], "Positive")
+        self.assertEqual(tweets[4]['sentiment'], 0.0)
+
+class TestParallelSentiment(unittest.TestCase):
+    """Test process pool scoring against in-process scoring"""
+    
+    def setUp(self):
+        self.texts = [f"Product {i} is {'great' if i % 3 else 'awful'} #launch" for i in range(40)]
+    
+    def tearDown(self):
+        sentiment_analyzer.shutdown_process_pool()
+    
+    def test_parallel_matches_serial_in_order(self):
+        """Test that sharded scores come back aligned with the input"""
+        expected, expected_labels = analyze_sentiment_batch(self.texts, workers=1)
+        
+        with mock.patch.dict(SENTIMENT_CONFIG, parallel_min_batch=10, parallel_chunk_size=7, cache_enabled=False):
+            scores, labels = analyze_sentiment_batch(self.texts, workers=2)
+        
+        self.assertIsNotNone(sentiment_analyzer._process_pool)
+        self.assertEqual(sentiment_analyzer._process_pool._mp_context.get_start_method(), 'spawn')
+        self.assertEqual(scores.tolist(), expected.tolist())
+        self.assertEqual(labels.tolist(), expected_labels.tolist())
+    
+    def test_small_batch_stays_in_process(self):
+        """Test that batches below the threshold do not start a pool"""
+        with mock.patch.dict(SENTIMENT_CONFIG, parallel_min_batch=1000):
+            analyze_sentiment_batch(self.texts, workers=4)
+        
+        self.assertIsNone(sentiment_analyzer._process_pool)
+
+class TestSentimentBackends(unittest.TestCase):
+    """Test the pluggable sentiment backends"""
+    
+    def test_registered_methods(self):
+        """Test that every advertised method has a backend"""
+        from sentiment_backends import BACKENDS
+        self.assertTrue({'textblob', 'vader', 'ensemble'} <= set(BACKENDS))
+    
+    def test_unknown_method(self):
+        """Test that an unknown method is rejected"""
+        from sentiment_backends import get_backend
+        with self.assertRaises(ValueError):
+            get_backend('nope')
+    
+    def test_vader_backend(self):
+        """Test that the configured method selects VADER"""
+        with mock.patch.dict(SENTIMENT_CONFIG, method="vader"):
+            self.assertGreater(analyze_sentiment("I love this product!"), 0)
+            self.assertLess(analyze_sentiment("This product is terrible!"), 0)
+            self.assertTrue(sentiment_analyzer.get_cache_namespace().startswith('vader:'))
+    
+    def test_ensemble_is_weighted_average(self):
+        """Test that the ensemble combines member scores with the configured weights"""
+        from sentiment_backends import get_backend
+        
+        texts = ["I love this product!", "This product is terrible!", "", "It arrived"]
+        ensemble = get_backend('ensemble')
+        expected = sum(
+            weight * get_backend(member.name).score_batch(texts)
+            for member, weight in zip(ensemble.members, ensemble.weights)
+        )
+        self.assertEqual(ensemble.score_batch(texts).tolist(), expected.tolist())
+
+class TestSentimentCache(unittest.TestCase):
+    """Test the in-memory sentiment cache"""
+    
+    def setUp(self):
+        sentiment_analyzer.get_sentiment_cache().clear()
+    
+    def test_repeated_texts_hit_cache(self):
+        """Test that a second batch of the same texts is served from the cache"""
+        texts = ["Love it #launch", "Hate it", "Love it"]
+        first, _ = analyze_sentiment_batch(texts)
+        
+        with mock.patch.object(sentiment_analyzer, '_score_unique', side_effect=AssertionError):
+            second, _ = analyze_sentiment_batch(texts)
+        
+        stats = sentiment_analyzer.get_sentiment_cache().stats()
+        self.assertEqual(second.tolist(), first.tolist())
+        self.assertEqual(stats['misses'], 2)
+        self.assertEqual(stats['hits'], 2)
+    
+    def test_lru_eviction(self):
+        """Test that the least recently used entry is evicted first"""
+        from sentiment_cache import SentimentCache
+        
+        cache = SentimentCache(maxsize=2)
+        cache.put('m', 'a', 0.1)
+        cache.put('m', 'b', 0.2)
+        cache.get('m', 'a')
+        cache.put('m', 'c', 0.3)
+        
+        self.assertEqual(cache.get('m', 'a'), 0.1)
+        self.assertIsNone(cache.get('m', 'b'))
+        self.assertEqual(cache.stats()['evictions'], 1)
+    
+    def test_method_change_invalidates(self):
+        """Test that changing the configured method drops cached scores"""
+        analyze_sentiment_batch(["Love it"])
+        
+        with mock.patch.dict(SENTIMENT_CONFIG, method="vader"):
+            analyze_sentiment_batch(["Love it"])
+            stats = sentiment_analyzer.get_sentiment_cache().stats()
+        
+        self.assertTrue(stats['namespace'].startswith('vader:'))
+        self.assertEqual(stats['size'], 1)
+
 class TestUtils(unittest.TestCase):
     """Test utility functions"""
     
@@ -68,6 +219,103 @@ class TestUtils(unittest.TestCase):
         self.assertIn('positive_tweets', metrics)
         self.assertEqual(metrics['total_tweets'], 5)
 
+class TestPreparedFrame(unittest.TestCase):
+    """Test the prepared tweets frame shared by the chart functions"""
+    
+    def setUp(self):
+        self.df = pd.DataFrame({
+            'created_at': ['2024-01-01 09:00:00', '2024-01-01 23:30:00', '2024-01-02 10:00:00', '2024-01-03T08:00:00.000Z'],
+            'text': ['Great', 'Bad', 'Okay', 'Fine'],
+            'sentiment': [0.5, -0.3, 0.05, 0.2],
+            'likes': [10, 5, 8, 1],
+            'retweets': [2, 1, 3, 0],
+            'product': ['iPhone 15'] * 4
+        })
+        self.original = self.df.copy()
+    
+    def test_prepare_tweets(self):
+        """Test parsed timestamps, day buckets, categories and engagement"""
+        prepared = prepare_tweets(self.df)
+        
+        self.assertTrue(pd.api.types.is_datetime64_any_dtype(prepared['created_at']))
+        self.assertEqual(list(prepared['day'].dt.day), [1, 1, 2, 3])
+        self.assertEqual(list(prepared['sentiment_category']), ['Positive', 'Negative', 'Neutral', 'Positive'])
+        self.assertEqual(list(prepared['total_engagement']), [12, 6, 11, 1])
+        self.assertIs(prepare_tweets(prepared), prepared)
+        pd.testing.assert_frame_equal(self.df, self.original)
+    
+    def test_charts_do_not_modify_input(self):
+        """Test that chart functions read raw and prepared frames without changing them"""
+        prepared = prepare_tweets(self.df)
+        prepared_copy = prepared.copy()
+        
+        for create in (charts.create_sentiment_chart, charts.create_volume_chart, charts.create_pie_chart,
+                       charts.create_engagement_chart, charts.create_product_comparison_chart):
+            self.assertIsNotNone(create(self.df))
+            self.assertIsNotNone(create(prepared))
+        
+        pd.testing.assert_frame_equal(self.df, self.original)
+        pd.testing.assert_frame_equal(prepared, prepared_copy)
+    
+    def test_filter_by_date(self):
+        """Test the inclusive date filter on raw and prepared frames"""
+        raw = filter_tweets_by_date(self.df, date(2024, 1, 1), date(2024, 1, 2))
+        prepared = filter_tweets_by_date(prepare_tweets(self.df), date(2024, 1, 1), date(2024, 1, 2))
+        
+        self.assertEqual(list(raw['text']), ['Great', 'Bad', 'Okay'])
+        self.assertEqual(list(prepared['text']), ['Great', 'Bad', 'Okay'])
+        pd.testing.assert_frame_equal(self.df, self.original)
+
+class TestEngagementChart(unittest.TestCase):
+    """Test the downsampled engagement scatter"""
+    
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        rows = 20000
+        self.df = prepare_tweets(pd.DataFrame({
+            'created_at': ['2024-01-01 12:00:00'] * rows,
+            'text': ['x' * 200] * rows,
+            'sentiment': np.round(rng.uniform(-0.5, 0.5, rows), 3),
+            'likes': rng.integers(0, 50, rows),
+            'retweets': rng.integers(0, 10, rows),
+            'product': ['iPhone 15'] * rows
+        }))
+        # A viral tweet and two extreme opinions
+        self.df.loc[[10, 20, 30], ['sentiment', 'total_engagement']] = [[0.0, 100000], [-1.0, 3], [1.0, 4]]
+    
+    def test_sample_keeps_outliers_within_budget(self):
+        """Test the point budget, outliers and coverage of sparse regions"""
+        sample = charts.sample_engagement_points(self.df, max_points=1000)
+        
+        self.assertLessEqual(len(sample), 1000)
+        self.assertTrue({10, 20, 30} <= set(sample.index))
+        self.assertGreater(sample['sentiment'].nunique(), 500)
+    
+    def test_auto_mode_bounds_payload(self):
+        """Test that a large frame is sent as a bounded WebGL sample"""
+        full = charts.create_engagement_chart(self.df, mode='scatter')
+        auto = charts.create_engagement_chart(self.df, mode='auto', max_points=1000)
+        
+        self.assertEqual(auto.data[0].type, 'scattergl')
+        self.assertLessEqual(len(auto.data[0].x), 1000)
+        self.assertLess(len(auto.to_json()), len(full.to_json()) / 10)
+    
+    def test_density_mode(self):
+        """Test the binned histogram with outliers drawn on top"""
+        fig = charts.create_engagement_chart(self.df, mode='density')
+        
+        self.assertEqual([trace.type for trace in fig.data], ['heatmap', 'scattergl'])
+        self.assertIn(100000, list(fig.data[1].y))
+    
+    def test_missing_engagement(self):
+        """Test that NaN engagement neither breaks sampling nor binning"""
+        self.df.loc[:99, 'total_engagement'] = np.nan
+        
+        self.assertLessEqual(len(charts.sample_engagement_points(self.df, max_points=1000)), 1000)
+        fig = charts.create_engagement_chart(self.df, mode='density')
+        self.assertIsNotNone(fig)
+        self.assertEqual(fig.data[0].type, 'heatmap')
+
 class TestDataProcessing(unittest.TestCase):
     """Test data processing functions"""
     
@@ -110,6 +358,10 @@ def run_all_tests():
     
     # Add test classes
     suite.addTests(loader.loadTestsFromTestCase(TestSentimentAnalysis))
+    suite.addTests(loader.loadTestsFromTestCase(TestBatchSentiment))
+    suite.addTests(loader.loadTestsFromTestCase(TestParallelSentiment))
+    suite.addTests(loader.loadTestsFromTestCase(TestSentimentBackends))
+    suite.addTests(loader.loadTestsFromTestCase(TestSentimentCache))
     suite.addTests(loader.loadTestsFromTestCase(TestUtils))
     suite.addTests(loader.loadTestsFromTestCase(TestDataProcessing))
     
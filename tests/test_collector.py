@@ -0,0 +1,201 @@
+import sys
+import os
+
+# Add src directory to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+import subprocess
+import unittest
+from types import SimpleNamespace
+import database
+from rate_limiter import TokenBucket
+from unittest import mock
+import tweet_collector
+from tweet_collector import iter_tweet_pages, collect_tweets_api
+from tests.test_database import DatabaseTestCase, make_tweet
+
+class FakePagingServer:
+    """In-process stand-in for the recent search endpoint.
+    
+    Serves `total` tweets newest first, honours since_id, max_results and
+    next_token, and can be told to fail on a given request.
+    """
+    
+    def __init__(self, total, fail_on_call=None):
+        self.ids = list(range(total, 0, -1))
+        self.fail_on_call = fail_on_call
+        self.calls = []
+    
+    def add_tweets(self, count):
+        newest = self.ids[0] if self.ids else 0
+        self.ids = list(range(newest + count, newest, -1)) + self.ids
+    
+    def search_recent_tweets(self, query, max_results, tweet_fields, since_id=None, next_token=None):
+        self.calls.append({'since_id': since_id, 'next_token': next_token, 'max_results': max_results})
+        if self.fail_on_call == len(self.calls):
+            raise ConnectionError("connection reset")
+        
+        ids = [i for i in self.ids if since_id is None or i > int(since_id)]
+        offset = int(next_token) if next_token else 0
+        page_ids = ids[offset:offset + max_results]
+        more = offset + max_results < len(ids)
+        
+        data = [
+            SimpleNamespace(id=i, created_at=f"2024-01-01 00:00:{i % 60:02d}", text=f"{query} tweet {i}",
+                            author_id=1, public_metrics={'like_count': i, 'retweet_count': 0})
+            for i in page_ids
+        ]
+        meta = {'result_count': len(data)}
+        if data:
+            meta['newest_id'] = str(ids[0])
+        if more:
+            meta['next_token'] = str(offset + max_results)
+        return SimpleNamespace(data=data or None, meta=meta)
+
+class TestPaginatedCollection(DatabaseTestCase):
+    """Test paginated, checkpointed collection against a fake paging server"""
+    
+    def setUp(self):
+        super().setUp()
+        self.limiter = TokenBucket(1000, 900)
+    
+    def collect(self, server, count):
+        return collect_tweets_api("Pixel 8", count, client=server, limiter=self.limiter)
+    
+    def test_follows_next_token(self):
+        """Test that more than one page of results is collected"""
+        server = FakePagingServer(250)
+        tweets = self.collect(server, 250)
+        
+        self.assertEqual(len(tweets), 250)
+        self.assertEqual(len({t['id'] for t in tweets}), 250)
+        self.assertEqual([call['next_token'] for call in server.calls], [None, '100', '200'])
+    
+    def test_pages_are_streamed(self):
+        """Test that the generator yields each page before fetching the next"""
+        server = FakePagingServer(250)
+        pages = iter_tweet_pages("Pixel 8", 250, client=server, limiter=self.limiter)
+        
+        self.assertEqual(len(next(pages)), 100)
+        self.assertEqual(len(server.calls), 1)
+    
+    def test_stops_at_count(self):
+        """Test that collection stops once count tweets arrived"""
+        server = FakePagingServer(500)
+        self.assertEqual(len(self.collect(server, 150)), 150)
+        self.assertEqual([call['max_results'] for call in server.calls], [100, 50])
+    
+    def test_rerun_only_requests_newer_tweets(self):
+        """Test that a finished run leaves since_id at the newest tweet"""
+        server = FakePagingServer(30)
+        self.collect(server, 100)
+        self.assertEqual(database.get_collection_state("Pixel 8")['since_id'], '30')
+        
+        server.add_tweets(5)
+        tweets = self.collect(server, 100)
+        
+        self.assertEqual(server.calls[-1]['since_id'], '30')
+        self.assertEqual(sorted(int(t['id']) for t in tweets), [31, 32, 33, 34, 35])
+    
+    def test_resume_after_interruption(self):
+        """Test that a failed run resumes from the saved next_token"""
+        server = FakePagingServer(250, fail_on_call=2)
+        self.assertEqual(len(self.collect(server, 250)), 100)
+        self.assertEqual(database.get_collection_state("Pixel 8")['next_token'], '100')
+        
+        server.fail_on_call = None
+        tweets = self.collect(server, 150)
+        
+        self.assertEqual(server.calls[-2]['next_token'], '100')
+        self.assertEqual(len(tweets), 150)
+        self.assertEqual(min(int(t['id']) for t in tweets), 1)
+        
+        state = database.get_collection_state("Pixel 8")
+        self.assertEqual(state['since_id'], '250')
+        self.assertIsNone(state['next_token'])
+
+class TestHighWaterMark(DatabaseTestCase):
+    """Test since_id high-water marks taken from the collection checkpoint"""
+    
+    def test_collect_tweets_passes_checkpointed_since_id(self):
+        """Test that collect_tweets only asks the API for tweets newer than the last run"""
+        database.save_collection_state("Pixel 8", since_id='20')
+        server = FakePagingServer(25)
+        
+        with mock.patch.object(tweet_collector, 'get_twitter_client', return_value=server):
+            tweets = tweet_collector.collect_tweets("Pixel 8", 100)
+        
+        self.assertEqual(server.calls[0]['since_id'], '20')
+        self.assertEqual(len(tweets), 5)
+    
+    def test_no_new_tweets_does_not_fall_back(self):
+        """Test that an up-to-date product does not get sample data"""
+        database.save_collection_state("Pixel 8", since_id='25')
+        
+        with mock.patch.object(tweet_collector, 'get_twitter_client', return_value=FakePagingServer(25)):
+            self.assertEqual(tweet_collector.collect_tweets("Pixel 8", 100), [])
+    
+    def test_sample_tweets_are_not_a_high_water_mark(self):
+        """Test that numeric sample ids never become the API since_id"""
+        sample = tweet_collector.generate_sample_tweets("Pixel 8", 20)
+        database.insert_tweets([dict(tweet, product="Pixel 8") for tweet in sample])
+        self.assertTrue(all(tweet['id'].isdigit() for tweet in sample))
+        self.assertIsNone(tweet_collector.get_since_id("Pixel 8"))
+        
+        server = FakePagingServer(5)
+        with mock.patch.object(tweet_collector, 'get_twitter_client', return_value=server):
+            tweets = tweet_collector.collect_tweets("Pixel 8", 100)
+            pages = list(tweet_collector.collect_tweet_pages("Pixel 8", 100))
+        
+        self.assertIsNone(server.calls[0]['since_id'])
+        self.assertEqual(len(tweets), 5)
+        self.assertEqual(server.calls[-1]['since_id'], '5')
+        self.assertEqual(pages, [])
+    
+    def test_filter_new_tweets(self):
+        """Test that already stored ids are dropped and counted"""
+        database.insert_tweets([make_tweet("1")])
+        new, skipped = database.filter_new_tweets([make_tweet("1"), make_tweet("2")])
+        
+        self.assertEqual([t['id'] for t in new], ["2"])
+        self.assertEqual(skipped, 1)
+
+class TestClientRegistry(unittest.TestCase):
+    """Test client reuse and lazy imports"""
+    
+    def tearDown(self):
+        tweet_collector.close_twitter_clients()
+    
+    @unittest.skipUnless(tweet_collector.TWEEPY_AVAILABLE, "tweepy not installed")
+    def test_client_reused_per_token(self):
+        """Test that one client is built per bearer token"""
+        with mock.patch.dict(os.environ, {'BEARER_TOKEN': 'token-a'}):
+            first = tweet_collector.get_twitter_client()
+            second = tweet_collector.get_twitter_client()
+        other = tweet_collector.get_twitter_client('token-b')
+        
+        self.assertIs(first, second)
+        self.assertIsNot(first, other)
+    
+    def test_no_token_means_no_client(self):
+        """Test that no client is created without a token"""
+        with mock.patch.dict(os.environ, {'BEARER_TOKEN': ''}):
+            self.assertIsNone(tweet_collector.get_twitter_client())
+    
+    def test_fallback_run_skips_heavy_imports(self):
+        """Test that a fallback-only collection never imports tweepy or aiohttp"""
+        script = (
+            "import sys; sys.path.insert(0, 'src'); "
+            "import pipeline; from tweet_collector import collect_tweets; "
+            "collect_tweets('Pixel 8', 5); "
+            "print(sorted(m for m in ('tweepy', 'aiohttp') if m in sys.modules))"
+        )
+        env = dict(os.environ, BEARER_TOKEN='')
+        root = os.path.join(os.path.dirname(__file__), '..')
+        output = subprocess.run([sys.executable, '-c', script], cwd=root, env=env,
+                                capture_output=True, text=True, check=True).stdout
+        
+        self.assertEqual(output.strip().splitlines()[-1], '[]')
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,512 @@
+import sys
+import os
+
+# Add src directory to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+import shutil
+import tempfile
+import threading
+import unittest
+import sqlite3
+import numpy as np
+import pandas as pd
+from pathlib import Path
+from datetime import date
+from unittest import mock
+import archive
+import database
+import migrations
+import timeseries
+from config import INSTRUMENTATION_CONFIG
+
+def make_tweet(tweet_id, product="iPhone 15", created_at="2024-01-01 10:00:00", sentiment=0.5):
+    """Build a tweet dict for tests"""
+    return {
+        'id': str(tweet_id),
+        'created_at': created_at,
+        'text': f"Tweet {tweet_id} about {product}",
+        'user_id': 'user_1',
+        'likes': 10,
+        'retweets': 2,
+        'sentiment': sentiment,
+        'product': product
+    }
+
+class DatabaseTestCase(unittest.TestCase):
+    """Base class that points the database module at a temporary file"""
+    
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.original_path = database.DATABASE_PATH
+        database.DATABASE_PATH = os.path.join(self.tmp_dir, "test.db")
+        self.original_archive_dir = database.ARCHIVE_DIR
+        database.ARCHIVE_DIR = os.path.join(self.tmp_dir, "archive")
+        database.create_table()
+        
+        # Keep run reports from pipeline runs out of logs/
+        patcher = mock.patch.dict(INSTRUMENTATION_CONFIG, report_dir=Path(self.tmp_dir) / "runs")
+        patcher.start()
+        self.addCleanup(patcher.stop)
+    
+    def tearDown(self):
+        database.close_connections()
+        database.DATABASE_PATH = self.original_path
+        database.ARCHIVE_DIR = self.original_archive_dir
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+class TestBulkInsert(DatabaseTestCase):
+    """Test the batched ingest path"""
+    
+    def test_insert_dicts_in_batches(self):
+        """Test that dict rows are written in batch_size chunks"""
+        tweets = [make_tweet(i) for i in range(25)]
+        summary = database.insert_tweets_bulk(tweets, batch_size=10)
+        
+        self.assertEqual(summary['inserted'], 25)
+        self.assertEqual(summary['rejected'], 0)
+        self.assertEqual(summary['batches'], 3)
+        self.assertEqual(database.count_tweets(), 25)
+    
+    def test_insert_columnar_arrays(self):
+        """Test that a dict of column arrays can be inserted"""
+        columns = {
+            'id': np.array(['1', '2', '3']),
+            'created_at': ['2024-01-01 10:00:00'] * 3,
+            'text': ['a', 'b', 'c'],
+            'likes': np.array([1, 2, 3]),
+            'sentiment': np.array([0.1, 0.2, 0.3]),
+            'product': ['Pixel 8'] * 3
+        }
+        summary = database.insert_tweets_bulk(columns)
+        
+        self.assertEqual(summary['inserted'], 3)
+        tweets = database.get_tweets_by_product('Pixel 8')
+        self.assertEqual(sorted(t['likes'] for t in tweets), [1, 2, 3])
+        self.assertTrue(all(t['user_id'] == 'unknown' for t in tweets))
+    
+    def test_rejects_reported_per_batch(self):
+        """Test that rows without an id are reported as batch rejects"""
+        tweets = [make_tweet(i) for i in range(5)]
+        tweets[3]['id'] = None
+        summary = database.insert_tweets_bulk(tweets, batch_size=2)
+        
+        self.assertEqual(summary['inserted'], 4)
+        self.assertEqual(summary['rejected'], 1)
+        self.assertEqual(len(summary['rejects']), 1)
+        self.assertEqual(summary['rejects'][0]['batch'], 1)
+    
+    def test_replace_existing_tweet(self):
+        """Test that re-inserting a tweet overwrites it"""
+        database.insert_tweets([make_tweet(1, sentiment=0.1)])
+        database.insert_tweets([make_tweet(1, sentiment=-0.4)])
+        
+        tweets = database.get_all_tweets()
+        self.assertEqual(len(tweets), 1)
+        self.assertAlmostEqual(tweets[0]['sentiment'], -0.4)
+
+class TestConnectionPool(DatabaseTestCase):
+    """Test pooled connections and WAL behaviour"""
+    
+    def test_wal_mode_enabled(self):
+        """Test that pooled connections use WAL journaling"""
+        with database.read_connection() as conn:
+            mode = conn.execute("PRAGMA journal_mode").fetchone()[0]
+        self.assertEqual(mode.lower(), 'wal')
+    
+    def test_reader_is_reused_per_thread(self):
+        """Test that a thread gets the same reader connection each time"""
+        with database.read_connection() as first, database.read_connection() as second:
+            self.assertIs(first, second)
+    
+    def test_reader_not_blocked_by_open_write(self):
+        """Test that readers see committed data while a write is in progress"""
+        database.insert_tweets([make_tweet(1)])
+        counts = []
+        
+        with database.write_connection() as conn:
+            conn.execute(database.INSERT_TWEET_SQL, tuple(make_tweet(2)[c] for c in database.TWEET_COLUMNS))
+            
+            reader = threading.Thread(target=lambda: counts.append(database.count_tweets()))
+            reader.start()
+            reader.join(timeout=5)
+        
+        self.assertEqual(counts, [1])
+        self.assertEqual(database.count_tweets(), 2)
+    
+    def test_reader_closed_when_thread_exits(self):
+        """Test that short-lived threads (e.g. Streamlit reruns) do not leak readers"""
+        database.insert_tweets([make_tweet(1)])
+        database.count_tweets()
+        pool = database.get_pool()
+        before = pool.stats()['readers']
+        
+        for _ in range(20):
+            thread = threading.Thread(target=database.get_tweet_metrics)
+            thread.start()
+            thread.join()
+        
+        self.assertEqual(pool.stats()['readers'], before)
+    
+    def test_concurrent_get_pool_builds_one_pool(self):
+        """Test that threads racing on first use share a single pool"""
+        database.close_connections()
+        pools = []
+        barrier = threading.Barrier(8)
+        
+        def worker():
+            barrier.wait()
+            pools.append(database.get_pool())
+        
+        threads = [threading.Thread(target=worker) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        
+        self.assertEqual(len({id(pool) for pool in pools}), 1)
+    
+    def test_write_rolls_back_on_error(self):
+        """Test that a failed write block leaves no partial rows"""
+        with self.assertRaises(RuntimeError):
+            with database.write_connection() as conn:
+                conn.execute(database.INSERT_TWEET_SQL, tuple(make_tweet(1)[c] for c in database.TWEET_COLUMNS))
+                raise RuntimeError("boom")
+        
+        self.assertEqual(database.count_tweets(), 0)
+
+class TestAggregations(DatabaseTestCase):
+    """Test SQL aggregations against the pandas equivalents"""
+    
+    def setUp(self):
+        super().setUp()
+        self.tweets = [
+            make_tweet(1, created_at="2024-01-01 09:00:00", sentiment=0.5),
+            make_tweet(2, created_at="2024-01-01 18:00:00", sentiment=-0.3),
+            make_tweet(3, created_at="2024-01-02 12:00:00", sentiment=0.05),
+            make_tweet(4, created_at="2024-01-03 23:59:59", sentiment=0.8),
+            make_tweet(5, product="Pixel 8", created_at="2024-01-02 08:00:00", sentiment=-0.9),
+        ]
+        database.insert_tweets(self.tweets)
+    
+    def test_daily_sentiment(self):
+        """Test average sentiment per day for one product"""
+        daily = timeseries.get_series('iPhone 15', resolution='day')
+        
+        self.assertEqual(list(daily['time'].dt.date), [date(2024, 1, 1), date(2024, 1, 2), date(2024, 1, 3)])
+        self.assertAlmostEqual(daily['sentiment'][0], 0.1)
+    
+    def test_daily_volume_with_date_range(self):
+        """Test that the end date includes the whole day"""
+        volume = timeseries.get_series('iPhone 15', date(2024, 1, 2), date(2024, 1, 3), resolution='day')
+        self.assertEqual(list(volume['count']), [1, 1])
+    
+    def test_label_distribution(self):
+        """Test label counts use the configured thresholds"""
+        labels = database.get_label_distribution('iPhone 15')
+        counts = dict(zip(labels['sentiment_category'], labels['count']))
+        self.assertEqual(counts, {'Positive': 2, 'Negative': 1, 'Neutral': 1})
+    
+    def test_metrics_match_calculate_metrics(self):
+        """Test SQL metrics against utils.calculate_metrics"""
+        from utils import calculate_metrics
+        
+        df = pd.DataFrame([t for t in self.tweets if t['product'] == 'iPhone 15'])
+        expected = calculate_metrics(df)
+        metrics = database.get_tweet_metrics('iPhone 15')
+        
+        self.assertEqual(set(metrics), set(expected))
+        for key, value in expected.items():
+            self.assertAlmostEqual(metrics[key], value)
+    
+    def test_product_summaries(self):
+        """Test per-product summaries"""
+        summary = database.get_product_summaries()
+        self.assertEqual(list(summary['product']), ['Pixel 8', 'iPhone 15'])
+        self.assertEqual(list(summary['tweets']), [1, 4])
+    
+    def test_date_bounds_and_recent(self):
+        """Test date bounds and most recent tweets"""
+        self.assertEqual(database.get_date_bounds('iPhone 15'), (date(2024, 1, 1), date(2024, 1, 3)))
+        self.assertEqual(list(database.get_recent_tweets('iPhone 15', limit=2)['id']), ['4', '3'])
+    
+    def test_tweets_frame_is_prepared(self):
+        """Test that the chart frame comes back parsed, filtered and oldest first"""
+        frame = database.get_tweets_frame('iPhone 15', date(2024, 1, 1), date(2024, 1, 2))
+        
+        self.assertEqual(list(frame['id']), ['1', '2', '3'])
+        self.assertTrue(pd.api.types.is_datetime64_any_dtype(frame['created_at']))
+        self.assertEqual(list(frame['sentiment_category']), ['Positive', 'Negative', 'Neutral'])
+    
+    def test_tweets_frame_skips_undated_tweets(self):
+        """Test that a tweet without created_ts does not empty the unfiltered frame"""
+        database.insert_tweets([make_tweet(6, created_at="not a date")])
+        frame = database.get_tweets_frame('iPhone 15')
+        
+        self.assertEqual(list(frame['id']), ['1', '2', '3', '4'])
+
+class TestDailyRollups(DatabaseTestCase):
+    """Test that daily_rollups stays equal to a rebuild from the raw tweets"""
+    
+    def rollups(self, table='daily_rollups'):
+        key = database.ROLLUP_TABLES[table][0]
+        with database.read_connection() as conn:
+            df = pd.read_sql_query(f"SELECT * FROM {table} ORDER BY product, {key}", conn)
+        return df.round(9).to_dict('list')
+    
+    def assert_matches_rebuild(self):
+        incremental = {table: self.rollups(table) for table in database.ROLLUP_TABLES}
+        database.rebuild_rollups()
+        for table in database.ROLLUP_TABLES:
+            self.assertEqual(incremental[table], self.rollups(table), table)
+    
+    def test_inserts_update_rollups(self):
+        """Test per product/day counts, sums and labels after several inserts"""
+        database.insert_tweets([make_tweet(i, created_at=f"2024-01-0{1 + i % 3} 12:00:00", sentiment=i / 10 - 0.5)
+                                for i in range(10)])
+        database.insert_tweets([make_tweet(i, product="Pixel 8", sentiment=None) for i in range(10, 13)])
+        
+        rollups = self.rollups()
+        self.assertEqual(rollups['tweets'], [3, 4, 3, 3])
+        self.assertEqual(rollups['sentiment_n'], [0, 4, 3, 3])
+        self.assertEqual(database.get_label_distribution('Pixel 8').to_dict('list'),
+                         {'sentiment_category': ['Neutral'], 'count': [3]})
+        self.assert_matches_rebuild()
+    
+    def test_replace_moves_tweet(self):
+        """Test that overwriting a tweet removes its old product/day contribution"""
+        database.insert_tweets([make_tweet(1, sentiment=0.5), make_tweet(2, sentiment=0.3)])
+        database.insert_tweets([make_tweet(1, product="Pixel 8", created_at="2024-01-05 08:00:00", sentiment=-0.5),
+                                make_tweet(2, sentiment=-0.3)])
+        
+        self.assertEqual(database.get_tweet_metrics('iPhone 15')['negative_tweets'], 1)
+        daily = timeseries.get_series('Pixel 8', resolution='day')
+        self.assertEqual(daily[['time', 'count']].to_dict('list'), {'time': [pd.Timestamp(2024, 1, 5)], 'count': [1]})
+        self.assertEqual(len(self.rollups()['day']), 2)
+        self.assert_matches_rebuild()
+    
+    def test_rejected_rows_not_counted(self):
+        """Test that rows rejected inside a batch leave the rollups untouched"""
+        database.insert_tweets([make_tweet(1, sentiment=0.5)])
+        bad = make_tweet(2)
+        bad['text'] = object()
+        database.insert_tweets_bulk([make_tweet(1, sentiment=-0.5), bad, make_tweet(3)])
+        
+        self.assertEqual(database.get_tweet_metrics('iPhone 15')['total_tweets'], 2)
+        self.assert_matches_rebuild()
+    
+    def test_undated_product_still_listed(self):
+        """Test that a product whose tweets have no created_ts still shows up"""
+        database.insert_tweets([make_tweet(1), make_tweet(2, product="Pixel 8", created_at="not a date")])
+        
+        self.assertEqual(len(self.rollups()['day']), 1)
+        self.assertEqual(sorted(database.get_products()), ["Pixel 8", "iPhone 15"])
+
+@unittest.skipUnless(archive.PYARROW_AVAILABLE, "pyarrow not installed")
+class TestArchiveTier(DatabaseTestCase):
+    """Test that queries span the SQLite table and the Parquet archive"""
+    
+    def setUp(self):
+        super().setUp()
+        self.tweets = [
+            make_tweet(f"{product}-{day}-{hour}", product=product,
+                       created_at=f"2024-01-{day:02d} {hour:02d}:00:00",
+                       sentiment=round((day * 7 + hour) % 21 / 10 - 1, 1))
+            for product in ("iPhone 15", "Pixel 8")
+            for day in range(1, 11)
+            for hour in (3, 12, 21)
+        ]
+        database.insert_tweets(self.tweets)
+    
+    def snapshot(self):
+        """Every dashboard query, for comparing before and after archiving"""
+        window = dict(product="iPhone 15", start_date=date(2024, 1, 3), end_date=date(2024, 1, 8))
+        return {
+            'count': database.count_tweets(),
+            'products': sorted(database.get_products()),
+            'bounds': database.get_date_bounds("Pixel 8"),
+            'metrics': {key: round(value, 9) for key, value in database.get_tweet_metrics(**window).items()},
+            'daily_series': timeseries.get_series(**window, resolution='day').round({'sentiment': 9}).to_dict('list'),
+            'labels': database.get_label_distribution(**window).set_index('sentiment_category')['count'].to_dict(),
+            'summaries': database.get_product_summaries().round(9).to_dict('list'),
+            'recent': list(database.get_recent_tweets(**window, limit=4)['id']),
+            'all_ids': [tweet['id'] for tweet in database.get_all_tweets()],
+            'product_ids': [tweet['id'] for tweet in database.get_tweets_by_product("Pixel 8")],
+            'frame_ids': list(database.get_tweets_frame(**window)['id']),
+        }
+    
+    def test_queries_unchanged_after_archiving(self):
+        """Test that moving old tweets to Parquet does not change any result"""
+        before = self.snapshot()
+        moved = database.archive_tweets(date(2024, 1, 6), batch_size=7)
+        
+        self.assertEqual(moved, 2 * 5 * 3)
+        with database.read_connection() as conn:
+            self.assertEqual(conn.execute("SELECT COUNT(*) FROM tweets").fetchone()[0], 30)
+        
+        after = self.snapshot()
+        for key in before:
+            self.assertEqual(after[key], before[key], key)
+        
+        # Rollups cover both tiers, so a rebuild from them changes nothing
+        database.rebuild_rollups()
+        self.assertEqual(self.snapshot(), before)
+    
+    def test_fully_archived_product(self):
+        """Test a product whose tweets are all archived"""
+        database.archive_tweets(date(2024, 2, 1))
+        self.assertEqual(database.get_products(), ["Pixel 8", "iPhone 15"])
+        self.assertEqual(database.get_date_bounds("iPhone 15"), (date(2024, 1, 1), date(2024, 1, 10)))
+        self.assertEqual(list(database.get_recent_tweets("iPhone 15", limit=1)['id']), ["iPhone 15-10-21"])
+    
+    def test_recollected_archived_tweet_not_stored_again(self):
+        """Test that re-inserting an archived tweet changes neither tier nor the rollups"""
+        database.archive_tweets(date(2024, 1, 6))
+        before = self.snapshot()
+        
+        again = [self.tweets[0], make_tweet("new", created_at="2024-01-02 08:00:00")]
+        new, skipped = database.filter_new_tweets(again)
+        self.assertEqual([tweet['id'] for tweet in new], ["new"])
+        self.assertEqual(skipped, 1)
+        
+        summary = database.insert_tweets_bulk([self.tweets[0]])
+        self.assertEqual((summary['inserted'], summary['archived'], summary['rejected']), (0, 1, 0))
+        self.assertEqual(self.snapshot(), before)
+        self.assertEqual(database.get_tweet_metrics()['total_tweets'], 60)
+    
+    def test_archived_ids_backfilled_on_upgrade(self):
+        """Test that upgrading a database with an archive records the archived ids"""
+        database.archive_tweets(date(2024, 1, 6))
+        with database.write_connection() as conn:
+            conn.execute("DROP TABLE archived_ids")
+            conn.execute("PRAGMA user_version = 7")
+        
+        self.assertEqual(database.create_table(), [8])
+        database.insert_tweets_bulk(self.tweets)
+        self.assertEqual(database.count_tweets(), 60)
+    
+    def test_archiving_twice_does_not_duplicate(self):
+        """Test that re-archiving the same rows (an interrupted run) merges by id"""
+        rows = pd.DataFrame(self.tweets[:6])
+        rows['created_ts'] = (pd.to_datetime(rows['created_at']) - pd.Timestamp(0)) // pd.Timedelta(seconds=1)
+        archive.write_partitions(database.ARCHIVE_DIR, rows)
+        archive.write_partitions(database.ARCHIVE_DIR, rows)
+        
+        self.assertEqual(archive.count_rows(database.ARCHIVE_DIR), 6)
+        self.assertEqual(len(os.listdir(archive.partition_path(database.ARCHIVE_DIR, "iPhone 15", "2024-01-01"))), 1)
+    
+    def test_partition_and_column_pruning(self):
+        """Test that a product/date query never opens other partitions"""
+        database.archive_tweets(date(2024, 2, 1))
+        
+        # Corrupt every partition the query below must not touch
+        for product in ("iPhone 15", "Pixel 8"):
+            for day in range(1, 11):
+                if product == "iPhone 15" and 4 <= day <= 5:
+                    continue
+                path = os.path.join(archive.partition_path(database.ARCHIVE_DIR, product, f"2024-01-{day:02d}"),
+                                    archive.PARTITION_FILE)
+                with open(path, 'wb') as f:
+                    f.write(b"not parquet")
+        
+        frame = archive.scan(database.ARCHIVE_DIR, ['sentiment'], "iPhone 15", date(2024, 1, 4), date(2024, 1, 5))
+        self.assertEqual(list(frame.columns), ['sentiment'])
+        self.assertEqual(len(frame), 6)
+
+class TestPersistentSentimentCache(DatabaseTestCase):
+    """Test the SQLite tier of the sentiment cache"""
+    
+    def test_scores_survive_new_cache(self):
+        """Test that a fresh cache finds scores stored by an earlier one"""
+        from sentiment_cache import SentimentCache
+        
+        SentimentCache(persistent=True).put_many('textblob:v1', {'love it': 0.5, 'meh': 0.0})
+        
+        cache = SentimentCache(persistent=True)
+        self.assertEqual(cache.get_many('textblob:v1', ['love it', 'meh', 'new']), {'love it': 0.5, 'meh': 0.0})
+        self.assertEqual(cache.stats()['persistent_hits'], 2)
+        self.assertEqual(cache.stats()['misses'], 1)
+    
+    def test_namespace_change_clears_table(self):
+        """Test that switching analyzer removes scores from the old one"""
+        from sentiment_cache import SentimentCache
+        
+        SentimentCache(persistent=True).put('textblob:v1', 'love it', 0.5)
+        cache = SentimentCache(persistent=True)
+        self.assertIsNone(cache.get('vader:v1', 'love it'))
+        
+        with database.read_connection() as conn:
+            self.assertEqual(conn.execute("SELECT COUNT(*) FROM sentiment_cache").fetchone()[0], 0)
+
+class TestMigrations(unittest.TestCase):
+    """Test versioned schema upgrades"""
+    
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.original_path = database.DATABASE_PATH
+        database.DATABASE_PATH = os.path.join(self.tmp_dir, "legacy.db")
+        self.original_archive_dir = database.ARCHIVE_DIR
+        database.ARCHIVE_DIR = os.path.join(self.tmp_dir, "archive")
+    
+    def tearDown(self):
+        database.close_connections()
+        database.DATABASE_PATH = self.original_path
+        database.ARCHIVE_DIR = self.original_archive_dir
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+    
+    def test_version_of_unmigrated_database(self):
+        """Test that a database without the db_version table reads as version 0"""
+        self.assertEqual(database.get_db_version(), 0)
+        self.assertEqual(database.get_products(), [])
+    
+    def test_upgrade_legacy_table(self):
+        """Test that a pre-versioning table is upgraded in place"""
+        conn = sqlite3.connect(database.DATABASE_PATH)
+        conn.execute("CREATE TABLE tweets (id TEXT PRIMARY KEY, created_at TEXT, text TEXT, "
+                     "likes INTEGER, retweets INTEGER, sentiment REAL, product TEXT)")
+        conn.execute("INSERT INTO tweets VALUES ('1', '2024-01-02 00:00:00', 'hi', 1, 0, 0.2, 'Pixel 8')")
+        conn.commit()
+        conn.close()
+        
+        applied = database.create_table()
+        self.assertEqual(applied, [v for v, *_ in migrations.MIGRATIONS])
+        
+        with database.read_connection() as conn:
+            self.assertEqual(migrations.get_schema_version(conn), migrations.LATEST_VERSION)
+            row = conn.execute("SELECT user_id, created_ts FROM tweets").fetchone()
+        
+        self.assertEqual(row, ('unknown', 1704153600))
+        daily = timeseries.get_series('Pixel 8', resolution='day')
+        self.assertEqual(daily[['time', 'count']].to_dict('list'), {'time': [pd.Timestamp(2024, 1, 2)], 'count': [1]})
+    
+    def test_migrate_is_incremental(self):
+        """Test that running migrations twice applies nothing the second time"""
+        self.assertEqual(database.create_table(), [v for v, *_ in migrations.MIGRATIONS])
+        self.assertEqual(database.create_table(), [])
+    
+    def test_post_migration_hooks(self):
+        """Test that backfills follow the applied migrations and run once each"""
+        self.assertEqual(migrations.post_migration_hooks([1, 2, 3, 4, 5]), [])
+        self.assertEqual(migrations.post_migration_hooks([6, 7, 8]),
+                         [migrations._rebuild_rollups, migrations._backfill_archived_ids])
+        
+        with mock.patch.object(database, 'rebuild_rollups') as rebuild:
+            database.create_table()
+        rebuild.assert_called_once_with()
+    
+    def test_product_query_uses_index(self):
+        """Test that product/time queries use the composite index"""
+        database.create_table()
+        
+        with database.read_connection() as conn:
+            plan = conn.execute(
+                "EXPLAIN QUERY PLAN SELECT * FROM tweets WHERE product = ? ORDER BY created_ts DESC",
+                ['iPhone 15']
+            ).fetchall()
+        
+        details = ' '.join(row[-1] for row in plan)
+        self.assertIn('idx_tweets_product_created_ts', details)
+        self.assertNotIn('TEMP B-TREE', details)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,143 @@
+import sys
+import os
+
+# Add src directory to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+import unittest
+import threading
+import database
+from figure_cache import FigureCache, get_figure_cache
+from config import CHART_CONFIG
+from tests.test_database import DatabaseTestCase, make_tweet
+
+class TestFigureCache(unittest.TestCase):
+    """Test the LRU cache shared by dashboard sessions"""
+
+    def build(self, value):
+        """Build function that records each call"""
+        def build():
+            self.builds.append(value)
+            return value
+        return build
+
+    def setUp(self):
+        self.builds = []
+        self.cache = FigureCache(maxsize=3)
+
+    def test_hit_skips_build(self):
+        """Test that a repeated key returns the first result without rebuilding"""
+        key = ('sentiment_chart', 'iPhone 15', '2024-01-01', '2024-01-31', 'day')
+        first = self.cache.get_or_build(1, key, self.build(object()))
+        second = self.cache.get_or_build(1, key, self.build(object()))
+
+        self.assertIs(first, second)
+        self.assertEqual(len(self.builds), 1)
+        self.assertEqual(self.cache.stats()['hits'], 1)
+        self.assertEqual(self.cache.stats()['misses'], 1)
+
+    def test_options_are_part_of_the_key(self):
+        """Test that different chart options are cached separately"""
+        self.cache.get_or_build(1, ('series', 'Pixel 8', 'day'), self.build('day'))
+        self.assertEqual(self.cache.get_or_build(1, ('series', 'Pixel 8', 'hour'), self.build('hour')), 'hour')
+        self.assertEqual(self.builds, ['day', 'hour'])
+
+    def test_none_is_cached(self):
+        """Test that an empty chart (None) is cached like any other figure"""
+        self.cache.get_or_build(1, 'empty', self.build(None))
+        self.assertIsNone(self.cache.get_or_build(1, 'empty', self.build('rebuilt')))
+        self.assertEqual(self.builds, [None])
+
+    def test_lru_eviction(self):
+        """Test that the least recently used entry is evicted first"""
+        for key in 'abc':
+            self.cache.get_or_build(1, key, self.build(key))
+        self.cache.get_or_build(1, 'a', self.build('a'))
+        self.cache.get_or_build(1, 'd', self.build('d'))
+
+        stats = self.cache.stats()
+        self.assertEqual(stats['size'], 3)
+        self.assertEqual(stats['evictions'], 1)
+
+        self.builds.clear()
+        self.cache.get_or_build(1, 'a', self.build('a'))
+        self.cache.get_or_build(1, 'b', self.build('b'))
+        self.assertEqual(self.builds, ['b'])
+
+    def test_new_version_invalidates(self):
+        """Test that a new data version drops figures built from old data"""
+        self.cache.get_or_build(1, 'a', self.build('old'))
+        self.assertEqual(self.cache.get_or_build(2, 'a', self.build('new')), 'new')
+        self.assertEqual(self.cache.stats()['version'], 2)
+        self.assertEqual(self.cache.stats()['size'], 1)
+
+    def test_older_version_does_not_invalidate(self):
+        """Test that a session on an older version neither clears nor fills the cache"""
+        self.cache.get_or_build(6, 'a', self.build('new'))
+        self.assertEqual(self.cache.get_or_build(5, 'a', self.build('old')), 'old')
+        self.assertEqual(self.cache.get_or_build(6, 'a', self.build('rebuilt')), 'new')
+
+        stats = self.cache.stats()
+        self.assertEqual(self.builds, ['new', 'old'])
+        self.assertEqual((stats['version'], stats['hits'], stats['invalidations']), (6, 1, 1))
+
+    def test_stale_build_is_not_stored(self):
+        """Test that a result built for an outdated version is returned but not cached"""
+        def slow_build():
+            self.cache.get_or_build(2, 'other', self.build('other'))
+            return 'stale'
+
+        self.assertEqual(self.cache.get_or_build(1, 'a', slow_build), 'stale')
+        self.assertEqual(self.cache.get_or_build(2, 'a', self.build('fresh')), 'fresh')
+
+    def test_concurrent_sessions(self):
+        """Test that concurrent lookups keep the cache bounded and consistent"""
+        cache = FigureCache(maxsize=8)
+
+        def session(n):
+            for i in range(200):
+                key = (n + i) % 12
+                self.assertEqual(cache.get_or_build(1, key, lambda: key * 10), key * 10)
+
+        threads = [threading.Thread(target=session, args=(n,)) for n in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        stats = cache.stats()
+        self.assertLessEqual(stats['size'], 8)
+        self.assertEqual(stats['hits'] + stats['misses'], 800)
+
+    def test_shared_instance_follows_config(self):
+        """Test that the module-level cache is shared and resized from config"""
+        self.assertIs(get_figure_cache(), get_figure_cache())
+
+        size = CHART_CONFIG["figure_cache_size"]
+        try:
+            CHART_CONFIG["figure_cache_size"] = size + 1
+            self.assertEqual(get_figure_cache().maxsize, size + 1)
+        finally:
+            CHART_CONFIG["figure_cache_size"] = size
+
+class TestFigureCacheVersion(DatabaseTestCase):
+    """Test that pipeline writes invalidate cached dashboard aggregates"""
+
+    def test_insert_invalidates_metrics(self):
+        cache = FigureCache()
+        key = ('metrics', 'iPhone 15')
+
+        def metrics():
+            return cache.get_or_build(database.get_db_version(), key,
+                                      lambda: database.get_tweet_metrics('iPhone 15'))
+
+        database.insert_tweets([make_tweet("1")])
+        self.assertEqual(metrics()['total_tweets'], 1)
+        self.assertEqual(metrics()['total_tweets'], 1)
+
+        database.insert_tweets([make_tweet("2")])
+        self.assertEqual(metrics()['total_tweets'], 2)
+        self.assertEqual(cache.stats()['hits'], 1)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,134 @@
+import sys
+import os
+
+# Add src directory to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+import json
+import time
+import threading
+import unittest
+from unittest import mock
+import database
+import pipeline
+import instrumentation
+from instrumentation import Histogram, instrumented_run, metrics, timed
+from config import INSTRUMENTATION_CONFIG
+from tests.test_database import DatabaseTestCase
+from tests.test_pipeline import fake_collect
+
+class TestMetrics(unittest.TestCase):
+    """Test timers, counters and histograms"""
+    
+    def setUp(self):
+        metrics.reset()
+        self.addCleanup(metrics.reset)
+    
+    def test_timed_context_manager_and_decorator(self):
+        """Test that both forms record one observation per use"""
+        @timed("test.decorated")
+        def work(x):
+            return x * 2
+        
+        with timed("test.block"):
+            time.sleep(0.01)
+        self.assertEqual(work(3), 6)
+        self.assertEqual(work.__name__, "work")
+        
+        timers = metrics.snapshot()['timers']
+        self.assertEqual(timers['test.block']['count'], 1)
+        self.assertGreaterEqual(timers['test.block']['total'], 0.01)
+        self.assertEqual(timers['test.decorated']['count'], 1)
+    
+    def test_timed_records_on_error(self):
+        """Test that a raising body is still timed"""
+        with self.assertRaises(ValueError):
+            with timed("test.failing"):
+                raise ValueError("boom")
+        self.assertEqual(metrics.snapshot()['timers']['test.failing']['count'], 1)
+    
+    def test_counters_are_thread_safe(self):
+        """Test that concurrent increments are not lost"""
+        def bump():
+            for _ in range(1000):
+                instrumentation.count("test.counter")
+        
+        threads = [threading.Thread(target=bump) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(metrics.snapshot()['counters']['test.counter'], 4000)
+    
+    def test_histogram_quantiles(self):
+        """Test bucket counts and quantile estimates"""
+        histogram = Histogram(bounds=(1, 10, 100))
+        for value in [0.5] * 50 + [5] * 45 + [500] * 5:
+            histogram.add(value)
+        
+        snapshot = histogram.snapshot()
+        self.assertEqual(snapshot['count'], 100)
+        self.assertEqual(snapshot['buckets'], {'<=1': 50, '<=10': 45, '>100': 5})
+        self.assertEqual(snapshot['p50'], 1)
+        self.assertEqual(snapshot['p95'], 10)
+        self.assertEqual(snapshot['max'], 500)
+    
+    def test_disabled_records_nothing(self):
+        """Test that instrumentation can be switched off"""
+        with mock.patch.dict(INSTRUMENTATION_CONFIG, enabled=False):
+            instrumentation.count("test.off")
+            with timed("test.off"):
+                pass
+        self.assertEqual(metrics.snapshot(), {'counters': {}, 'timers': {}})
+
+class TestRunReport(DatabaseTestCase):
+    """Test the JSON run report and opt-in profiling"""
+    
+    def load_report(self, run):
+        with open(run['report_path']) as f:
+            return json.load(f)
+    
+    def test_report_written_with_profile(self):
+        """Test that a profiled run writes its report and .prof file"""
+        with instrumented_run("unit test", profile=True) as run:
+            with timed("test.step"):
+                sum(range(1000))
+            run['result'] = {'ok': True}
+        
+        report = self.load_report(run)
+        self.assertEqual(report['name'], "unit test")
+        self.assertEqual(report['result'], {'ok': True})
+        self.assertIn('test.step', report['metrics']['timers'])
+        self.assertTrue(report['profile'])
+        self.assertTrue(os.path.exists(run['report_path'].replace('.json', '.prof')))
+    
+    def test_report_records_error(self):
+        """Test that a failing run still leaves a report"""
+        with self.assertRaises(RuntimeError):
+            with instrumented_run("failing", profile=False) as run:
+                raise RuntimeError("stage exploded")
+        
+        report = self.load_report(run)
+        self.assertEqual(report['error'], "RuntimeError: stage exploded")
+        self.assertNotIn('profile', report)
+    
+    def test_pipeline_report_covers_modules(self):
+        """Test that a pipeline run records collector, analyzer, database and stage metrics"""
+        with mock.patch.object(pipeline, 'collect_tweet_pages', side_effect=fake_collect):
+            report = pipeline.run_full_pipeline(["Pixel 8", "iPhone 15"], 10)
+        
+        runs = list((INSTRUMENTATION_CONFIG["report_dir"]).glob("full-pipeline-*.json"))
+        self.assertEqual(len(runs), 1)
+        with open(runs[0]) as f:
+            saved = json.load(f)
+        
+        timers = saved['metrics']['timers']
+        for name in ('pipeline.score', 'pipeline.write', 'sentiment.analyze_batch',
+                     'db.insert_tweets_bulk', 'db.filter_new_tweets'):
+            self.assertIn(name, timers)
+        self.assertEqual(saved['metrics']['counters']['db.rows_inserted'], 20)
+        self.assertEqual(saved['result']['products'], report['products'])
+        self.assertEqual(database.count_tweets(), 20)
+
+if __name__ == "__main__":
+    unittest.main()
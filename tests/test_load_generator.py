@@ -0,0 +1,154 @@
+import sys
+import os
+
+# Add src directory to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+import shutil
+import tempfile
+import unittest
+from datetime import datetime
+import numpy as np
+import pandas as pd
+import database
+import load_generator
+from load_generator import LoadGenerator, parse_product_mix
+from tweet_collector import generate_sample_tweets
+from tests.test_database import DatabaseTestCase
+
+START = datetime(2024, 1, 1)
+
+def make_generator(**kwargs):
+    kwargs.setdefault('start', START)
+    kwargs.setdefault('seed', 7)
+    kwargs.setdefault('sequence_start', 0)
+    kwargs.setdefault('with_sentiment', False)
+    return LoadGenerator(**kwargs)
+
+class TestLoadGenerator(unittest.TestCase):
+    """Test the vectorized synthetic tweet generator"""
+    
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmp_dir, ignore_errors=True)
+    
+    def test_seeded_output_is_reproducible(self):
+        """Test that the same seed, start and sequence give identical rows"""
+        first = make_generator().chunk(1000)
+        second = make_generator().chunk(1000)
+        pd.testing.assert_frame_equal(first, second)
+        self.assertFalse(make_generator(seed=8).chunk(1000).equals(first))
+    
+    def test_ids_unique_and_time_ordered(self):
+        """Test that ids never repeat across chunks or generators and sort with time"""
+        frames = list(make_generator().iter_chunks(50000, chunk_size=7000))
+        frames.append(LoadGenerator(start=START, seed=7, with_sentiment=False).chunk(5000))
+        frames.append(LoadGenerator(start=START, seed=7, with_sentiment=False).chunk(5000))
+        ids = pd.concat(frames)['id']
+        self.assertTrue(ids.is_unique)
+        
+        frame = frames[0]
+        order = frame['id'].astype(np.int64).argsort(kind='stable')
+        self.assertTrue(frame['created_at'].iloc[order].is_monotonic_increasing)
+    
+    def test_ids_decode_to_created_at(self):
+        """Test that ids follow the snowflake layout of their own timestamps"""
+        frame = make_generator(worker=5).chunk(5000)
+        ids = frame['id'].astype(np.int64).to_numpy()
+        decoded = pd.to_datetime((ids >> 22) + load_generator.TWITTER_EPOCH_MS, unit='ms').floor('s')
+        
+        self.assertTrue((decoded == pd.to_datetime(frame['created_at']).to_numpy()).all())
+        self.assertTrue(((ids >> 12) & 0x3FF == 5).all())
+    
+    def test_workers_keep_processes_apart(self):
+        """Test that identical tweets from runs restarting the sequence at 0 differ by worker"""
+        first = make_generator(worker=1).chunk(1000)
+        second = make_generator(worker=2).chunk(1000)
+        
+        self.assertTrue(first['created_at'].equals(second['created_at']))
+        self.assertFalse(set(first['id']) & set(second['id']))
+    
+    def test_product_and_sentiment_mix(self):
+        """Test that weights control the product and template shares"""
+        generator = make_generator(
+            products={"iPhone 15": 3, "Pixel 8": 1},
+            sentiment_mix={'positive': 1, 'negative': 0, 'neutral': 0}
+        )
+        frame = generator.chunk(20000)
+        share = (frame['product'] == "iPhone 15").mean()
+        self.assertAlmostEqual(share, 0.75, delta=0.02)
+        positive_texts = set(generator.texts[:, 0, :].ravel())
+        self.assertTrue(frame['text'].isin(positive_texts).all())
+    
+    def test_launch_and_diurnal_volume(self):
+        """Test that volume peaks on launch day and in the evening"""
+        frame = make_generator(days=14).chunk(50000)
+        created = pd.to_datetime(frame['created_at'])
+        per_day = created.dt.day.value_counts()
+        per_hour = created.dt.hour.value_counts()
+        
+        self.assertEqual(created.min().date(), START.date())
+        self.assertLess(created.max(), pd.Timestamp("2024-01-15"))
+        self.assertGreater(per_day[1], 3 * per_day[14])
+        self.assertGreater(per_hour[19], 3 * per_hour[7])
+    
+    def test_engagement_is_heavy_tailed(self):
+        """Test non-negative engagement with retweets below likes and a long tail"""
+        frame = make_generator().chunk(20000)
+        self.assertTrue((frame['likes'] >= 0).all())
+        self.assertTrue((frame['retweets'] <= frame['likes']).all())
+        self.assertGreater(frame['likes'].max(), 10 * frame['likes'].median())
+    
+    def test_template_sentiment(self):
+        """Test that rows carry the score of their template text"""
+        frame = make_generator(with_sentiment=True).chunk(500)
+        self.assertFalse(frame['sentiment'].isna().any())
+        self.assertTrue(frame['sentiment'].between(-1, 1).all())
+    
+    def test_to_csv_streams_chunks(self):
+        """Test that chunked CSV output contains every row once"""
+        path = os.path.join(self.tmp_dir, "load.csv")
+        written = make_generator().to_csv(path, 2500, chunk_size=1000)
+        frame = pd.read_csv(path, dtype={'id': str})
+        self.assertEqual(written, 2500)
+        self.assertEqual(len(frame), 2500)
+        self.assertTrue(frame['id'].is_unique)
+    
+    @unittest.skipUnless(load_generator.PYARROW_AVAILABLE, "pyarrow not installed")
+    def test_to_parquet(self):
+        """Test that Parquet output round-trips"""
+        path = os.path.join(self.tmp_dir, "load.parquet")
+        make_generator().to_parquet(path, 2500, chunk_size=1000)
+        self.assertEqual(len(pd.read_parquet(path)), 2500)
+    
+    def test_parquet_requires_pyarrow(self):
+        """Test that Parquet output without pyarrow fails clearly"""
+        original = load_generator.PYARROW_AVAILABLE
+        load_generator.PYARROW_AVAILABLE = False
+        try:
+            with self.assertRaises(ImportError):
+                make_generator().to_parquet("unused.parquet", 10)
+        finally:
+            load_generator.PYARROW_AVAILABLE = original
+    
+    def test_parse_product_mix(self):
+        """Test the CLI product mix syntax"""
+        self.assertEqual(parse_product_mix("iPhone 15=0.4, Pixel 8"), {"iPhone 15": 0.4, "Pixel 8": 1.0})
+    
+class TestLoadGeneratorDatabase(DatabaseTestCase):
+    """Test streaming generated tweets into the database"""
+    
+    def test_to_database(self):
+        """Test that every generated row is inserted"""
+        inserted = make_generator(with_sentiment=True).to_database(12000, chunk_size=5000)
+        self.assertEqual(inserted, 12000)
+        self.assertEqual(database.count_tweets(), 12000)
+    
+    def test_sample_tweets_have_unique_ids(self):
+        """Test that repeated sample data never overwrites earlier tweets"""
+        tweets = [tweet for _ in range(20) for tweet in generate_sample_tweets("Pixel 8", 50)]
+        self.assertEqual(len({tweet['id'] for tweet in tweets}), 1000)
+        self.assertEqual(set(tweets[0]), {'id', 'created_at', 'text', 'user_id', 'likes', 'retweets'})
+
+if __name__ == "__main__":
+    unittest.main()
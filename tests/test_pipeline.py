@@ -0,0 +1,226 @@
+import sys
+import os
+
+# Add src directory to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+import time
+import sqlite3
+import threading
+import unittest
+from unittest import mock
+import database
+import pipeline
+from streaming import StreamingPipeline, rebatch
+from tests.test_database import DatabaseTestCase, make_tweet
+
+def fake_collect(product, count):
+    """Stand-in for collect_tweet_pages that yields two pages per product"""
+    if product == "Broken":
+        raise RuntimeError("collector failed")
+    tweets = [make_tweet(f"{product}-{i}", product=product) for i in range(count)]
+    yield tweets[:count // 2]
+    yield tweets[count // 2:]
+
+class TestConcurrentPipeline(DatabaseTestCase):
+    """Test the concurrent multi-product orchestrator"""
+    
+    def setUp(self):
+        super().setUp()
+        patcher = mock.patch.object(pipeline, 'collect_tweet_pages', side_effect=fake_collect)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+    
+    def test_all_products_written(self):
+        """Test that every product is collected, scored and written once"""
+        report = pipeline.run_concurrent_pipeline(["iPhone 15", "Pixel 8", "Galaxy S24"], 20)
+        
+        self.assertEqual(set(report['products'].values()), {'written'})
+        self.assertEqual(database.count_tweets(), 60)
+        self.assertEqual(sorted(database.get_products()), ["Galaxy S24", "Pixel 8", "iPhone 15"])
+        for stage in ('collect', 'score', 'write', 'rate_limit_wait', 'wall'):
+            self.assertIn(stage, report['stages'])
+    
+    def test_failed_product_does_not_stop_others(self):
+        """Test that one failing collector is reported without losing the rest"""
+        report = pipeline.run_concurrent_pipeline(["Broken", "Pixel 8"], 5)
+        
+        self.assertEqual(report['products'], {"Broken": 'failed', "Pixel 8": 'written'})
+        self.assertEqual(database.count_tweets(), 5)
+    
+    def test_failure_after_first_page_is_reported(self):
+        """Test that a collector failing mid-stream is failed even though a page was written"""
+        def fail_midway(product, count):
+            yield [make_tweet(f"{product}-{i}", product=product) for i in range(count)]
+            if product == "Pixel 8":
+                raise RuntimeError("connection reset")
+        
+        with mock.patch.object(pipeline, 'collect_tweet_pages', side_effect=fail_midway):
+            report = pipeline.run_concurrent_pipeline(["iPhone 15", "Pixel 8"], 5, score_batch_size=1)
+        
+        self.assertEqual(report['products'], {"iPhone 15": 'written', "Pixel 8": 'failed'})
+        self.assertEqual(database.count_tweets(), 10)
+    
+    def test_async_collector_error_is_reported(self):
+        """Test that any exception from the async collector marks the product failed"""
+        class FakeCollector:
+            async def __aenter__(self):
+                return self
+            
+            async def __aexit__(self, *exc_info):
+                pass
+            
+            async def iter_pages(self, product, count, since_id=None):
+                yield [make_tweet(f"{product}-{i}", product=product) for i in range(count)]
+                if product == "Pixel 8":
+                    raise ValueError("bad payload")
+        
+        with mock.patch.dict(pipeline.TWITTER_CONFIG, {"collector": "async"}), \
+                mock.patch.object(pipeline, 'async_api_available', return_value=True), \
+                mock.patch.object(pipeline, 'AsyncTweetCollector', FakeCollector):
+            report = pipeline.run_concurrent_pipeline(["iPhone 15", "Pixel 8"], 5)
+        
+        self.assertEqual(report['products'], {"iPhone 15": 'written', "Pixel 8": 'failed'})
+    
+    def test_pages_scored_in_large_batches(self):
+        """Test that small pages from all products are gathered before scoring"""
+        sizes = []
+        analyze = pipeline.analyze_tweets_sentiment
+        
+        def score(tweets):
+            sizes.append(len(tweets))
+            return analyze(tweets)
+        
+        with mock.patch.object(pipeline, 'analyze_tweets_sentiment', side_effect=score):
+            report = pipeline.run_concurrent_pipeline(["iPhone 15", "Pixel 8", "Galaxy S24"], 20, score_batch_size=25)
+        
+        # Pages hold 10 tweets; 60 tweets are scored as 30 + 30
+        self.assertEqual(sizes, [30, 30])
+        self.assertEqual(set(report['products'].values()), {'written'})
+        self.assertEqual(database.count_tweets(), 60)
+    
+    def test_error_does_not_hang_on_full_queue(self):
+        """Test that a failing orchestrator stops collectors blocked on the page queue"""
+        def many_pages(product, count):
+            for i in range(200):
+                yield [make_tweet(f"{product}-{i}", product=product)]
+        
+        def run():
+            try:
+                pipeline.run_concurrent_pipeline(["iPhone 15", "Pixel 8"], 200)
+            except sqlite3.OperationalError as e:
+                errors.append(e)
+        
+        errors = []
+        with mock.patch.object(pipeline, 'collect_tweet_pages', side_effect=many_pages), \
+                mock.patch.object(pipeline, 'filter_new_tweets', side_effect=sqlite3.OperationalError("locked")):
+            thread = threading.Thread(target=run, daemon=True)
+            thread.start()
+            thread.join(timeout=10)
+        
+        self.assertFalse(thread.is_alive())
+        self.assertEqual(len(errors), 1)
+
+class TestIncrementalPipeline(DatabaseTestCase):
+    """Test that reruns only score and write new tweets"""
+    
+    def test_rerun_skips_stored_tweets(self):
+        """Test that re-collected tweets are counted as skipped, not rewritten"""
+        with mock.patch.object(pipeline, 'collect_tweet_pages', side_effect=fake_collect):
+            pipeline.run_concurrent_pipeline(["Pixel 8"], 10)
+        
+        with mock.patch.object(pipeline, 'collect_tweet_pages', side_effect=fake_collect), \
+                mock.patch.object(pipeline, 'analyze_tweets_sentiment') as analyze:
+            report = pipeline.run_concurrent_pipeline(["Pixel 8"], 10)
+        
+        analyze.assert_not_called()
+        self.assertEqual(report['skipped'], {"Pixel 8": 10})
+        self.assertEqual(report['products'], {"Pixel 8": 'unchanged'})
+        self.assertEqual(database.count_tweets(), 10)
+
+class TestStreamingPipeline(unittest.TestCase):
+    """Test the generic bounded-queue stage runner"""
+    
+    def test_order_and_counts(self):
+        """Test that batches flow through every stage in order"""
+        seen = []
+        stream = StreamingPipeline(
+            ([i] * 3 for i in range(5)),
+            [('double', lambda batch: [x * 2 for x in batch]), ('sink', seen.append)],
+            queue_size=2
+        )
+        report = stream.run()
+        
+        self.assertEqual(seen, [[i * 2] * 3 for i in range(5)])
+        self.assertEqual(report['stages']['double']['rows_in'], 15)
+        self.assertEqual(report['stages']['sink']['batches'], 5)
+    
+    def test_backpressure_bounds_buffering(self):
+        """Test that a slow sink holds the source back instead of buffering everything"""
+        produced = []
+        in_flight = []
+        lock = threading.Lock()
+        
+        def source():
+            for i in range(30):
+                with lock:
+                    produced.append(i)
+                yield [i]
+        
+        def slow_sink(batch):
+            time.sleep(0.005)
+            with lock:
+                in_flight.append(len(produced) - batch[0])
+        
+        report = StreamingPipeline(source(), [('pass', list), ('sink', slow_sink)], queue_size=2).run()
+        
+        # At most two queues of two batches plus one batch held by each worker
+        self.assertLessEqual(max(in_flight), 2 * 2 + 3)
+        self.assertEqual(report['bottleneck'], 'sink')
+        self.assertLessEqual(report['stages']['sink']['max_queue_depth'], 2)
+    
+    def test_stage_error_stops_stream(self):
+        """Test that a failing stage is reported and the stream still finishes"""
+        def boom(batch):
+            raise ValueError("bad batch")
+        
+        report = StreamingPipeline(([i] for i in range(100)), [('boom', boom), ('sink', list)]).run()
+        self.assertEqual(report['errors'], ["boom: bad batch"])
+        self.assertEqual(report['stages']['sink']['batches'], 0)
+    
+    def test_rebatch(self):
+        """Test that uneven pages are split and merged into full chunks"""
+        self.assertEqual(list(rebatch([[1, 2, 3], [4, 5]], 2)), [[1, 2], [3, 4], [5]])
+        self.assertEqual(list(rebatch([[1], [2], [3], [], [4]], 3)), [[1, 2, 3], [4]])
+
+class TestStreamProduct(DatabaseTestCase):
+    """Test the per-product streaming pipeline end to end"""
+    
+    def test_stream_product_writes_everything(self):
+        """Test that all stages run and every tweet is written"""
+        with mock.patch.object(pipeline, 'collect_tweet_pages', side_effect=fake_collect):
+            report = pipeline.stream_product("Pixel 8", 45, batch_size=10)
+        
+        stages = report['stages']
+        self.assertEqual(database.count_tweets(), 45)
+        self.assertEqual([stages[name]['rows_in'] for name in ('clean', 'score', 'enrich', 'write')], [45] * 4)
+        self.assertEqual(len(report['samples']), 3)
+        self.assertIn('sentiment_label', report['samples'][0])
+    
+    def test_run_pipeline_for_product(self):
+        """Test the printed single-product runner still returns success"""
+        with mock.patch.object(pipeline, 'collect_tweet_pages', side_effect=fake_collect):
+            self.assertTrue(pipeline.run_pipeline_for_product("Pixel 8", 10))
+            self.assertFalse(pipeline.run_pipeline_for_product("Broken", 10))
+    
+    def test_fresh_database_is_migrated(self):
+        """Test that the single-product runner creates the schema it writes to"""
+        database.close_connections()
+        database.DATABASE_PATH = os.path.join(self.tmp_dir, "fresh.db")
+        
+        with mock.patch.object(pipeline, 'collect_tweet_pages', side_effect=fake_collect):
+            self.assertTrue(pipeline.run_pipeline_for_product("Pixel 8", 10))
+        self.assertEqual(database.count_tweets(), 10)
+
+if __name__ == "__main__":
+    unittest.main()
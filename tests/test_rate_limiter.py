@@ -0,0 +1,147 @@
+import sys
+import os
+
+# Add src directory to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+import threading
+import unittest
+from types import SimpleNamespace
+from rate_limiter import TokenBucket
+from tweet_collector import collect_tweets_api
+
+class FakeClock:
+    """Manually advanced clock; sleeping just moves time forward"""
+    
+    def __init__(self, start=1000.0):
+        self.now = start
+        self.sleeps = []
+    
+    def __call__(self):
+        return self.now
+    
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+def make_bucket(clock, capacity=3, window=9):
+    return TokenBucket(capacity, window, clock=clock, wall_clock=clock, sleep=clock.sleep)
+
+class RateLimitError(Exception):
+    """Stand-in for tweepy.TooManyRequests"""
+    
+    def __init__(self, headers):
+        super().__init__("429 Too Many Requests")
+        self.response = SimpleNamespace(status_code=429, headers=headers)
+
+class StubClient:
+    """Local stand-in for tweepy.Client"""
+    
+    def __init__(self, error=None):
+        self.error = error
+        self.calls = 0
+    
+    def search_recent_tweets(self, query, max_results, tweet_fields):
+        self.calls += 1
+        if self.error:
+            raise self.error
+        tweet = SimpleNamespace(
+            id=1, created_at="2024-01-01 00:00:00", text=f"About {query}",
+            author_id=7, public_metrics={'like_count': 3, 'retweet_count': 1}
+        )
+        return SimpleNamespace(data=[tweet])
+
+class TestTokenBucket(unittest.TestCase):
+    """Test the token bucket with a fake clock"""
+    
+    def setUp(self):
+        self.clock = FakeClock()
+        self.bucket = make_bucket(self.clock)
+    
+    def test_burst_then_refill(self):
+        """Test that a full bucket allows a burst and then refills at capacity/window"""
+        waits = [self.bucket.acquire() for _ in range(4)]
+        
+        self.assertEqual(waits[:3], [0.0, 0.0, 0.0])
+        self.assertAlmostEqual(waits[3], 3.0)
+        self.assertAlmostEqual(self.bucket.metrics()['total_wait'], 3.0)
+    
+    def test_try_acquire_does_not_wait(self):
+        """Test that try_acquire fails instead of sleeping"""
+        for _ in range(3):
+            self.assertTrue(self.bucket.try_acquire())
+        
+        self.assertFalse(self.bucket.try_acquire())
+        self.assertAlmostEqual(self.bucket.wait_time(), 3.0)
+        self.assertEqual(self.clock.sleeps, [])
+    
+    def test_reset_header_blocks_until_reset(self):
+        """Test that remaining=0 holds callers until x-rate-limit-reset"""
+        self.bucket.update_from_headers({
+            'x-rate-limit-limit': '3',
+            'x-rate-limit-remaining': '0',
+            'x-rate-limit-reset': str(int(self.clock.now + 60))
+        })
+        
+        self.assertTrue(self.bucket.metrics()['blocked'])
+        self.assertAlmostEqual(self.bucket.acquire(), 60.0)
+        # After the reset the full window quota is available again
+        self.assertAlmostEqual(self.bucket.tokens, 2.0)
+    
+    def test_block_for_resumes_at_refill_rate(self):
+        """Test that a back-off without a reset header is not followed by a burst"""
+        self.bucket.block_for(30)
+        
+        self.assertAlmostEqual(self.bucket.acquire(), 33.0)
+        self.assertEqual(self.bucket.tokens, 0.0)
+        self.clock.now += 6
+        self.assertAlmostEqual(self.bucket.tokens, 2.0)
+    
+    def test_shared_across_threads(self):
+        """Test that concurrent callers never take more tokens than exist"""
+        bucket = TokenBucket(50, 900)
+        granted = []
+        
+        def worker():
+            for _ in range(20):
+                granted.append(bucket.try_acquire())
+        
+        threads = [threading.Thread(target=worker) for _ in range(5)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        
+        self.assertEqual(sum(granted), 50)
+
+class TestCollectorRateLimit(unittest.TestCase):
+    """Test that the API collector consults the limiter"""
+    
+    def setUp(self):
+        self.clock = FakeClock()
+        self.bucket = make_bucket(self.clock, capacity=1)
+    
+    def collect(self, client):
+        # No checkpoint: these tests must not touch collection_state in data/tweets.db
+        return collect_tweets_api("Pixel 8", 10, client=client, limiter=self.bucket, checkpoint=False)
+    
+    def test_each_request_takes_a_token(self):
+        """Test that back-to-back collections wait for the bucket"""
+        client = StubClient()
+        
+        first = self.collect(client)
+        self.collect(client)
+        
+        self.assertEqual(first[0]['likes'], 3)
+        self.assertEqual(client.calls, 2)
+        self.assertAlmostEqual(sum(self.clock.sleeps), 9.0)
+    
+    def test_429_headers_update_limiter(self):
+        """Test that a rate limited response blocks the shared bucket"""
+        error = RateLimitError({'x-rate-limit-remaining': '0', 'x-rate-limit-reset': str(int(self.clock.now + 120))})
+        
+        self.assertEqual(self.collect(StubClient(error)), [])
+        self.assertAlmostEqual(self.bucket.wait_time(), 120.0)
+
+if __name__ == "__main__":
+    unittest.main()
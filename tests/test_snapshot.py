@@ -0,0 +1,133 @@
+import sys
+import os
+
+# Add src directory to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+import unittest
+from datetime import date
+from unittest import mock
+import database
+import snapshot
+from tests.test_database import DatabaseTestCase, make_tweet
+
+@unittest.skipUnless(snapshot.PYARROW_AVAILABLE, "pyarrow not installed")
+class TestSnapshot(DatabaseTestCase):
+    """Test the memory-mapped Arrow snapshot used by the dashboard"""
+
+    def setUp(self):
+        super().setUp()
+        database.insert_tweets([
+            make_tweet(f"{product}-{day}-{hour}", product=product,
+                       created_at=f"2024-01-{day:02d} {hour:02d}:00:00",
+                       sentiment=round((day * 7 + hour) % 21 / 10 - 1, 1))
+            for product in ("iPhone 15", "Pixel 8")
+            for day in range(1, 11)
+            for hour in (3, 12, 21)
+        ])
+
+    def results(self, source):
+        """Every tweet-row query against the database module or a Snapshot"""
+        window = dict(product="iPhone 15", start_date=date(2024, 1, 3), end_date=date(2024, 1, 8))
+        return {
+            'recent': list(source.get_recent_tweets(**window, limit=4)['id']),
+            'all_recent': list(source.get_recent_tweets(limit=2)['id']),
+            'missing': len(source.get_tweets_frame(product="Galaxy S24")),
+            'frame': source.get_tweets_frame(**window).drop(columns='created_ts').to_dict('list'),
+            'all_frame_ids': sorted(source.get_tweets_frame()['id']),
+            'all_window_ids': sorted(source.get_tweets_frame(start_date=date(2024, 1, 2), end_date=date(2024, 1, 3))['id']),
+        }
+
+    def test_queries_match_database(self):
+        """Test that snapshot queries return what the SQL queries return"""
+        database.archive_tweets(date(2024, 1, 4))
+        version = snapshot.refresh_snapshot()
+
+        mapped = snapshot.open_snapshot(version)
+        self.assertIsNotNone(mapped)
+        self.assertEqual(self.results(mapped), self.results(database))
+
+    def test_stale_snapshot_is_not_served(self):
+        """Test that a write makes the old snapshot stale until refreshed"""
+        version = snapshot.refresh_snapshot()
+        self.assertEqual(version, database.get_db_version())
+
+        database.insert_tweets([make_tweet("new", created_at="2024-01-11 09:00:00")])
+        self.assertGreater(database.get_db_version(), version)
+        self.assertIsNone(snapshot.open_snapshot(database.get_db_version()))
+
+        version = snapshot.refresh_snapshot()
+        mapped = snapshot.open_snapshot(version)
+        self.assertEqual(mapped.get_recent_tweets("iPhone 15", limit=1)['id'][0], "new")
+
+    def test_refresh_skips_current_snapshot(self):
+        """Test that refreshing an up-to-date snapshot does not rewrite it"""
+        snapshot.refresh_snapshot()
+        mtime = snapshot.snapshot_mtime()
+        snapshot.refresh_snapshot()
+        self.assertEqual(snapshot.snapshot_mtime(), mtime)
+
+    def test_open_is_zero_copy(self):
+        """Test that opening the snapshot maps it instead of reading it into memory"""
+        import pyarrow as pa
+
+        snapshot.refresh_snapshot()
+        allocated = pa.total_allocated_bytes()
+        mapped = snapshot.open_snapshot()
+
+        self.assertEqual(pa.total_allocated_bytes(), allocated)
+        self.assertEqual(mapped.table.num_rows, 60)
+
+    def test_old_mapping_survives_rebuild(self):
+        """Test that a session holding the old snapshot can still read it"""
+        snapshot.refresh_snapshot()
+        old = snapshot.open_snapshot()
+
+        database.insert_tweets([make_tweet("new", created_at="2024-01-11 09:00:00")])
+        snapshot.refresh_snapshot()
+
+        self.assertEqual(len(old.get_tweets_frame("iPhone 15")), 30)
+        self.assertEqual(len(snapshot.open_snapshot().get_tweets_frame("iPhone 15")), 31)
+
+    def test_tweets_without_timestamp_are_left_out(self):
+        """Test that a NULL created_ts does not break building or opening the snapshot"""
+        database.insert_tweets([make_tweet("undated", created_at="not a date")])
+        version = snapshot.refresh_snapshot()
+
+        mapped = snapshot.open_snapshot(version)
+        self.assertEqual(mapped.table.num_rows, 60)
+        self.assertNotIn("undated", list(mapped.get_tweets_frame()['id']))
+
+    def test_refresh_rereads_only_changed_products(self):
+        """Test that a refresh after a known write reads just the written products"""
+        version = snapshot.refresh_snapshot()
+        database.insert_tweets([
+            make_tweet("new", product="Pixel 8", created_at="2024-01-11 09:00:00"),
+            # Overwrite moves this tweet from iPhone 15 to Pixel 8
+            make_tweet("iPhone 15-1-3", product="Pixel 8", created_at="2024-01-01 03:00:00"),
+        ])
+
+        with mock.patch.object(snapshot, '_read_tweets', wraps=snapshot._read_tweets) as read:
+            version = snapshot.refresh_snapshot(products=["Pixel 8"], since_version=version)
+        read.assert_called_once_with(["Pixel 8"])
+
+        mapped = snapshot.open_snapshot(version)
+        self.assertEqual(mapped.offsets, {"Pixel 8": [0, 32], "iPhone 15": [32, 61]})
+        for product in ("iPhone 15", "Pixel 8"):
+            self.assertEqual(mapped.get_tweets_frame(product).drop(columns='created_ts').to_dict('list'),
+                             database.get_tweets_frame(product).drop(columns='created_ts').to_dict('list'))
+
+    def test_refresh_rebuilds_when_snapshot_was_already_stale(self):
+        """Test that changes the caller did not make force a full rebuild"""
+        snapshot.refresh_snapshot()
+        database.insert_tweets([make_tweet("other", product="iPhone 15", created_at="2024-01-11 09:00:00")])
+        version = database.get_db_version()
+        database.insert_tweets([make_tweet("new", product="Pixel 8", created_at="2024-01-11 09:00:00")])
+
+        with mock.patch.object(snapshot, '_read_tweets', wraps=snapshot._read_tweets) as read:
+            version = snapshot.refresh_snapshot(products=["Pixel 8"], since_version=version)
+        read.assert_called_once_with()
+        self.assertEqual(snapshot.open_snapshot(version).table.num_rows, 62)
+
+if __name__ == '__main__':
+    unittest.main()
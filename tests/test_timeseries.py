@@ -0,0 +1,89 @@
+import sys
+import os
+
+# Add src directory to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+import unittest
+from datetime import date
+import pandas as pd
+import database
+import timeseries
+from utils import prepare_tweets
+from tests.test_database import DatabaseTestCase, make_tweet
+
+class TestResolution(unittest.TestCase):
+    """Test automatic resolution selection"""
+    
+    def test_select_resolution(self):
+        """Test that the finest resolution within max_points is chosen"""
+        day = date(2024, 1, 1)
+        self.assertEqual(timeseries.select_resolution(day, day, max_points=2000), 'minute')
+        self.assertEqual(timeseries.select_resolution(day, date(2024, 1, 2), max_points=2000), 'hour')
+        self.assertEqual(timeseries.select_resolution(day, date(2024, 6, 1), max_points=2000), 'day')
+        self.assertEqual(timeseries.select_resolution(day, date(2040, 1, 1), max_points=2000), 'week')
+    
+    def test_available_resolutions(self):
+        """Test that resolutions over the point limit are not offered"""
+        self.assertEqual(timeseries.available_resolutions(date(2024, 1, 1), date(2024, 1, 30), max_points=2000),
+                         ['hour', 'day', 'week'])
+
+class TestSeries(DatabaseTestCase):
+    """Test rollup-backed series against bucketing the raw tweets"""
+    
+    def setUp(self):
+        super().setUp()
+        self.tweets = [
+            make_tweet(i, product="iPhone 15" if i % 4 else "Pixel 8",
+                       created_at=f"2024-01-{1 + i % 12:02d} {i % 24:02d}:{i * 7 % 60:02d}:{i % 60:02d}",
+                       sentiment=round((i * 13 % 21) / 10 - 1, 1))
+            for i in range(400)
+        ]
+        database.insert_tweets(self.tweets)
+        self.frame = prepare_tweets(pd.DataFrame(self.tweets))
+    
+    def expected(self, resolution, product, start_date, end_date):
+        df = self.frame[self.frame['product'] == product]
+        df = df[(df['day'] >= pd.Timestamp(start_date)) & (df['day'] <= pd.Timestamp(end_date))]
+        grouped = df.groupby(timeseries.floor_times(df['created_at'], resolution))
+        return pd.DataFrame({
+            'time': grouped.size().index.to_numpy(),
+            'sentiment': grouped['sentiment'].mean().round(9).to_numpy(),
+            'count': grouped.size().to_numpy()
+        }).to_dict('list')
+    
+    def test_series_match_raw_buckets(self):
+        """Test every resolution against pandas bucketing of the same tweets"""
+        for resolution in timeseries.RESOLUTIONS:
+            series = timeseries.get_series("iPhone 15", date(2024, 1, 3), date(2024, 1, 10), resolution)
+            series['sentiment'] = series['sentiment'].round(9)
+            self.assertEqual(series.to_dict('list'), self.expected(resolution, "iPhone 15", date(2024, 1, 3), date(2024, 1, 10)),
+                             resolution)
+    
+    def test_zoom_in_uses_finer_buckets(self):
+        """Test that a one-day range is served per minute from the rollups"""
+        series = timeseries.get_series("Pixel 8", date(2024, 1, 5), date(2024, 1, 5))
+        
+        self.assertEqual(list(series['time'].dt.floor('min')), list(series['time']))
+        self.assertEqual(series['count'].sum(), database.get_tweet_metrics("Pixel 8", date(2024, 1, 5), date(2024, 1, 5))['total_tweets'])
+    
+    def test_overwrite_moves_minute_bucket(self):
+        """Test that re-inserting a tweet at another time moves it between minute buckets"""
+        moved = dict(self.tweets[1], created_at="2024-01-02 00:00:30")
+        database.insert_tweets([moved])
+        
+        series = timeseries.get_series("iPhone 15", date(2024, 1, 2), date(2024, 1, 2), 'minute')
+        self.assertIn(pd.Timestamp("2024-01-02 00:00:00"), list(series['time']))
+        self.assertNotIn(pd.Timestamp("2024-01-02 01:07:01"), list(series['time']))
+    
+    def test_undated_only_product(self):
+        """Test that a product with only undated tweets is listed but has no bounds or series"""
+        database.insert_tweets([make_tweet("undated", product="Galaxy S24", created_at="not a date")])
+        
+        self.assertIn("Galaxy S24", database.get_products())
+        self.assertEqual(database.get_date_bounds("Galaxy S24"), (None, None))
+        self.assertTrue(timeseries.get_series("Galaxy S24").empty)
+        self.assertTrue(database.get_tweets_frame("Galaxy S24").empty)
+
+if __name__ == '__main__':
+    unittest.main()